@@ -0,0 +1,60 @@
+# app/handlers/cluster_handler.py
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db_session
+from app.handlers.shelter_csv_user_handler import DEFAULT_USER_CSV
+from app.services.cluster_service import CLUSTER_MAX_ZOOM, get_cluster_tile
+
+router = APIRouter()
+
+# 타일 응답 브라우저/CDN 캐시 시간(초). 데이터가 바뀌면 ETag(버전)가 바뀐다.
+CLUSTER_TILE_MAX_AGE = int(os.getenv("CLUSTER_TILE_MAX_AGE", "300"))
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match 헤더가 etag와 맞는지 (RFC 9110 약한 비교).
+    쉼표로 나뉜 여러 태그 / W/ 접두사 / "*"를 처리한다 — CDN·프록시가 W/를 붙이거나 태그를 합쳐 보내도 304.
+    """
+    if not if_none_match:
+        return False
+    target = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == target:
+            return True
+    return False
+
+@router.get("/clusters/{dataset}/{z}/{x}/{y}")
+def get_cluster_tile_handler(
+    request: Request,
+    dataset: str = Path(..., regex="^(shelters-csv|shelters|hospitals)$"),
+    z: int = Path(..., ge=0, le=CLUSTER_MAX_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    grade_scope: str = Query(
+        "national",
+        regex="^(national|sigungu)$",
+        description="shelters-csv 등급 기준 (national: 전국 분위수 | sigungu: 시군구 내 분위수)"
+    ),
+    db: Session = Depends(get_db_session),
+):
+    """
+    줌 z의 지도 타일 (x, y) 안 마커 클러스터. 더 깊은 줌은 /shelters/csv/viewport로 개별 시설을 조회한다.
+    응답: {"z", "x", "y", "version", "clusters": [{"latitude", "longitude", "count", "id", "grade"}]}
+    """
+    if x >= (1 << z) or y >= (1 << z):
+        raise HTTPException(status_code=400, detail="Tile x/y out of range for zoom")
+    res = get_cluster_tile(dataset, z, x, y, db=db, csv_path=DEFAULT_USER_CSV, grade_scope=grade_scope)
+    if res is None:
+        raise HTTPException(status_code=404, detail="Dataset is empty")
+    version, body = res
+    headers = {
+        "ETag": f'"{dataset}-{grade_scope}-{version}"',
+        "Cache-Control": f"public, max-age={CLUSTER_TILE_MAX_AGE}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,44 +1,31 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, Path
 from sqlalchemy.orm import Session
 from sqlmodel import select
-from math import radians, cos, sin, asin, sqrt
 from datetime import datetime
 
 from app.db.session import get_db_session
 from app.models.hospital_model import Hospital, HospitalOperatingHour
 from app.schemas.hospital_schema import HospitalRead
 from app.schemas.hospital_schema import HospitalOperatingHourRead
+from app.services.geo_index_service import nearest_hospitals
+from app.services.hospital_search_service import search_hospitals_by_name
 
 router = APIRouter()
 
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-    c = 2 * asin(sqrt(a))
-    return R * c
-
-
 @router.get("/hospital/nearby", response_model=dict)
 def get_nearby_hospitals(
-    latitude: float = Query(...),
-    longitude: float = Query(...),
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
     limit: int = Query(10),
+    mode: str = Query(
+        "index",
+        regex="^(index|bbox)$",
+        description="조회 방식 (index: 메모리 공간 인덱스 | bbox: SQL 위경도 범위 필터 후 반경 확장)"
+    ),
     db: Session = Depends(get_db_session)
 ):
-    hospitals = db.exec(select(Hospital)).all()
-
-    hospitals_with_distance = []
-    for hospital in hospitals:
-        if hospital.latitude is None or hospital.longitude is None:
-            continue
-
-        dist = calculate_distance(latitude, longitude, hospital.latitude, hospital.longitude)
-        hospitals_with_distance.append((hospital, dist))
-
-    sorted_hospitals = sorted(hospitals_with_distance, key=lambda x: x[1])[:limit]
+    sorted_hospitals = nearest_hospitals(db, latitude, longitude, limit, mode)
 
     result = []
     for h, dist in sorted_hospitals:
@@ -58,6 +45,36 @@ def get_nearby_hospitals(
     }
 
 
+@router.get("/hospital/search", response_model=dict)
+def search_hospitals(
+    q: str = Query(..., min_length=1, description="병원명 검색어 (초성 'ㅅㅇㄷ' / 오타 1글자 허용)"),
+    limit: int = Query(20, ge=1, le=100),
+    match: str = Query(
+        "auto",
+        regex="^(substring|choseong|jamo|fuzzy|auto)$",
+        description="검색 방식 (substring | choseong: 초성 | jamo: 입력 중 자모 | fuzzy: 오타 1글자 허용 | auto)"
+    ),
+    db: Session = Depends(get_db_session)
+):
+    hospitals = search_hospitals_by_name(db, q, limit, match)
+
+    result = []
+    for h in hospitals:
+        result.append({
+            "id": h.id,
+            "facility_name": h.facility_name,
+            "road_address": h.road_address,
+            "latitude": h.latitude,
+            "longitude": h.longitude,
+            "phone_number": h.phone_number,
+        })
+
+    return {
+        "message": "Hospitals searched successfully",
+        "data": result
+    }
+
+
 @router.get("/hospital/{hospital_id}", response_model=dict)
 def get_hospital_detail(
     hospital_id: int = Path(..., ge=1),
@@ -1,23 +1,50 @@
-from fastapi import APIRouter, Query, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from sqlmodel import Session, select
 
+from app.handlers.user_handler import get_current_admin
+from app.models.user_model import User
 from app.schemas.shelter_csv_schema import ShelterCSVResponse
 from app.services.shelter_csv_service import (
     get_by_priority_from_csv,
+    get_facets_from_csv,
     get_nearby_from_csv, ADMIN_CSV,
     get_shelter_by_id_from_csv,
+    get_snapshot_stats,
     search_by_name_from_csv,
+    shelters_json,
 )
+from app.services.shelter_rank_service import get_stats as rank_stats
+from app.services.shelter_reload_service import ReloadRejected, get_reload_status, reload_datasets
+from app.services.shelter_upload_service import (
+    UPLOAD_MAX_BYTES,
+    discard_upload,
+    install_upload,
+    open_upload,
+    validate_csv,
+)
+from app.utils.filter_util import FILTER_HELP
 
 router = APIRouter(prefix="/shelters/csv/admin", tags=["Shelter - CSV - ADMIN"])
 
 @router.get("/nearby", response_model=List[ShelterCSVResponse])
 def get_nearby_shelters_admin(
     limit: int = Query(20, ge=1, le=500),
+    grade_scope: str = Query(
+        "national",
+        regex="^(national|sigungu)$",
+        description="등급 기준 (national: 전국 분위수 | sigungu: 시군구 내 분위수)"
+    ),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
 ):
     # 위/경도 없이 priority 순 정렬
-    return get_by_priority_from_csv(ADMIN_CSV, limit)
+    # 서비스가 만든 응답 모델을 재검증 없이 바로 JSON으로 (response_model은 문서용)
+    try:
+        items = get_by_priority_from_csv(ADMIN_CSV, limit, grade_scope, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(shelters_json(items), media_type="application/json")
 
 @router.get("/search", response_model=List[ShelterCSVResponse])
 def search_shelters_admin(
@@ -28,13 +55,129 @@ def search_shelters_admin(
         regex="^(priority|priority_grade|name|distance|accuracy)$",
         description="정렬 방식 (priority | priority_grade | name | distance | accuracy)"
     ),
+    grade_scope: str = Query(
+        "national",
+        regex="^(national|sigungu)$",
+        description="등급 기준 (national: 전국 분위수 | sigungu: 시군구 내 분위수)"
+    ),
+    match: str = Query(
+        "substring",
+        regex="^(substring|choseong|jamo|fuzzy|auto)$",
+        description="검색 방식 (substring | choseong: 초성 | jamo: 입력 중 자모 | fuzzy: 오타 1글자 허용 | auto)"
+    ),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
+):
+    try:
+        items = search_by_name_from_csv(
+            path=ADMIN_CSV,
+            query=q,
+            limit=limit,
+            sort_mode=sort_mode,
+            grade_scope=grade_scope,
+            match=match,
+            filters=filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(shelters_json(items), media_type="application/json")
+
+@router.get("/facets")
+def get_facets_admin(
+    q: Optional[str] = Query(None, description="시설명 부분검색어 (있으면 검색 결과 안에서 센다)"),
+    grade_scope: str = Query(
+        "national",
+        regex="^(national|sigungu)$",
+        description="등급 기준 (national: 전국 분위수 | sigungu: 시군구 내 분위수)"
+    ),
+    match: str = Query(
+        "substring",
+        regex="^(substring|choseong|jamo|fuzzy|auto)$",
+        description="검색 방식 (substring | choseong: 초성 | jamo: 입력 중 자모 | fuzzy: 오타 1글자 허용 | auto)"
+    ),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
+):
+    """
+    시설 유형 / 시군구 / priority_grade / recommend_grade별 개수 (목록을 페이지로 넘기며 셀 필요 없음)
+    """
+    try:
+        return get_facets_from_csv(ADMIN_CSV, q, match, grade_scope, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/stats")
+def get_snapshot_stats_admin():
+    """
+    로드된 CSV 스냅샷별 행 수 / 공간 인덱스 / 셀별 k-최근접 후보표 메모리
+    """
+    return get_snapshot_stats()
+
+@router.get("/stats/rank")
+def get_rank_stats_admin():
+    """
+    병합 랭크 테이블(USER+ADMIN) 행 수 / 메모리 / 반경 병합 통계
+    """
+    return rank_stats()
+
+@router.post("/reload")
+def reload_datasets_admin(
+    target: str = Query("all", regex="^(all|csv|rank)$", description="재적재 대상 (csv: 사용자/관리자 CSV | rank: 병합 랭크 테이블 | all)"),
+    force: bool = Query(False, description="파일이 그대로여도 다시 만든다"),
+    wait: bool = Query(False, description="끝날 때까지 기다렸다가 결과 반환 (기본: 백그라운드로 돌리고 바로 반환)"),
+    user: User = Depends(get_current_admin),
+):
+    """
+    데이터셋 재적재: 새 스냅샷을 요청 경로 밖에서 다 만든 뒤 한 번에 교체 (그동안 조회는 이전 데이터).
+    관리자 토큰 필요. 대상이 이미 재적재 중이면 409, force는 대상별 간격 제한(429 + Retry-After).
+    """
+    try:
+        return reload_datasets(target, force, wait, trigger=f"admin:{user.id}", admit=True)
+    except ReloadRejected as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.retry_after is not None else None
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+@router.get("/reload")
+def get_reload_status_admin(user: User = Depends(get_current_admin)):
+    """
+    대상별 마지막 재적재 상태 (idle | queued | running | ok | failed) / 파일 감시 설정. 관리자 토큰 필요.
+    """
+    return get_reload_status()
+
+@router.post("/upload", status_code=202)
+async def upload_csv_admin(
+    request: Request,
+    dataset: str = Query(..., regex="^(user|admin)$", description="교체할 CSV (user: 사용자용 | admin: 관리자용)"),
+    dry_run: bool = Query(False, description="검증만 하고 교체하지 않음"),
+    user: User = Depends(get_current_admin),
 ):
-    return search_by_name_from_csv(
-        path=ADMIN_CSV,
-        query=q,
-        limit=limit,
-        sort_mode=sort_mode,
-    )
+    """
+    랭크 CSV 업로드 (요청 본문 = CSV 원본, 예: curl --data-binary @file.csv -H "Content-Type: text/csv").
+    본문을 받는 대로 임시 파일에 쓰고(메모리에 모으지 않음) 청크 단위로 컬럼/좌표를 검증한다.
+    통과하면 CSV를 원자적으로 교체하고 새 스냅샷은 백그라운드에서 만든다 (202, 진행은 GET /reload).
+    검증 실패는 422 + 보고서(사유별 개수 / 잘못된 행 예시). 관리자 토큰 필요.
+    """
+    # 크기를 알려 주면 본문을 받기 전에 거절
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"upload exceeds {UPLOAD_MAX_BYTES} bytes")
+    f, tmp = await run_in_threadpool(open_upload, dataset)
+    try:
+        size = 0
+        with f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"upload exceeds {UPLOAD_MAX_BYTES} bytes")
+                await run_in_threadpool(f.write, chunk)
+        report = await run_in_threadpool(validate_csv, tmp, dataset)
+        if not report["ok"]:
+            raise HTTPException(status_code=422, detail=report)
+        if not dry_run:
+            print(f"[UPLOAD] {dataset} CSV uploaded by user {user.id} ({size} bytes)")
+            report["reload"] = await run_in_threadpool(install_upload, tmp, dataset)
+        return report
+    finally:
+        # 교체됐으면 임시 파일은 이미 없다
+        await run_in_threadpool(discard_upload, tmp)
 
 @router.get("/{shelter_id}", response_model=ShelterCSVResponse)
 def get_shelter_detail_admin(
@@ -43,4 +186,4 @@ def get_shelter_detail_admin(
     row = get_shelter_by_id_from_csv(ADMIN_CSV, shelter_id)
     if not row:
         raise HTTPException(status_code=404, detail="Shelter not found")
-    return row
+    return Response(row.model_dump_json(), media_type="application/json")
@@ -1,9 +1,23 @@
 # app/handlers/shelter_csv_handler.py
 import os
-from fastapi import APIRouter, Query, HTTPException
-from typing import List
-from app.services.shelter_csv_service import get_nearby_from_csv, get_shelter_by_id_from_csv
-from app.schemas.shelter_csv_schema import ShelterCSVResponse
+from fastapi import APIRouter, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.services.shelter_csv_service import (
+    AREA_MAX_RADIUS_KM,
+    AREA_MAX_RESULTS,
+    RECOMMEND_CANDIDATES,
+    RECOMMEND_VULN_MODE,
+    get_in_viewport_from_csv,
+    get_nearby_from_csv,
+    get_recommendation_from_csv,
+    get_shelter_by_id_from_csv,
+    get_within_radius_from_csv,
+    nearby_batch_ndjson,
+    shelters_json,
+)
+from app.schemas.shelter_csv_schema import ShelterCSVBatchRequest, ShelterCSVRecommendResponse, ShelterCSVResponse
+from app.utils.filter_util import FILTER_HELP
 
 router = APIRouter(prefix="/shelters/csv", tags=["Shelter - CSV"])
 
@@ -11,15 +25,143 @@ DEFAULT_USER_CSV = os.getenv("SHELTER_USER_ALL_CSV", "/data/shelters_rank_user_a
 
 @router.get("/nearby", response_model=List[ShelterCSVResponse])
 def get_nearby_shelters_csv(
-    latitude: float = Query(...),
-    longitude: float = Query(...),
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
     limit: int = Query(20, ge=1, le=500),
+    grade_scope: str = Query(
+        "national",
+        regex="^(national|sigungu)$",
+        description="등급 기준 (national: 전국 분위수 | sigungu: 시군구 내 분위수)"
+    ),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
 ):
-    return get_nearby_from_csv(
-        path=DEFAULT_USER_CSV,
-        lat=latitude,
-        lon=longitude,
-        limit=limit,
+    # 서비스가 만든 응답 모델을 재검증 없이 바로 JSON으로 (response_model은 문서용)
+    try:
+        items = get_nearby_from_csv(
+            path=DEFAULT_USER_CSV,
+            lat=latitude,
+            lon=longitude,
+            limit=limit,
+            grade_scope=grade_scope,
+            filters=filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(shelters_json(items), media_type="application/json")
+
+@router.get("/recommend", response_model=ShelterCSVRecommendResponse)
+def get_recommended_shelter_csv(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    candidates: int = Query(RECOMMEND_CANDIDATES, ge=1, le=200, description="점수를 매길 가까운 후보 수"),
+    alternatives: int = Query(4, ge=0, le=20, description="추천 외에 돌려줄 대안 수"),
+    grade_scope: str = Query("national", regex="^(national|sigungu)$"),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
+    vuln_mode: str = Query(
+        RECOMMEND_VULN_MODE,
+        regex="^(reserve|prefer)$",
+        description="취약성 항 방향 (reserve: 취약 인구가 많이 배정된 대피소를 뒤로 — 그 주민 몫으로 남겨 둠 | "
+                    "prefer: 앞으로 — 고령자/아동 등 취약 계층 사용자용)",
+    ),
+):
+    """
+    가까운 후보 중 거리 / 남은 수용력(capacity_est, assigned_pop) / 취약성(vuln, p_elderly, p_child)
+    가중 점수가 가장 높은 대피소(recommended)와 대안(alternatives). 항목마다 점수 구성이 함께 온다.
+
+    취약성 항은 기본(reserve)으로 취약 인구 비율이 **높을수록 점수를 깎는다** — 일반 사용자를 취약 계층이
+    많이 배정된 대피소에서 분산시키기 위한 것. 취약 계층 사용자에게는 vuln_mode=prefer로 방향을 뒤집는다.
+    가중치는 SHELTER_CSV_RECOMMEND_WEIGHTS(거리,수용력,취약성), 기본 방향은 SHELTER_CSV_RECOMMEND_VULN_MODE.
+    """
+    try:
+        result = get_recommendation_from_csv(
+            path=DEFAULT_USER_CSV,
+            lat=latitude,
+            lon=longitude,
+            candidates=candidates,
+            alternatives=alternatives,
+            grade_scope=grade_scope,
+            filters=filters,
+            vuln_mode=vuln_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(result.model_dump_json(), media_type="application/json")
+
+def _area_response(items, total: int) -> Response:
+    # 상한으로 잘렸는지 클라이언트가 알 수 있도록 전체 개수를 헤더로
+    return Response(
+        shelters_json(items),
+        media_type="application/json",
+        headers={"X-Total-Count": str(total), "X-Result-Truncated": "true" if total > len(items) else "false"},
+    )
+
+@router.get("/radius", response_model=List[ShelterCSVResponse])
+def get_shelters_in_radius_csv(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=AREA_MAX_RADIUS_KM),
+    limit: int = Query(200, ge=1, le=AREA_MAX_RESULTS),
+    grade_scope: str = Query("national", regex="^(national|sigungu)$"),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
+):
+    """
+    반경 radius_km 이내 대피소 (가까운 순, 동률은 CSV 행 순서).
+    X-Total-Count: 반경 안 전체 개수, X-Result-Truncated: limit으로 잘렸는지 여부
+    """
+    try:
+        items, total = get_within_radius_from_csv(
+            path=DEFAULT_USER_CSV,
+            lat=latitude,
+            lon=longitude,
+            radius_km=radius_km,
+            limit=limit,
+            grade_scope=grade_scope,
+            filters=filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _area_response(items, total)
+
+@router.get("/viewport", response_model=List[ShelterCSVResponse])
+def get_shelters_in_viewport_csv(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(500, ge=1, le=AREA_MAX_RESULTS),
+    grade_scope: str = Query("national", regex="^(national|sigungu)$"),
+    filters: Optional[str] = Query(None, alias="filter", description=FILTER_HELP),
+):
+    """
+    지도 화면(위경도 사각형, 경계 포함) 안 대피소. 사각형 중심에서 가까운 순, 동률은 CSV 행 순서.
+    X-Total-Count: 사각형 안 전체 개수, X-Result-Truncated: limit으로 잘렸는지 여부
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="min_lat/min_lon must not exceed max_lat/max_lon")
+    try:
+        items, total = get_in_viewport_from_csv(
+            path=DEFAULT_USER_CSV,
+            min_lat=min_lat,
+            min_lon=min_lon,
+            max_lat=max_lat,
+            max_lon=max_lon,
+            limit=limit,
+            grade_scope=grade_scope,
+            filters=filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _area_response(items, total)
+
+@router.post("/nearby/batch")
+def get_nearby_shelters_csv_batch(body: ShelterCSVBatchRequest):
+    """
+    여러 기준점(최대 SHELTER_CSV_BATCH_MAX_POINTS개)의 근접 대피소를 한 번에 조회.
+    응답은 NDJSON: 기준점 1개당 한 줄 {"index", "key", "latitude", "longitude", "data": [ShelterCSVResponse...]}
+    """
+    return StreamingResponse(
+        nearby_batch_ndjson(DEFAULT_USER_CSV, body.points, body.limit, body.grade_scope),
+        media_type="application/x-ndjson",
     )
 
 @router.get("/{shelter_id}", response_model=ShelterCSVResponse)
@@ -27,4 +169,4 @@ def get_shelter_detail_csv(shelter_id: str):
     row = get_shelter_by_id_from_csv(DEFAULT_USER_CSV, shelter_id)
     if not row:
         raise HTTPException(status_code=404, detail="Shelter not found")
-    return row
+    return Response(row.model_dump_json(), media_type="application/json")
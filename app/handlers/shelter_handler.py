@@ -1,7 +1,6 @@
 #app.handlers.shelter_handler.py
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from math import radians, cos, sin, asin, sqrt
 
 from app.db.session import get_db_session
 from app.models.shelter_models import Shelter
@@ -10,44 +9,44 @@ from fastapi import APIRouter, HTTPException
 from sqlmodel import Session, select
 from app.models.shelter_models import Shelter
 from app.db.session import db_engine
+from app.services.geo_index_service import get_db_index, nearest_shelters
+from app.services.shelter_common import admin_only, make_row_with_rank, user_only
+from app.services.shelter_rank_join_service import ranks_for_shelters
 
 router = APIRouter()
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return R * c
-
 @router.get("/shelters/nearby", response_model=dict)
 def get_nearby_shelters(
-    latitude: float = Query(...),
-    longitude: float = Query(...),
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
     limit: int = Query(10),
+    mode: str = Query(
+        "index",
+        regex="^(index|bbox)$",
+        description="조회 방식 (index: 메모리 공간 인덱스 | bbox: SQL 위경도 범위 필터 후 반경 확장)"
+    ),
+    view: str = Query(
+        "all",
+        regex="^(all|user|admin)$",
+        description="랭크 필드 범위 (all: 전체 | user: 추천 점수/등급 | admin: 우선순위/등급·압력 등)"
+    ),
     db: Session = Depends(get_db_session)
 ):
-    shelters = db.query(Shelter).all()
-
-    shelters_with_distance = []
-    for shelter in shelters:
-        if shelter.latitude is None or shelter.longitude is None:
-         continue  # 건너뜀
-
-        dist = calculate_distance(latitude, longitude, shelter.latitude, shelter.longitude)
-        print(f"{shelter.facility_name} → 거리: {dist}km")
-        shelters_with_distance.append((shelter, dist))
-
-    # 무조건 정렬해서 보여줌 (거리조건 없음)
-    sorted_shelters = sorted(shelters_with_distance, key=lambda x: x[1])[:limit]
+    # 공간 인덱스는 요청당 한 번만 구해 근접 조회와 랭크 조인에 같이 쓴다 (bbox 모드는 인덱스 없이)
+    db_index = get_db_index(db, Shelter) if mode == "index" else None
+    # 가까운 limit개만 조회 (거리조건 없음)
+    sorted_shelters = nearest_shelters(db, latitude, longitude, limit, mode, db_index)
+    # 랭크: index 모드는 적재 때 계산해 둔 Shelter.id → 랭크 행 조인, bbox 모드는 찾은 행의 좌표만 매칭
+    ranks = ranks_for_shelters(db, [s[0] for s in sorted_shelters], db_index)
 
     result = [
-        {
-            **ShelterResponse.from_orm(s[0]).dict(),
-            "distance_km": round(s[1], 6)
-        } for s in sorted_shelters
+        make_row_with_rank(s[0], r, round(s[1], 6))
+        for s, r in zip(sorted_shelters, ranks)
     ]
+    if view == "user":
+        result = [user_only(row) for row in result]
+    elif view == "admin":
+        result = [admin_only(row) for row in result]
 
     return {
         "message": "Nearby shelters fetched successfully",
@@ -1,7 +1,7 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, File, HTTPException, Header, UploadFile
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from app.models.user_model import User
+from app.models.user_model import User, UserRole
 from app.schemas.user_schema import UserCreate, UserCreateResponse, UserDeleteResponse, UserLogin, UserLoginResponse, UserReadResponse, UserUpdate, UserUpdateResponse
 from app.services.user_service import UserService
 from app.core.redis import get_redis
@@ -23,6 +23,11 @@ async def get_current_user(
     user = user_service.get_user_by_id(user_id)
     return user
 
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="관리자만 사용할 수 있습니다.")
+    return user
+
 @router.post("/users/signup")
 async def create_user(
     req:UserCreate, 
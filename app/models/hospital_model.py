@@ -6,8 +6,8 @@ class Hospital(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     facility_name: str                      # INST_NM
     road_address: str                       # ADDR
-    latitude: float                         # HSPTL_LAT
-    longitude: float                        # HSPTL_LOT
+    latitude: float = Field(index=True)     # HSPTL_LAT
+    longitude: float = Field(index=True)    # HSPTL_LOT
     phone_number: Optional[str] = None      # TELNO
     emergency_room: Optional[bool] = None   # EMR_OPERT_YN == 'Y'
     weekend_operating: Optional[bool] = None # WKND_OPERT_YN == 'Y'
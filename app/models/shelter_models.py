@@ -5,8 +5,8 @@ class Shelter(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     facility_name: str
     road_address: Optional[str]
-    latitude: float
-    longitude: float
+    latitude: float = Field(index=True)
+    longitude: float = Field(index=True)
     shelter_type_code: Optional[int]
     shelter_type_name: Optional[str]
     management_serial_number: Optional[str]
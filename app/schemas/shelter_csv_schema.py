@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 class ShelterCSVResponse(BaseModel):
     id: int
@@ -29,3 +29,34 @@ class ShelterCSVResponse(BaseModel):
     # ▼ 등급(문자)
     priority_grade: Optional[str] = None      # ADMIN용
     recommend_grade: Optional[str] = None     # USER용
+
+
+# ▼ 수용력 기반 추천 (GET /shelters/csv/recommend)
+class ShelterCSVRecommendItem(ShelterCSVResponse):
+    score: float                              # 가중 합 (높을수록 추천)
+    distance_score: float                     # 0~1, 가까울수록 높음
+    capacity_score: float                     # 0~1, 배정 인원 대비 수용력이 남을수록 높음
+    vulnerability_score: float                # 0~1, reserve: 배정 인구의 취약 비율이 낮을수록 높음 / prefer: 높을수록 높음
+    pressure: Optional[float] = None          # assigned_pop / capacity_est
+    remaining_capacity: Optional[float] = None  # capacity_est - assigned_pop (음수 = 초과)
+
+class ShelterCSVRecommendResponse(BaseModel):
+    recommended: Optional[ShelterCSVRecommendItem] = None
+    alternatives: List[ShelterCSVRecommendItem] = []
+    candidates: int = 0                       # 점수를 매긴 가까운 후보 수
+    weights: Dict[str, float] = {}
+    vuln_mode: str = "reserve"                # 취약성 항 방향 (reserve | prefer)
+
+
+# ▼ 일괄 근접 조회 (POST /shelters/csv/nearby/batch)
+SHELTER_CSV_BATCH_MAX_POINTS = 50_000
+
+class ShelterCSVBatchPoint(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    key: Optional[str] = None                 # 호출 측 식별자(가구/HCODE 등) — 응답 줄에 그대로 돌려줌
+
+class ShelterCSVBatchRequest(BaseModel):
+    points: List[ShelterCSVBatchPoint] = Field(..., min_length=1, max_length=SHELTER_CSV_BATCH_MAX_POINTS)
+    limit: int = Field(5, ge=1, le=100)
+    grade_scope: str = Field("national", pattern="^(national|sigungu)$")
@@ -0,0 +1,153 @@
+# app/services/cluster_service.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from app.models.hospital_model import Hospital
+from app.models.shelter_models import Shelter
+from app.services.geo_index_service import get_db_index
+from app.services.shelter_csv_service import RECOMMEND_WEIGHTS, USER_CSV, _GRADE_LABELS, _get_snapshot
+from app.utils.cluster_util import ClusterIndex
+
+# 클러스터를 만드는 최대 줌 (더 깊은 줌은 /shelters/csv/viewport 같은 개별 점 조회를 쓴다)
+CLUSTER_MAX_ZOOM = int(os.getenv("CLUSTER_MAX_ZOOM", "16"))
+# 데이터셋별로 직렬화해 둘 타일 수 (LRU)
+CLUSTER_TILE_CACHE_SIZE = int(os.getenv("CLUSTER_TILE_CACHE_SIZE", "4096"))
+# shelters-csv: 등급 CSV(USER) / shelters: Shelter 테이블 / hospitals: Hospital 테이블
+CLUSTER_DATASETS = ("shelters-csv", "shelters", "hospitals")
+
+class _ClusterSet:
+    """
+    데이터셋 버전 1개에 대한 클러스터 계층 + 직렬화된 타일 캐시.
+    source: 만든 근거 객체(CSV 스냅샷 / DB 공간 인덱스). 그 객체가 바뀌면(=데이터 버전 변경) 다시 만든다.
+    """
+
+    def __init__(self, source, version: str, ids: np.ndarray, index: ClusterIndex):
+        self.source = source
+        self.version = version
+        self.ids = ids
+        self.index = index
+        self._tiles: "OrderedDict[Tuple[int, int, int], bytes]" = OrderedDict()
+        self._tiles_lock = threading.Lock()
+
+    def tile_json(self, z: int, x: int, y: int) -> bytes:
+        key = (z, x, y)
+        body = self._tiles.get(key)
+        if body is not None:
+            return body
+        t = self.index.tile(z, x, y)
+        pos = t["pos"]
+        ids = np.where(pos >= 0, self.ids[np.maximum(pos, 0)], -1) if len(pos) else pos
+        grades = _GRADE_LABELS[t["best"]].tolist() if self.index.has_grades else [None] * len(pos)
+        clusters = [
+            {
+                "latitude": round(la, 6),
+                "longitude": round(lo, 6),
+                "count": c,
+                "id": i if i >= 0 else None,
+                "grade": g,
+            }
+            for la, lo, c, i, g in zip(
+                t["latitude"].tolist(), t["longitude"].tolist(), t["count"].tolist(), ids.tolist(), grades
+            )
+        ]
+        body = json.dumps(
+            {"z": z, "x": x, "y": y, "version": self.version, "clusters": clusters},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        with self._tiles_lock:
+            self._tiles[key] = body
+            if len(self._tiles) > CLUSTER_TILE_CACHE_SIZE:
+                self._tiles.popitem(last=False)
+        return body
+
+
+_LOCK = threading.Lock()
+_SETS: Dict[Tuple[str, ...], _ClusterSet] = {}
+
+
+def _get_set(key: Tuple[str, ...], source, build) -> _ClusterSet:
+    cs = _SETS.get(key)
+    if cs is not None and cs.source is source:
+        return cs
+    with _LOCK:
+        cs = _SETS.get(key)
+        if cs is not None and cs.source is source:
+            return cs
+        cs = build()
+        _SETS[key] = cs
+        print(f"[CLUSTER] {'/'.join(key)} built: points={cs.index.n} version={cs.version} bytes={cs.index.nbytes}")
+        return cs
+
+
+def _csv_version(snap) -> str:
+    """
+    CSV 타일 버전(ETag): CSV 내용 해시 + 추천 가중치. mtime/크기는 같은 초에 같은 크기로 덮어쓰면 그대로라 쓰지 않는다.
+    """
+    key = f"{snap.content_hash}|{','.join(repr(float(w)) for w in RECOMMEND_WEIGHTS)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _csv_set(path: str, grade_scope: str) -> Optional[_ClusterSet]:
+    snap = _get_snapshot(path)
+    if snap is None:
+        return None
+    snap.require_geo()
+
+    def build() -> _ClusterSet:
+        grades = snap.grade_codes(snap.grade_col("recommend", grade_scope))
+        index = ClusterIndex(snap.latitude, snap.longitude, grades, CLUSTER_MAX_ZOOM)
+        return _ClusterSet(snap, _csv_version(snap), snap.ids[snap.geo_rows], index)
+
+    return _get_set(("shelters-csv", path, grade_scope), snap, build)
+
+
+def _db_set(db: Session, model) -> _ClusterSet:
+    gi = get_db_index(db, model)
+
+    def build() -> _ClusterSet:
+        # GridIndex는 셀 순서로 정렬된 좌표를 들고 있으므로 원래 순서(ids와 같은 순서)로 되돌린다
+        lats = np.empty(gi.index.n, dtype=np.float64)
+        lons = np.empty(gi.index.n, dtype=np.float64)
+        lats[gi.index.order] = gi.index.lat_deg
+        lons[gi.index.order] = gi.index.lon_deg
+        index = ClusterIndex(lats, lons, None, CLUSTER_MAX_ZOOM)
+        return _ClusterSet(gi, f"{gi.version[0]}-{gi.version[1]}", gi.ids, index)
+
+    return _get_set((model.__tablename__,), gi, build)
+
+
+def get_cluster_tile(
+    dataset: str,
+    z: int,
+    x: int,
+    y: int,
+    db: Optional[Session] = None,
+    csv_path: str = USER_CSV,
+    grade_scope: str = "national",
+) -> Optional[Tuple[str, bytes]]:
+    """
+    (z, x, y) 타일의 클러스터 목록을 (데이터 버전, JSON bytes)로 반환. 데이터가 없으면 None.
+    JSON: {"z", "x", "y", "version", "clusters": [{"latitude", "longitude", "count", "id", "grade"}]}
+    - latitude/longitude: 멤버 평균 좌표, count: 멤버 수
+    - id: 멤버가 1개면 그 시설 id(상세 조회용), 아니면 null
+    - grade: shelters-csv만 — 멤버 중 가장 좋은 추천 등급(A~F), 그 외 데이터셋은 null
+    같은 버전의 같은 타일은 항상 같은 bytes → 버전을 ETag로 쓰면 된다.
+    """
+    if dataset == "shelters-csv":
+        cs = _csv_set(csv_path, grade_scope)
+    elif dataset == "shelters":
+        cs = _db_set(db, Shelter)
+    elif dataset == "hospitals":
+        cs = _db_set(db, Hospital)
+    else:
+        raise ValueError(f"unknown dataset: {dataset}")
+    if cs is None:
+        return None
+    return cs.version, cs.tile_json(z, x, y)
@@ -0,0 +1,200 @@
+# app/services/geo_index_service.py
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, SQLModel, select
+
+from app.models.hospital_model import Hospital
+from app.models.shelter_models import Shelter
+from app.utils.geo_util import bounding_box, haversine_km_np
+from app.utils.spatial_index_util import GridIndex, KnnCellTable
+
+# SQL 바운딩박스 모드: 시작 반경 / 최대 반경(km). 결과가 limit개 미만이면 반경을 2배씩 키운다.
+BBOX_START_RADIUS_KM = float(os.getenv("NEARBY_BBOX_START_RADIUS_KM", "2"))
+BBOX_MAX_RADIUS_KM = float(os.getenv("NEARBY_BBOX_MAX_RADIUS_KM", "1000"))
+# 격자 셀별 k-최근접 후보표의 k (limit이 이보다 크면 공간 인덱스로 바로 찾는다)
+KNN_TABLE_K = int(os.getenv("NEARBY_KNN_TABLE_K", "20"))
+# 테이블 버전(COUNT/MAX(id)) 조회 결과를 재사용할 시간(초). 이 워커의 적재는 invalidate_db_index로 바로 반영되고,
+# 다른 워커가 적재한 행은 최대 이 시간 뒤에 보인다 (0 = 매번 조회)
+VERSION_TTL_S = float(os.getenv("NEARBY_INDEX_VERSION_TTL_S", "30"))
+
+
+class _DBGeoIndex:
+    """
+    DB 테이블(id, latitude, longitude)로 만든 공간 인덱스.
+    version = (행 수, 최대 id) — 적재(fetch_and_store_*)로 행이 늘면 바뀐다.
+    knn_table: 셀별 k-최근접 후보표. 인덱스를 만든 뒤 백그라운드에서 채우며, 그 전에는 index.knn을 쓴다.
+    """
+
+    def __init__(self, version: Tuple[int, int], ids: np.ndarray, index: GridIndex):
+        self.version = version
+        self.ids = ids
+        self.index = index
+        self.knn_table: Optional[KnnCellTable] = None
+
+    def build_knn_table(self, name: str) -> None:
+        table = KnnCellTable(self.index, KNN_TABLE_K)
+        self.knn_table = table
+        print(f"[GEO-INDEX] {name} knn table built: {table.stats()}")
+
+    def knn(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        table = self.knn_table
+        if table is not None:
+            return table.knn(lat, lon, k)
+        return self.index.knn(lat, lon, k)
+
+
+_LOCK = threading.Lock()
+_INDEXES: Dict[str, _DBGeoIndex] = {}
+# 모델별 (조회 시각 monotonic, 테이블 버전)
+_VERSIONS: Dict[str, Tuple[float, Tuple[int, int]]] = {}
+
+
+def table_version(db: Session, model: Type[SQLModel]) -> Tuple[int, int]:
+    """
+    (행 수, 최대 id). VERSION_TTL_S 안에 다시 부르면 DB를 보지 않고 직전 값을 쓴다.
+    """
+    key = model.__tablename__
+    cached = _VERSIONS.get(key)
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < VERSION_TTL_S:
+        return cached[1]
+    count, max_id = db.exec(select(func.count(model.id), func.max(model.id))).one()
+    version = (int(count or 0), int(max_id or 0))
+    _VERSIONS[key] = (now, version)
+    return version
+
+
+def _build(db: Session, model: Type[SQLModel], version: Tuple[int, int]) -> _DBGeoIndex:
+    rows = db.exec(
+        select(model.id, model.latitude, model.longitude)
+        .where(model.latitude.is_not(None), model.longitude.is_not(None))
+    ).all()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    lats = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+    lons = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    print(f"[GEO-INDEX] {model.__tablename__} index built: rows={len(ids)}")
+    return _DBGeoIndex(version, ids, GridIndex(lats, lons))
+
+
+def get_db_index(db: Session, model: Type[SQLModel]) -> _DBGeoIndex:
+    """
+    모델별 공간 인덱스 반환. 테이블 버전이 바뀌었을 때만 다시 만든다.
+    버전은 VERSION_TTL_S 동안 재사용하므로 요청마다 COUNT/MAX 쿼리를 하지 않는다.
+    한 요청 안에서는 한 번만 부르고 결과를 넘겨 쓴다 (nearest_rows / ranks_for_shelters의 db_index).
+    """
+    key = model.__tablename__
+    version = table_version(db, model)
+    idx = _INDEXES.get(key)
+    if idx is not None and idx.version == version:
+        return idx
+    with _LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None and idx.version == version:
+            return idx
+        idx = _build(db, model, version)
+        _INDEXES[key] = idx
+        threading.Thread(target=idx.build_knn_table, args=(key,), name=f"geo-index-{key}-knn", daemon=True).start()
+        return idx
+
+
+def invalidate_db_index(model: Type[SQLModel]) -> None:
+    """
+    적재 직후 호출: 다음 조회 때 테이블 버전을 다시 읽고 인덱스를 새로 만든다.
+    """
+    with _LOCK:
+        _VERSIONS.pop(model.__tablename__, None)
+        _INDEXES.pop(model.__tablename__, None)
+
+
+def nearest_rows(
+    db: Session,
+    model: Type[SQLModel],
+    lat: float,
+    lon: float,
+    limit: int,
+    db_index: Optional[_DBGeoIndex] = None,
+) -> List[Tuple[SQLModel, float]]:
+    """
+    공간 인덱스로 가까운 limit개의 id를 고른 뒤, 그 행들만 DB에서 읽어 (행, 거리 km) 목록으로 반환.
+    db_index: 호출한 쪽이 이미 구한 get_db_index(db, model) (없으면 여기서 구한다)
+    """
+    idx = db_index if db_index is not None else get_db_index(db, model)
+    pos, dist = idx.knn(lat, lon, limit)
+    if len(pos) == 0:
+        return []
+    ids = idx.ids[pos].tolist()
+    found = {r.id: r for r in db.exec(select(model).where(model.id.in_(ids))).all()}
+    return [(found[i], float(d)) for i, d in zip(ids, dist) if i in found]
+
+
+def nearest_shelters(
+    db: Session,
+    lat: float,
+    lon: float,
+    limit: int,
+    mode: str = "index",
+    db_index: Optional[_DBGeoIndex] = None,
+) -> List[Tuple[Shelter, float]]:
+    if mode == "bbox":
+        return nearest_rows_bbox(db, Shelter, lat, lon, limit)
+    return nearest_rows(db, Shelter, lat, lon, limit, db_index)
+
+
+def nearest_hospitals(db: Session, lat: float, lon: float, limit: int, mode: str = "index") -> List[Tuple[Hospital, float]]:
+    if mode == "bbox":
+        return nearest_rows_bbox(db, Hospital, lat, lon, limit)
+    return nearest_rows(db, Hospital, lat, lon, limit)
+
+
+# ----------------------------
+# SQL 바운딩박스 모드 (메모리 인덱스 없이 DB에서 바로)
+# ----------------------------
+def nearest_rows_bbox(
+    db: Session,
+    model: Type[SQLModel],
+    lat: float,
+    lon: float,
+    limit: int,
+    start_radius_km: float = BBOX_START_RADIUS_KM,
+    max_radius_km: float = BBOX_MAX_RADIUS_KM,
+) -> List[Tuple[SQLModel, float]]:
+    """
+    반경 r의 위경도 사각형으로 latitude/longitude 인덱스를 타서 (id, 좌표)만 읽고,
+    반경 안의 점이 limit개 이상이 될 때까지 r을 2배씩 키운다.
+    마지막에 정확한 거리로 순위를 매긴 뒤 상위 limit개 행만 DB에서 읽는다.
+    BETWEEN 조건만 쓰므로 MySQL/SQLite 모두 동작한다.
+    """
+    if limit is None or limit <= 0:
+        return []
+    radius = max(start_radius_km, 0.001)
+    while True:
+        min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius)
+        rows = db.exec(
+            select(model.id, model.latitude, model.longitude)
+            .where(model.latitude.between(min_lat, max_lat))
+            .where(model.longitude.between(min_lon, max_lon))
+        ).all()
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        dist = haversine_km_np(
+            lat, lon,
+            np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows)),
+        )
+        # 사각형 모서리 쪽 점은 반경 밖일 수 있으므로, 순위는 반경 안의 점만으로 확정
+        inside = dist <= radius
+        if int(inside.sum()) >= limit or radius >= max_radius_km:
+            break
+        radius = min(radius * 2.0, max_radius_km)
+
+    ids, dist = ids[inside], dist[inside]
+    order = np.lexsort((ids, dist))[:limit]
+    top_ids = ids[order].tolist()
+    if not top_ids:
+        return []
+    found = {r.id: r for r in db.exec(select(model).where(model.id.in_(top_ids))).all()}
+    return [(found[i], float(d)) for i, d in zip(top_ids, dist[order]) if i in found]
@@ -0,0 +1,68 @@
+# app/services/hospital_search_service.py
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models.hospital_model import Hospital
+from app.services.geo_index_service import table_version
+from app.utils.name_search_util import NameSearchIndex
+
+
+class _HospitalNameIndex:
+    """
+    병원명 검색 인덱스. version = geo_index_service.table_version (행 수, 최대 id).
+    """
+
+    def __init__(self, version: Tuple[int, int], ids: np.ndarray, index: NameSearchIndex):
+        self.version = version
+        self.ids = ids
+        self.index = index
+
+
+_LOCK = threading.Lock()
+_CACHE: Dict[str, _HospitalNameIndex] = {}
+
+
+def _build(db: Session, version: Tuple[int, int]) -> _HospitalNameIndex:
+    rows = db.exec(select(Hospital.id, Hospital.facility_name).order_by(Hospital.id)).all()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    index = NameSearchIndex(r[1] or "" for r in rows)
+    print(f"[HOSPITAL-SEARCH] name index built: rows={len(ids)}")
+    return _HospitalNameIndex(version, ids, index)
+
+
+def get_name_index(db: Session) -> _HospitalNameIndex:
+    """
+    병원명 검색 인덱스 반환. 테이블 버전이 바뀌었을 때만 다시 만든다.
+    """
+    version = table_version(db, Hospital)
+    idx = _CACHE.get("hospital")
+    if idx is not None and idx.version == version:
+        return idx
+    with _LOCK:
+        idx = _CACHE.get("hospital")
+        if idx is not None and idx.version == version:
+            return idx
+        idx = _build(db, version)
+        _CACHE["hospital"] = idx
+        return idx
+
+
+def search_hospitals_by_name(db: Session, query: str, limit: int = 20, match: str = "auto") -> List[Hospital]:
+    """
+    병원명 검색. match: "substring" | "choseong" | "jamo" | "fuzzy" | "auto"
+    점수(완전 > 접두 > 부분 / 오타 거리) 내림차순, 동점이면 id 오름차순으로 limit개.
+    """
+    q = (query or "").strip()
+    if not q or limit <= 0:
+        return []
+    idx = get_name_index(db)
+    pos, score = idx.index.search(q, match)
+    if len(pos) == 0:
+        return []
+    order = np.lexsort((pos, -score.astype(np.int64)))[:limit]
+    top_ids = idx.ids[pos[order]].tolist()
+    found = {h.id: h for h in db.exec(select(Hospital).where(Hospital.id.in_(top_ids))).all()}
+    return [found[i] for i in top_ids if i in found]
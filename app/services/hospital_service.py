@@ -5,6 +5,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 from sqlmodel import Session, select
 from app.db.session import db_engine
+from app.services.geo_index_service import invalidate_db_index
 from app.models.hospital_model import Hospital, HospitalOperatingHour
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -118,3 +119,4 @@ def store_hospitals(items: list):
 def fetch_and_store_hospitals():
     items = fetch_hospitals()
     store_hospitals(items)
+    invalidate_db_index(Hospital)
@@ -1,15 +1,10 @@
 # app/routers/shelter_common.py
-from math import radians, cos, sin, asin, sqrt
 from typing import Dict, Any
 from app.schemas.shelter_schemas import ShelterResponse
+from app.utils.geo_util import haversine_km
 
 def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2.0)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2.0)**2
-    c = 2.0 * asin(sqrt(a))
-    return round(R * c, 4)
+    return round(haversine_km(lat1, lon1, lat2, lon2), 4)
 
 def make_row_with_rank(s, rank: Dict[str, Any] | None, distance_km: float) -> Dict[str, Any]:
     base = {
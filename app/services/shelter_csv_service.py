@@ -1,62 +1,110 @@
 # app/services/shelter_csv_service.py
+import hashlib
+import json
 import os
-from math import radians, sin, cos, asin, sqrt
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Dict, Any, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
-
-from app.schemas.shelter_csv_schema import ShelterCSVResponse
+from pydantic import TypeAdapter
+
+from app.schemas.shelter_csv_schema import ShelterCSVRecommendItem, ShelterCSVRecommendResponse, ShelterCSVResponse
+from app.utils.csv_cache_util import CACHE_DIR_NAME, file_digest, read_csv_cached
+from app.utils.file_watch_util import file_id
+from app.utils.filter_util import RANGE_OPS, FilterClause, parse_filter
+from app.utils.geo_util import haversine_km, haversine_km_prepared, prepare_latlon, top_k_smallest
+from app.utils.mmap_snapshot_util import StringTable, build_lock, open_snapshot, write_snapshot
+from app.utils.name_search_util import NameSearchIndex
+from app.utils.ngram_index_util import NgramIndex
+from app.utils.spatial_index_util import GridIndex, KnnCellTable
 
 USER_CSV = os.getenv("SHELTER_USER_ALL_CSV", "./data/shelters_rank_user_all.csv")
 ADMIN_CSV = os.getenv("SHELTER_ADMIN_ALL_CSV", "./data/shelters_rank_admin_all.csv")
+# 상세 조회에서 예전 행 번호 id(1..N)도 받을지 (클라이언트 캐시가 새 id로 바뀌는 동안만 켜 둔다)
+ACCEPT_LEGACY_IDS = os.getenv("SHELTER_CSV_ACCEPT_LEGACY_IDS", "1") == "1"
+# 지도 화면용 반경/뷰포트 조회 상한 (결과 수, 반경 km)
+AREA_MAX_RESULTS = int(os.getenv("SHELTER_CSV_AREA_MAX_RESULTS", "1000"))
+AREA_MAX_RADIUS_KM = float(os.getenv("SHELTER_CSV_AREA_MAX_RADIUS_KM", "50"))
+# 격자 셀별 k-최근접 후보표의 k (limit이 이보다 크면 공간 인덱스로 바로 찾는다)
+KNN_TABLE_K = int(os.getenv("SHELTER_CSV_KNN_TABLE_K", "20"))
+# 스냅샷마다 컴파일해 둘 필터 마스크 수 (LRU, 마스크 1개 = geo 행 수 bytes)
+FILTER_CACHE_SIZE = int(os.getenv("SHELTER_CSV_FILTER_CACHE_SIZE", "32"))
+# 수용력 기반 추천: 점수를 매길 가까운 후보 수(후보표 k 이하면 후보표로 찾는다) /
+# 가중치(거리, 남은 수용력, 취약성 — 쉼표로 3개, 잘못된 값이면 기본값) / 거리 점수가 0.5가 되는 거리(km)
+RECOMMEND_CANDIDATES = int(os.getenv("SHELTER_CSV_RECOMMEND_CANDIDATES", str(KNN_TABLE_K)))
+RECOMMEND_DEFAULT_WEIGHTS = (0.5, 0.3, 0.2)
+RECOMMEND_DIST_SCALE_KM = float(os.getenv("SHELTER_CSV_RECOMMEND_DIST_SCALE_KM", "1.0"))
+# 취약성 항의 방향 (요청마다 vuln_mode로 바꿀 수 있다)
+# reserve: 취약 인구가 많이 배정된 대피소를 뒤로 (그 주민 몫으로 남겨 둔다), prefer: 앞으로 (취약 계층용 시설 우선)
+RECOMMEND_VULN_MODES = ("reserve", "prefer")
+# 스냅샷 배열(열/인덱스/등급/필터/추천/근접 후보표)을 파일로 써서 워커들이 읽기 전용 mmap으로 공유할지
+# auto: CSV 옆 .csvcache/<CSV 파일명>.snap, 0: 쓰지 않음 (워커마다 CSV에서 직접 만든다)
+CSV_SNAPSHOT = os.getenv("SHELTER_CSV_SNAPSHOT", "auto")
 
 # ----------------------------
 # 내부 유틸
 # ----------------------------
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2.0) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2.0) ** 2
-    c = 2.0 * asin(sqrt(a))
-    return R * c
-
 def _safe_read_csv(path: str) -> pd.DataFrame:
-    last_err: Optional[Exception] = None
-    for enc in ("utf-8", "utf-8-sig", "cp949", "euc-kr"):
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception as e:
-            last_err = e
-    raise RuntimeError(f"CSV 읽기 실패: {path} (마지막 오류: {last_err})")
+    # 인코딩은 한 번만 판별하고, 같은 내용이면 열 캐시(.npy)에서 읽는다
+    try:
+        return read_csv_cached(path)
+    except Exception as e:
+        raise RuntimeError(f"CSV 읽기 실패: {path} (마지막 오류: {e})")
 
 def _assign_row_ids(df: pd.DataFrame) -> pd.DataFrame:
+    # 행 번호 id(1..N): 응답 id는 _content_ids로 바뀌고, 이 값은 예전 id 호환용으로만 쓴다.
     df = df.reset_index(drop=True).copy()
     df["id"] = df.index + 1
     return df
 
-def _to_float(x) -> Optional[float]:
-    try:
-        v = float(x)
-        if v != v:  # NaN
-            return None
-        return v
-    except Exception:
-        return None
+# 내용 기반 id 범위: [2^40, 2^53) — 행 번호 id와 겹치지 않고 JS number로 정확히 표현된다.
+STABLE_ID_MIN = 1 << 40
+STABLE_ID_MAX = 1 << 53
 
-def _to_int(x) -> Optional[int]:
-    try:
-        if pd.isna(x):
-            return None
-        return int(float(x))
-    except Exception:
-        return None
+def _content_ids(source, hcode, name, lat, lon) -> np.ndarray:
+    """
+    source / HCODE / 시설명 / 좌표(소수 6자리)로 만든 안정 id (blake2b 64bit → [STABLE_ID_MIN, STABLE_ID_MAX)).
+    CSV를 다시 만들거나 행 순서가 바뀌어도 같은 시설은 같은 id를 받는다.
+    - 내용이 완전히 같은 행은 등장 순서(k)를 키에 붙여 구분
+    - 해시 충돌 시 키에 구분자를 덧붙여 다시 해시 (결정적)
+    """
+    span = STABLE_ID_MAX - STABLE_ID_MIN
+    seen_keys: Dict[str, int] = {}
+    used: Dict[int, str] = {}
+    out = np.empty(len(name), dtype=np.int64)
+    for i, (src, hc, nm, la, lo) in enumerate(zip(source, hcode, name, lat, lon)):
+        key = "\x1f".join((
+            src or "",
+            "" if hc is None or hc != hc else str(int(hc)),
+            nm or "",
+            "" if la is None or la != la else f"{la:.6f}",
+            "" if lo is None or lo != lo else f"{lo:.6f}",
+        ))
+        k = seen_keys.get(key, 0)
+        seen_keys[key] = k + 1
+        if k:
+            key = f"{key}\x1f{k}"
+        while True:
+            h = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+            sid = STABLE_ID_MIN + h % span
+            if used.setdefault(sid, key) == key:
+                break
+            key += "\x1e"
+        out[i] = sid
+    return out
 
-def _pick_first(d: Dict[str, Any], *keys, default=None):
-    for k in keys:
-        if k in d and d[k] not in (None, "", "NaN"):
-            return d[k]
-    return default
+# 좌표 컬럼 후보 (앞쪽 우선) — 업로드 검증(shelter_upload_service)도 같은 규칙을 쓴다
+_LAT_CANDIDATES = ("latitude", "lat", "LAT", "Y", "위도")
+_LON_CANDIDATES = ("longitude", "lon", "LOT", "X", "경도")
+
+def _first_existing(columns, cands) -> Optional[str]:
+    for c in cands:
+        if c in columns:
+            return c
+    return None
 
 def _normalize_coord_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -65,17 +113,8 @@ def _normalize_coord_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     df = df.copy()
 
-    lat_candidates = ["latitude", "lat", "LAT", "Y", "위도"]
-    lon_candidates = ["longitude", "lon", "LOT", "X", "경도"]
-
-    def first_existing(cands):
-        for c in cands:
-            if c in df.columns:
-                return c
-        return None
-
-    lat_col = first_existing(lat_candidates)
-    lon_col = first_existing(lon_candidates)
+    lat_col = _first_existing(df.columns, _LAT_CANDIDATES)
+    lon_col = _first_existing(df.columns, _LON_CANDIDATES)
 
     if not lat_col or not lon_col:
         raise ValueError(
@@ -91,64 +130,6 @@ def _normalize_coord_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.dropna(subset=["latitude", "longitude"]).copy()
     return df
 
-def _is_nan(x) -> bool:
-    try:
-        return pd.isna(x)
-    except Exception:
-        return False
-
-def _str_or_none(x) -> Optional[str]:
-    if x is None or _is_nan(x):
-        return None
-    s = str(x).strip()
-    return s if s != "" else None
-
-def _str_or_empty(x) -> str:
-    if x is None or _is_nan(x):
-        return ""
-    return str(x).strip()
-
-def _row_to_payload(row: pd.Series) -> Dict[str, Any]:
-    r = row.to_dict()
-    rid = r.get("id")
-
-    facility_name = _str_or_empty(_pick_first(r, "facility_name", "name", "REARE_NM", "MGC_NM"))
-    road_address  = _str_or_none(_pick_first(r, "road_address", "address"))
-    shelter_type_name = _str_or_none(_pick_first(r, "shelter_type_name", "type_name"))
-
-    shelter_type_code = _to_int(_pick_first(r, "shelter_type_code", "type_code"))
-
-    latitude  = _to_float(_pick_first(r, "latitude", "lat", "LAT"))
-    longitude = _to_float(_pick_first(r, "longitude", "lon", "LOT"))
-
-    # ▼ 여기 추가: 다양한 컬럼명에서 priority 수치 뽑기
-    priority_val = _to_float(_pick_first(r, "priority", "PRIORITY", "admin_priority"))
-
-    return {
-        "id": rid,
-        "source": _str_or_none(r.get("source")),
-        "HCODE": _to_int(r.get("HCODE")),
-        "SIGUNGU": _str_or_none(r.get("SIGUNGU")),
-        "EUPMYEON": _str_or_none(r.get("EUPMYEON")),
-        "facility_name": facility_name,
-        "road_address": road_address,
-        "shelter_type_name": shelter_type_name,
-        "shelter_type_code": shelter_type_code,
-        "assigned_pop": _to_float(r.get("assigned_pop")),
-        "capacity_est": _to_float(r.get("capacity_est")),
-        "p_elderly": _to_float(r.get("p_elderly")),
-        "p_child": _to_float(r.get("p_child")),
-        "vuln": _to_float(r.get("vuln")),
-
-        # ▼ 숫자 원본 둘 다 포함
-        "recommend_score": _to_float(r.get("recommend_score")),
-        "priority": priority_val,
-
-        "latitude": latitude,
-        "longitude": longitude,
-        "distance_km": _to_float(r.get("distance_km")),
-    }
-
 # ----------------------------
 # 등급(Grade) 계산 유틸 (분위수 기반)
 # ----------------------------
@@ -167,56 +148,1313 @@ def _quantile_thresholds(series: pd.Series) -> Tuple[float, float, float, float,
     q95 = float(s.quantile(0.95))
     return (q25, q50, q75, q90, q95)
 
-def _grade_by_thresholds(value: Optional[float], q25: float, q50: float, q75: float, q90: float, q95: float) -> Optional[str]:
+# 등급 라벨: searchsorted(컷오프, 값, side="right") 결과(0~5)를 인덱스로 사용
+_GRADE_BY_RANK = ("F", "E", "D", "C", "B", "A")
+# 범주형 컬럼의 카테고리 순서(A가 코드 0) → 코드 그대로 등급순 정렬 키로 쓸 수 있음
+GRADE_CATEGORIES = ["A", "B", "C", "D", "E", "F"]
+GRADE_SCOPES = ("national", "sigungu")
+
+def _grade_codes(values: np.ndarray, thresholds: Tuple[float, float, float, float, float]) -> np.ndarray:
     """
-    값과 분위수 컷오프를 받아 A~F 등급으로 변환.
+    값 배열과 분위수 컷오프(Q25..Q95)로 등급 코드(GRADE_CATEGORIES 기준, 결측=-1)를 한 번에 계산.
+    v >= Q95 → A, v >= Q90 → B, ... , v < Q25 → F
     """
-    if value is None:
+    rank = np.searchsorted(np.asarray(thresholds, dtype=np.float64), values, side="right")
+    codes = (5 - rank).astype(np.int8)
+    codes[np.isnan(values)] = -1
+    return codes
+
+def _grade_codes_by_group(values: np.ndarray, groups: pd.Series, fallback: np.ndarray) -> np.ndarray:
+    """
+    그룹(SIGUNGU)별 분위수 컷오프로 등급 코드 계산. 그룹이 없는 행은 fallback(전국 기준) 코드 사용.
+    """
+    codes = fallback.copy()
+    for _, idx in groups.groupby(groups, sort=False).indices.items():
+        vals = values[idx]
+        codes[idx] = _grade_codes(vals, _quantile_thresholds(pd.Series(vals)))
+    return codes
+
+def _grade_categorical(codes: np.ndarray, index: pd.Index) -> pd.Series:
+    return pd.Series(pd.Categorical.from_codes(codes, categories=GRADE_CATEGORIES, ordered=True), index=index)
+
+def _build_name_series(df: pd.DataFrame, candidates=("facility_name", "name", "REARE_NM", "MGC_NM")) -> pd.Series:
+    """
+    이름 후보(facility_name, name, REARE_NM, MGC_NM) 중 첫 유효값을 문자열로 반환
+    (candidates로 다른 컬럼 후보를 넘기면 같은 방식으로 합침: 예) 도로명주소)
+    """
+    cols = [c for c in candidates if c in df.columns]
+    if not cols:
+        return pd.Series([""] * len(df), index=df.index, dtype=object)
+    s = df[cols[0]].astype("string")
+    for c in cols[1:]:
+        s = s.fillna(df[c].astype("string"))
+    return s.fillna("")
+
+# ----------------------------
+# 응답 직렬화 (로드 시 컬럼 정리 → 요청 시 pandas/검증 없이 생성)
+# ----------------------------
+_PRIORITY_CANDIDATES = ("priority", "PRIORITY", "admin_priority")
+
+# (응답 필드, 변환 종류, 원본 컬럼 후보): 후보 중 첫 유효 컬럼 값을 str/float/int로 정리
+_PAYLOAD_FIELDS: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("id", "int", ("id",)),
+    ("source", "str", ("source",)),
+    ("HCODE", "int", ("HCODE",)),
+    ("SIGUNGU", "str", ("SIGUNGU",)),
+    ("EUPMYEON", "str", ("EUPMYEON",)),
+    ("facility_name", "str_empty", ("facility_name", "name", "REARE_NM", "MGC_NM")),
+    ("road_address", "str", ("road_address", "address")),
+    ("shelter_type_name", "str", ("shelter_type_name", "type_name")),
+    ("shelter_type_code", "int", ("shelter_type_code", "type_code")),
+    ("assigned_pop", "float", ("assigned_pop",)),
+    ("capacity_est", "float", ("capacity_est",)),
+    ("p_elderly", "float", ("p_elderly",)),
+    ("p_child", "float", ("p_child",)),
+    ("vuln", "float", ("vuln",)),
+    ("recommend_score", "float", ("recommend_score",)),
+    ("priority", "float", _PRIORITY_CANDIDATES),
+    ("latitude", "float", ("latitude", "lat", "LAT")),
+    ("longitude", "float", ("longitude", "lon", "LOT")),
+    ("distance_km", "float", ("distance_km",)),
+)
+
+# 등급 코드(-1=없음) → 라벨. 코드 -1은 마지막 원소(None)를 가리킨다.
+_GRADE_LABELS = np.array(GRADE_CATEGORIES + [None], dtype=object)
+
+_LIST_ADAPTER = TypeAdapter(List[ShelterCSVResponse])
+# NDJSON 한 줄(응답 dict 포함) 직렬화용 — 모델을 만들지 않는 일괄 조회 경로에서 사용
+_LINE_ADAPTER = TypeAdapter(Dict[str, Any])
+_RESPONSE_FIELDS = tuple(ShelterCSVResponse.model_fields)
+
+# 일괄 근접 조회에서 응답 모델 생성 / NDJSON 전송을 몇 개 기준점씩 묶어 할지
+_BATCH_CHUNK = 256
+
+def _empty_mask(s: pd.Series) -> np.ndarray:
+    """
+    None / "" / "NaN" 인 칸 (NaN 자체는 값으로 취급). 숫자형 컬럼에는 해당 값이 없다.
+    """
+    if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        return np.zeros(len(s), dtype=bool)
+    return s.isin(["", "NaN"]).to_numpy() | np.fromiter((v is None for v in s), dtype=bool, count=len(s))
+
+def _pick_first_series(df: pd.DataFrame, keys: Tuple[str, ...]) -> pd.Series:
+    """
+    후보 컬럼 중 첫 값(None / "" / "NaN" 이면 다음 후보)을 행마다 고른다. 모두 비면 None.
+    """
+    out: Optional[pd.Series] = None
+    for k in keys:
+        if k not in df.columns:
+            continue
+        if out is None:
+            out = df[k]
+            continue
+        empty = _empty_mask(out)
+        if not empty.any():
+            break
+        out = out.astype(object).where(~empty, df[k].astype(object))
+    if out is None:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    empty = _empty_mask(out)
+    return out.astype(object).where(~empty, None) if empty.any() else out
+
+class _StrColumn:
+    """
+    문자열 열을 코드(int32, -1 = 값 없음) + 고유값 StringTable로 보관 (스냅샷 mmap에서 복원한 열).
+    col[pos]는 object 배열을 돌려주므로 _PayloadColumns.rows에서 object 배열 열과 똑같이 쓴다.
+    고유값이 적은 열(시군구/유형 등)은 복원 때 한 번 디코딩해 두고, 많은 열(시설명/주소)은 꺼낼 때 디코딩한다.
+    """
+
+    dtype = np.dtype(object)
+    _DECODE_MAX = 4096
+
+    def __init__(self, codes: np.ndarray, uniques: StringTable, fill: Optional[str]):
+        self.codes = codes
+        self.uniques = uniques
+        self.fill = fill
+        # 코드 -1은 마지막 칸(fill)을 가리킨다
+        self._values = np.array(uniques.tolist() + [fill], dtype=object) if len(uniques) <= self._DECODE_MAX else None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, pos: np.ndarray) -> np.ndarray:
+        codes = self.codes[pos]
+        if self._values is not None:
+            return self._values[codes]
+        uniques, fill = self.uniques, self.fill
+        out = np.empty(len(codes), dtype=object)
+        out[:] = [fill if c < 0 else uniques[c] for c in codes.tolist()]
+        return out
+
+class _PayloadColumns:
+    """
+    응답 필드별로 정리된 열 배열 (df 행 위치와 1:1).
+    - str: object 배열(공백 제거, 빈 값은 None 또는 ""). 스냅샷에서 복원하면 _StrColumn
+    - float/int: float64 배열(결측 NaN). 결측 없는 int 필드는 int64 그대로
+    build(pos)는 위치 목록의 응답 모델을 model_construct로 만든다 (행 단위 pandas 접근/검증 없음).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns: List[Tuple[str, str, np.ndarray]] = []
+        for name, kind, keys in _PAYLOAD_FIELDS:
+            raw = _pick_first_series(df, keys)
+            if kind in ("str", "str_empty"):
+                missing = raw.isna().to_numpy()
+                text = raw.astype(str).str.strip().to_numpy(dtype=object)
+                fill = "" if kind == "str_empty" else None
+                text[missing] = fill
+                if kind == "str":
+                    text[text == ""] = None
+                arr = text
+            else:
+                arr = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+                if kind == "int":
+                    arr[~np.isfinite(arr)] = np.nan
+                    if not np.isnan(arr).any():
+                        arr = np.trunc(arr).astype(np.int64)
+            self.columns.append((name, kind, arr))
+
+    def column(self, name: str) -> np.ndarray:
+        return next(arr for n, _, arr in self.columns if n == name)
+
+    def state(self, prefix: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        (배열들, meta) — 문자열 열은 코드 + StringTable, 숫자 열은 그대로. from_state로 복원.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        for name, kind, arr in self.columns:
+            key = f"{prefix}.{name}"
+            if kind in ("str", "str_empty"):
+                if isinstance(arr, _StrColumn):
+                    codes, uniques = arr.codes, arr.uniques
+                else:
+                    codes, values = pd.factorize(arr, use_na_sentinel=True)
+                    uniques = StringTable.pack(values.tolist())
+                arrays[f"{key}.codes"] = codes.astype(np.int32, copy=False)
+                arrays.update(uniques.arrays(f"{key}.uniques"))
+            else:
+                arrays[key] = arr
+        return arrays, {"fields": [[name, kind] for name, kind, _ in self.columns]}
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], prefix: str) -> "_PayloadColumns":
+        out = cls.__new__(cls)
+        out.columns = []
+        for name, kind in meta["fields"]:
+            key = f"{prefix}.{name}"
+            if kind in ("str", "str_empty"):
+                uniques = StringTable.from_arrays(arrays, f"{key}.uniques")
+                arr = _StrColumn(arrays[f"{key}.codes"], uniques, "" if kind == "str_empty" else None)
+            else:
+                arr = arrays[key]
+            out.columns.append((name, kind, arr))
+        return out
+
+    def replace(self, name: str, arr: np.ndarray) -> None:
+        self.columns = [(n, k, arr if n == name else a) for n, k, a in self.columns]
+
+    def rows(self, pos: np.ndarray, extra: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        위치 목록 → 응답 필드 dict 목록 (필드 순서/기본값은 ShelterCSVResponse와 같음).
+        extra: {필드: pos와 같은 길이의 값 목록} — distance_km, *_grade처럼 요청마다 달라지는 값
+        """
+        extra = extra or {}
+        cols: Dict[str, List[Any]] = {}
+        for name, kind, arr in self.columns:
+            if name in extra:
+                continue
+            vals = arr[pos].tolist()
+            if arr.dtype == np.float64:
+                if kind == "int":
+                    vals = [None if v != v else int(v) for v in vals]
+                else:
+                    vals = [None if v != v else v for v in vals]
+            cols[name] = vals
+        for name, vals in extra.items():
+            cols[name] = vals if isinstance(vals, list) else list(vals)
+        none = [None] * len(pos)
+        seq = [cols.get(f, none) for f in _RESPONSE_FIELDS]
+        return [dict(zip(_RESPONSE_FIELDS, row)) for row in zip(*seq)]
+
+    def build(self, pos: np.ndarray, extra: Optional[Dict[str, Any]] = None) -> List[ShelterCSVResponse]:
+        construct = ShelterCSVResponse.model_construct
+        return [construct(**r) for r in self.rows(pos, extra)]
+
+# ----------------------------
+# 필터 (filter_util 문법 → geo 행 bool 마스크)
+# ----------------------------
+# 필터 필드(소문자) → (종류, 응답 필드 또는 등급 종류)
+#   category: 문자열 — = / != 만, number: 숫자 — 모든 연산자, grade: 등급 A~F (grade_scope 기준) — = / != 만
+_FILTER_FIELDS: Dict[str, Tuple[str, str]] = {
+    "source": ("category", "source"),
+    "sigungu": ("category", "SIGUNGU"),
+    "eupmyeon": ("category", "EUPMYEON"),
+    "shelter_type_name": ("category", "shelter_type_name"),
+    "hcode": ("number", "HCODE"),
+    "shelter_type_code": ("number", "shelter_type_code"),
+    "assigned_pop": ("number", "assigned_pop"),
+    "capacity_est": ("number", "capacity_est"),
+    "p_elderly": ("number", "p_elderly"),
+    "p_child": ("number", "p_child"),
+    "vuln": ("number", "vuln"),
+    "recommend_score": ("number", "recommend_score"),
+    "priority": ("number", "priority"),
+    "recommend_grade": ("grade", "recommend"),
+    "priority_grade": ("grade", "priority"),
+}
+
+# 패싯(값별 개수)을 세는 필터 필드
+FACET_FIELDS = ("shelter_type_name", "sigungu", "priority_grade", "recommend_grade")
+
+class _FilterColumns:
+    """
+    필터용 열 배열 (geo 행 위치와 1:1). 스냅샷마다 처음 필터가 쓰일 때 1회 생성.
+    - category: factorize 코드(int32, 결측 -1) + 값 → 코드 dict → 마스크는 코드 조회표 한 번
+    - number: float64 (결측 NaN은 어떤 비교도 False)
+    - grade: 스냅샷의 등급 코드(-1 = 등급 없음)를 그대로 쓴다
+    패싯(값별 개수)도 같은 코드 배열에서 bincount로 센다.
+    """
+
+    def __init__(self, snap: "_CSVSnapshot"):
+        self.snap = snap
+        self.n = len(snap.geo_rows)
+        self.categories: Dict[str, Tuple[np.ndarray, Dict[Any, int]]] = {}
+        self.uniques: Dict[str, list] = {}
+        self.numbers: Dict[str, np.ndarray] = {}
+        for kind, name in _FILTER_FIELDS.values():
+            if kind == "category":
+                codes, uniques = pd.factorize(snap.payload.column(name)[snap.geo_rows], use_na_sentinel=True)
+                self.categories[name] = (codes.astype(np.int32), {v: i for i, v in enumerate(uniques.tolist())})
+                self.uniques[name] = uniques.tolist()
+            elif kind == "number":
+                self.numbers[name] = snap.payload.column(name)[snap.geo_rows].astype(np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(c.nbytes for c, _ in self.categories.values()) + sum(a.nbytes for a in self.numbers.values()))
+
+    def state(self, prefix: str) -> Dict[str, np.ndarray]:
+        """
+        범주 코드 + 고유값(StringTable) / 숫자 열 → 스냅샷 배열. 값 → 코드 dict는 복원 때 다시 만든다.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        for name, (codes, _) in self.categories.items():
+            arrays[f"{prefix}.{name}.codes"] = codes
+            arrays.update(StringTable.pack(self.uniques[name]).arrays(f"{prefix}.{name}.uniques"))
+        for name, arr in self.numbers.items():
+            arrays[f"{prefix}.{name}"] = arr
+        return arrays
+
+    @classmethod
+    def from_state(cls, snap: "_CSVSnapshot", arrays: Dict[str, np.ndarray], prefix: str) -> "_FilterColumns":
+        out = cls.__new__(cls)
+        out.snap = snap
+        out.n = len(snap.geo_rows)
+        out.categories, out.uniques, out.numbers = {}, {}, {}
+        for kind, name in _FILTER_FIELDS.values():
+            if kind == "category":
+                uniques = StringTable.from_arrays(arrays, f"{prefix}.{name}.uniques").tolist()
+                out.categories[name] = (arrays[f"{prefix}.{name}.codes"], {v: i for i, v in enumerate(uniques)})
+                out.uniques[name] = uniques
+            elif kind == "number":
+                out.numbers[name] = arrays[f"{prefix}.{name}"]
+        return out
+
+    def clause_mask(self, clause: FilterClause, grade_scope: str) -> np.ndarray:
+        spec = _FILTER_FIELDS.get(clause.field)
+        if spec is None:
+            raise ValueError(f"unknown filter field: {clause.field} (allowed: {', '.join(_FILTER_FIELDS)})")
+        kind, name = spec
+        if kind != "number" and clause.op in RANGE_OPS:
+            raise ValueError(f"filter field {clause.field} supports only = and !=")
+
+        if kind == "number":
+            arr = self.numbers[name]
+            if clause.op in RANGE_OPS:
+                v = float(clause.values[0])
+                with np.errstate(invalid="ignore"):
+                    return {">=": arr >= v, "<=": arr <= v, ">": arr > v, "<": arr < v}[clause.op]
+            try:
+                wanted = [float(v) for v in clause.values]
+            except ValueError:
+                raise ValueError(f"filter {clause.field} needs numbers: {','.join(clause.values)}")
+            hit = np.isin(arr, wanted)
+            return hit if clause.op == "=" else ~hit & ~np.isnan(arr)
+
+        if kind == "grade":
+            bad = [v for v in clause.values if v.upper() not in GRADE_CATEGORIES]
+            if bad:
+                raise ValueError(f"filter {clause.field} grades must be A~F: {','.join(bad)}")
+            codes = self.snap.grade_codes(self.snap.grade_col(name, grade_scope))
+            lut = np.zeros(len(GRADE_CATEGORIES) + 1, dtype=bool)
+            lut[[GRADE_CATEGORIES.index(v.upper()) for v in clause.values]] = True
+        else:
+            codes, index = self.categories[name]
+            lut = np.zeros(len(index) + 1, dtype=bool)
+            lut[[index[v] for v in clause.values if v in index]] = True
+        # 코드 -1(결측)은 조회표 마지막 칸(False)을 가리킨다
+        hit = lut[codes]
+        return hit if clause.op == "=" else ~hit & (codes >= 0)
+
+    def mask(self, clauses: Tuple[FilterClause, ...], grade_scope: str) -> np.ndarray:
+        out = np.ones(self.n, dtype=bool)
+        for c in clauses:
+            out &= self.clause_mask(c, grade_scope)
+        return out
+
+    def facets(self, sel: Optional[np.ndarray], grade_scope: str) -> Dict[str, Any]:
+        """
+        FACET_FIELDS별 값 개수. sel: None(전체) / bool 마스크 / geo 위치 배열.
+        {"total": 행 수, "facets": {필드: [{"value", "count"}, ...]}}
+        - 범주: 개수 내림차순(같으면 값 순), 등급: A~F 순. 값이 없는 행은 value=None으로 마지막에.
+        """
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        total = self.n if sel is None else int(np.count_nonzero(sel)) if sel.dtype == bool else len(sel)
+        for field in FACET_FIELDS:
+            kind, name = _FILTER_FIELDS[field]
+            if kind == "grade":
+                codes = self.snap.grade_codes(self.snap.grade_col(name, grade_scope))
+                labels = list(GRADE_CATEGORIES)
+            else:
+                codes = self.categories[name][0]
+                labels = self.uniques[name]
+            if sel is not None:
+                codes = codes[sel]
+            # 코드 -1(값 없음)은 칸 0 → 칸 i+1이 코드 i
+            counts = np.bincount(codes.astype(np.int64) + 1, minlength=len(labels) + 1)
+            nz = np.flatnonzero(counts[1:])
+            if kind != "grade":
+                nz = sorted(nz.tolist(), key=lambda i: (-counts[i + 1], str(labels[i])))
+            items = [{"value": labels[i], "count": int(counts[i + 1])} for i in nz]
+            if counts[0]:
+                items.append({"value": None, "count": int(counts[0])})
+            out[field] = items
+        return {"total": total, "facets": out}
+
+# ----------------------------
+# 수용력 기반 추천 점수
+# ----------------------------
+# 취약성 비율 = vuln, p_elderly, p_child 의 가중 합 (0~1로 자름)
+_VULN_MIX = (("vuln", 0.5), ("p_elderly", 0.3), ("p_child", 0.2))
+
+def _parse_weights(raw: Optional[str]) -> Tuple[float, float, float]:
+    """
+    "거리,수용력,취약성" 가중치 문자열 → 3-튜플. 개수가 틀리거나 숫자가 아니거나 음수/합 0이면
+    경고를 남기고 RECOMMEND_DEFAULT_WEIGHTS (설정 오류로 CSV 조회 전체가 import 단계에서 죽지 않도록).
+    """
+    if not raw:
+        return RECOMMEND_DEFAULT_WEIGHTS
+    try:
+        weights = tuple(float(v) for v in raw.split(","))
+    except ValueError:
+        weights = ()
+    if len(weights) != 3 or not all(np.isfinite(w) and w >= 0 for w in weights) or sum(weights) <= 0:
+        print(f"[SHELTER-CSV] invalid SHELTER_CSV_RECOMMEND_WEIGHTS={raw!r} "
+              f"(expected 3 non-negative numbers, e.g. 0.5,0.3,0.2) → using {RECOMMEND_DEFAULT_WEIGHTS}")
+        return RECOMMEND_DEFAULT_WEIGHTS
+    return weights
+
+RECOMMEND_WEIGHTS = _parse_weights(os.getenv("SHELTER_CSV_RECOMMEND_WEIGHTS"))
+
+def _vuln_mode(raw: Optional[str]) -> str:
+    if raw in RECOMMEND_VULN_MODES:
+        return raw
+    print(f"[SHELTER-CSV] invalid SHELTER_CSV_RECOMMEND_VULN_MODE={raw!r} → using reserve")
+    return "reserve"
+
+RECOMMEND_VULN_MODE = _vuln_mode(os.getenv("SHELTER_CSV_RECOMMEND_VULN_MODE", "reserve"))
+
+def _fill_median(arr: np.ndarray, default: float) -> np.ndarray:
+    """
+    NaN/inf를 유한한 값들의 중앙값으로 채운다 (모두 비었으면 default). 새 배열 반환.
+    """
+    out = np.array(arr, dtype=np.float64)
+    bad = ~np.isfinite(out)
+    if bad.any():
+        out[bad] = np.median(out[~bad]) if not bad.all() else default
+    return out
+
+class _RecommendColumns:
+    """
+    추천 점수 중 기준 좌표와 무관한 항을 geo 행 위치와 1:1 배열로 미리 계산해 둔다.
+    요청에서는 k개 후보 위치로 모아(gather) 거리 항과 함께 더한다 → 후보 수만큼의 벡터 연산.
+
+    - capacity_score    = 1 / (1 + pressure), pressure = assigned_pop / capacity_est
+                          (CSV에 pressure가 있으면 그 값). 여유 1, 정원 0.5, 2배 초과 0.33
+    - vulnerable_share  = _VULN_MIX 가중 합 (배정 인구 중 취약 인구 비율, 0~1)
+      vulnerability_score는 vuln_mode에 따라
+        reserve(기본): 1 - share → 취약 인구가 많이 배정된 대피소는 그 주민 몫으로 남겨 두도록 뒤로 민다
+        prefer       : share     → 취약 계층 사용자에게 그런 대피소를 앞으로
+    - distance_score    = 1 / (1 + 거리 / RECOMMEND_DIST_SCALE_KM)
+    값이 없는 행은 전체 중앙값으로 채워 중립으로 둔다. score = RECOMMEND_WEIGHTS 가중 합.
+    """
+
+    _STATE_ARRAYS = ("pressure", "remaining", "capacity_score", "vulnerable_share")
+
+    def __init__(self, snap: "_CSVSnapshot", geo: pd.DataFrame):
+        col = snap.payload.column
+        rows = snap.geo_rows
+        assigned = col("assigned_pop")[rows]
+        capacity = col("capacity_est")[rows]
+        if "pressure" in geo.columns:
+            pressure = pd.to_numeric(geo["pressure"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pressure = np.where(capacity > 0, assigned / capacity, np.nan)
+        pressure = np.where(np.isfinite(pressure) & (pressure >= 0), pressure, np.nan)
+        # 응답용 원본 값 (결측 NaN 유지)
+        self.pressure = pressure
+        self.remaining = capacity - assigned
+        self.capacity_score = 1.0 / (1.0 + _fill_median(pressure, 1.0))
+        share = sum(w * np.clip(_fill_median(col(name)[rows], 0.0), 0.0, 1.0) for name, w in _VULN_MIX)
+        self.vulnerable_share = np.clip(share, 0.0, 1.0)
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        w_dist, w_cap, w_vuln = RECOMMEND_WEIGHTS
+        return {"distance": w_dist, "capacity": w_cap, "vulnerability": w_vuln}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self._STATE_ARRAYS)
+
+    def state(self, prefix: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        return {f"{prefix}.{name}": getattr(self, name) for name in self._STATE_ARRAYS}, {}
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], prefix: str) -> "_RecommendColumns":
+        out = cls.__new__(cls)
+        for name in cls._STATE_ARRAYS:
+            setattr(out, name, arrays[f"{prefix}.{name}"])
+        return out
+
+    def vulnerability_score(self, pos: np.ndarray, vuln_mode: str = "reserve") -> np.ndarray:
+        share = self.vulnerable_share[pos]
+        return share if vuln_mode == "prefer" else 1.0 - share
+
+    def score(self, pos: np.ndarray, dist: np.ndarray, vuln_mode: str = "reserve") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        후보 geo 위치 / 거리(km) → (점수, 거리 점수)
+        """
+        w_dist, w_cap, w_vuln = RECOMMEND_WEIGHTS
+        dist_score = 1.0 / (1.0 + dist / RECOMMEND_DIST_SCALE_KM)
+        score = w_dist * dist_score + w_cap * self.capacity_score[pos] + w_vuln * self.vulnerability_score(pos, vuln_mode)
+        return score, dist_score
+
+    def extra(
+        self, pos: np.ndarray, score: np.ndarray, dist_score: np.ndarray, vuln_mode: str = "reserve"
+    ) -> Dict[str, List[Any]]:
+        """
+        응답 항목에 붙일 점수/수용력 필드 (pos 순서)
+        """
+        def nullable(arr: np.ndarray) -> List[Optional[float]]:
+            return [None if v != v else v for v in arr.tolist()]
+
+        return {
+            "score": np.round(score, 4).tolist(),
+            "distance_score": np.round(dist_score, 4).tolist(),
+            "capacity_score": np.round(self.capacity_score[pos], 4).tolist(),
+            "vulnerability_score": np.round(self.vulnerability_score(pos, vuln_mode), 4).tolist(),
+            "pressure": nullable(self.pressure[pos]),
+            "remaining_capacity": nullable(self.remaining[pos]),
+        }
+
+def shelters_json(items: List[ShelterCSVResponse]) -> bytes:
+    """
+    응답 목록을 JSON 바이트로 직렬화 (검증 없이 pydantic-core 직렬화만 수행).
+    """
+    return _LIST_ADAPTER.dump_json(items)
+
+# ----------------------------
+# 스냅샷 (프로세스 전역 캐시)
+# ----------------------------
+
+class _CSVSnapshot:
+    """
+    CSV 1개를 한 번만 읽어 정규화해 둔 스냅샷. 요청 경로에서는 읽기만 한다.
+    - payload: 응답 필드 열 배열(전체 행 위치 기준, 행 번호 id / latitude·longitude 숫자화)
+    - ids : 응답 id(내용 기반 안정 id), row_of_id(): id → 행 위치 (정렬 배열 이진 탐색)
+    - geo_rows: 좌표가 유효한 행의 위치 → 근접/우선순위/검색은 이 "geo 위치" 기준
+    - 분위수 컷오프와 등급(recommend/priority, 시군구 기준 *_sigungu)은 로드 시점에 벡터로 계산해
+      geo 위치별 등급 코드(int8)로 보관
+    - 고정폭 배열(열/인덱스/등급/순위/필터/추천/이름 역색인)은 snapshot_state()로 파일 하나에 쓸 수 있고,
+      from_snapshot()은 그 파일의 읽기 전용 mmap 뷰로 같은 스냅샷을 만든다 → 워커들이 물리 사본 하나를 공유
+    """
+
+    # 등급 종류 × 기준 → 등급 코드 열 이름 (grade_col 참고)
+    _GRADE_COLS = ("_recommend_grade", "_priority_grade", "_recommend_grade_sigungu", "_priority_grade_sigungu")
+
+    def __init__(self, path: str, mtime: float, size: int, df: pd.DataFrame):
+        df = _assign_row_ids(df)
+        self._init_common(path, mtime, size, len(df))
+        self.priority_col = next((c for c in _PRIORITY_CANDIDATES if c in df.columns), None)
+        try:
+            geo = _normalize_coord_columns(df)
+        except ValueError as e:
+            # 상세 조회는 좌표 없이도 가능해야 하므로 오류는 geo 조회 시점에 올린다.
+            self.coord_error = e
+            geo = None
+
+        if geo is not None:
+            rows = df.copy()
+            rows["latitude"] = geo["latitude"].reindex(df.index)
+            rows["longitude"] = geo["longitude"].reindex(df.index)
+        else:
+            rows = df
+        # 응답 필드 열 배열 (rows 위치 기준). geo 위치 → rows 위치는 geo_rows로 변환
+        self.payload = _PayloadColumns(rows)
+        # 응답 id = 내용 기반 안정 id, 상세 조회는 id 정렬 배열 이진 탐색
+        col = self.payload.column
+        self.ids = _content_ids(
+            col("source"), col("HCODE").tolist(), col("facility_name"),
+            col("latitude").tolist(), col("longitude").tolist(),
+        )
+        self.payload.replace("id", self.ids)
+        self.id_order = np.argsort(self.ids, kind="stable")
+        self.id_sorted = self.ids[self.id_order]
+        if geo is None:
+            self._init_runtime()
+            return
+
+        self.geo_rows = geo.index.to_numpy(dtype=np.int64)
+        self.latitude = geo["latitude"].to_numpy(dtype=np.float64)
+        self.longitude = geo["longitude"].to_numpy(dtype=np.float64)
+        self.recommend_thresholds = _quantile_thresholds(geo.get("recommend_score", pd.Series(dtype=float)))
+        if self.priority_col is None:
+            self.priority_thresholds = (0.0, 0.0, 0.0, 0.0, 0.0)
+            prio_norm = np.zeros(len(geo))
+        else:
+            prio = pd.to_numeric(geo[self.priority_col], errors="coerce")
+            self.priority_thresholds = _quantile_thresholds(prio)
+            prio_norm = prio.fillna(float("-inf")).to_numpy(dtype=np.float64)
+
+        # 등급: 로드 시 1회 벡터 계산 → 등급 코드 (전국 기준 / 시군구 기준)
+        rec_vals = pd.to_numeric(geo["recommend_score"], errors="coerce").to_numpy(dtype=np.float64) \
+            if "recommend_score" in geo.columns else np.full(len(geo), np.nan)
+        prio_vals = pd.to_numeric(geo[self.priority_col], errors="coerce").to_numpy(dtype=np.float64) \
+            if self.priority_col is not None else np.full(len(geo), np.nan)
+        rec_codes = _grade_codes(rec_vals, self.recommend_thresholds)
+        prio_codes = _grade_codes(prio_vals, self.priority_thresholds)
+        grades = [rec_codes, prio_codes]
+        if "SIGUNGU" in geo.columns:
+            sigungu = geo["SIGUNGU"].reset_index(drop=True)
+            rec_codes = _grade_codes_by_group(rec_vals, sigungu, rec_codes)
+            prio_codes = _grade_codes_by_group(prio_vals, sigungu, prio_codes)
+        grades += [rec_codes, prio_codes]
+        self.grades = {
+            name: _grade_categorical(codes, geo.index).cat.codes.to_numpy()
+            for name, codes in zip(self._GRADE_COLS, grades)
+        }
+        names_lower = _build_name_series(geo).str.lower()
+        # 정렬용 순위 배열(위치 → 전체 순서에서의 순위). 검색 결과는 이 값으로 top-k만 고른다.
+        n = len(geo)
+        prio_order = np.lexsort((np.arange(n), -prio_norm))
+        self.priority_rank = np.empty(n, dtype=np.int64)
+        self.priority_rank[prio_order] = np.arange(n)
+        name_order = np.argsort(names_lower.to_numpy(dtype=object), kind="stable")
+        self.name_rank = np.empty(n, dtype=np.int64)
+        self.name_rank[name_order] = np.arange(n)
+        # 이름/도로명주소 bigram 역색인 (검색 시 전체 행 스캔 없음)
+        self.name_index = NgramIndex(names_lower.tolist())
+        self.addr_index = NgramIndex(
+            _build_name_series(geo, ("road_address", "address")).str.strip().str.lower().tolist()
+        )
+        # 거리 계산용 연속 float64 배열 (geo 행 위치와 1:1)
+        self.lat_rad, self.lon_rad, self.cos_lat = prepare_latlon(geo["latitude"], geo["longitude"])
+        # 근접 조회용 공간 인덱스 (위치 = geo 행 위치)
+        self.index = GridIndex(self.latitude, self.longitude)
+        # 필터 열 배열 / 추천 점수의 위치 무관 항 (수용력/취약성)
+        self.filter_columns = _FilterColumns(self)
+        self.recommend = _RecommendColumns(self, geo)
+        self._init_runtime()
+
+    def _init_common(self, path: str, mtime: float, size: int, n_rows: int) -> None:
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.n_rows = n_rows
+        # 같은 path에서 몇 번째로 적재한 스냅샷인지 / 읽은 파일 식별값 (reload_snapshot이 채운다)
+        self.version = 1
+        self.file_id = None
+        # 읽은 CSV 내용 해시 (sha256 hex, _load_snapshot이 채운다) — mtime/크기와 달리 같은 크기로 바로 덮어써도 바뀐다
+        self.content_hash: Optional[str] = None
+        self.loaded_at = time.time()
+        # 공유 스냅샷 파일 경로 (mmap으로 복원했으면) / 그 파일의 입력 정보
+        self.snapshot: Optional[str] = None
+        self.snapshot_source: Optional[Dict[str, Any]] = None
+        self.priority_col: Optional[str] = None
+        self.coord_error: Optional[ValueError] = None
+        self.geo_rows: Optional[np.ndarray] = None
+        self.filter_columns: Optional[_FilterColumns] = None
+        self.recommend: Optional[_RecommendColumns] = None
+
+    def _init_runtime(self) -> None:
+        """
+        두 생성 경로(CSV / 스냅샷 파일) 공통: 워커마다 따로 두는 작은 상태와 캐시.
+        """
+        self._name_search: Optional[NameSearchIndex] = None
+        self._name_search_lock = threading.Lock()
+        # 셀별 k-최근접 후보표: warm()에서 만들거나 공유 파일에서 열고, 그 전에는 공간 인덱스로 찾는다
+        self.knn_table: Optional[KnnCellTable] = None
+        # 패싯: 전체 패싯 개수는 로드 때, 컴파일된 마스크·필터별 패싯은 (필터, 등급 기준)별 LRU
+        self.facet_base: Dict[str, Dict[str, Any]] = {}
+        if self.filter_columns is not None:
+            self.facet_base = {scope: self.filter_columns.facets(None, scope) for scope in GRADE_SCOPES}
+        self._filter_masks: "OrderedDict[Tuple[Any, ...], np.ndarray]" = OrderedDict()
+        self._filter_facets: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._filter_lock = threading.Lock()
+
+    def snapshot_state(self) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+        """
+        (배열들, meta) — 좌표가 있는 CSV만 (없으면 None). from_snapshot으로 같은 스냅샷을 만든다.
+        """
+        if self.coord_error is not None:
+            return None
+        payload_arrays, payload_meta = self.payload.state("payload")
+        index_arrays, index_scalars = self.index.state("index")
+        name_arrays, name_scalars = self.name_index.state("name")
+        addr_arrays, addr_scalars = self.addr_index.state("addr")
+        rec_arrays, rec_meta = self.recommend.state("recommend")
+        arrays = {
+            **payload_arrays, **index_arrays, **name_arrays, **addr_arrays, **rec_arrays,
+            **self.filter_columns.state("filter"),
+            **{f"grade.{name}": codes for name, codes in self.grades.items()},
+        }
+        for name in ("ids", "id_order", "id_sorted", "geo_rows", "latitude", "longitude",
+                     "lat_rad", "lon_rad", "cos_lat", "priority_rank", "name_rank"):
+            arrays[name] = getattr(self, name)
+        meta = {
+            "n_rows": self.n_rows,
+            "priority_col": self.priority_col,
+            "recommend_thresholds": list(self.recommend_thresholds),
+            "priority_thresholds": list(self.priority_thresholds),
+            "payload": payload_meta,
+            "index": index_scalars,
+            "name": name_scalars,
+            "addr": addr_scalars,
+            "recommend": rec_meta,
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_snapshot(
+        cls, path: str, mtime: float, size: int, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]
+    ) -> "_CSVSnapshot":
+        """
+        snapshot_state()로 쓴 파일의 배열(읽기 전용 mmap 뷰)로 스냅샷 복원. CSV를 읽거나 다시 계산하지 않는다.
+        """
+        snap = cls.__new__(cls)
+        snap._init_common(path, mtime, size, meta["n_rows"])
+        snap.priority_col = meta["priority_col"]
+        snap.recommend_thresholds = tuple(meta["recommend_thresholds"])
+        snap.priority_thresholds = tuple(meta["priority_thresholds"])
+        for name in ("ids", "id_order", "id_sorted", "geo_rows", "latitude", "longitude",
+                     "lat_rad", "lon_rad", "cos_lat", "priority_rank", "name_rank"):
+            setattr(snap, name, arrays[name])
+        snap.payload = _PayloadColumns.from_state(arrays, meta["payload"], "payload")
+        snap.grades = {name: arrays[f"grade.{name}"] for name in cls._GRADE_COLS}
+        snap.index = GridIndex.from_state(arrays, meta["index"], "index")
+        snap.name_index = NgramIndex.from_state(arrays, meta["name"], "name")
+        snap.addr_index = NgramIndex.from_state(arrays, meta["addr"], "addr")
+        snap.filter_columns = _FilterColumns.from_state(snap, arrays, "filter")
+        snap.recommend = _RecommendColumns.from_state(arrays, meta["recommend"], "recommend")
+        snap._init_runtime()
+        return snap
+
+    def row_of_id(self, shelter_id: int) -> Optional[int]:
+        """
+        응답 id → 행 위치 (없으면 None)
+        """
+        i = int(np.searchsorted(self.id_sorted, shelter_id))
+        if i < len(self.id_sorted) and self.id_sorted[i] == shelter_id:
+            return int(self.id_order[i])
         return None
-    v = float(value)
-    if v >= q95: return "A"
-    if v >= q90: return "B"
-    if v >= q75: return "C"
-    if v >= q50: return "D"
-    if v >= q25: return "E"
-    return "F"
+
+    def require_geo(self) -> int:
+        """
+        좌표 컬럼이 없는 CSV면 로드 때의 ValueError를 올린다. 반환: geo 행 수.
+        """
+        if self.coord_error is not None:
+            raise self.coord_error
+        return len(self.geo_rows)
+
+    @staticmethod
+    def grade_col(kind: str, scope: str = "national") -> str:
+        """
+        kind: "recommend" | "priority", scope: "national" | "sigungu" → 등급 컬럼명
+        """
+        return f"_{kind}_grade" + ("_sigungu" if scope == "sigungu" else "")
+
+    def warm(self) -> None:
+        """
+        백그라운드 스레드에서 호출: 셀별 k-최근접 후보표 → 초성/오타 검색 인덱스 순으로 미리 만든다.
+        (첫 요청이 기다리지 않도록. 만들어지기 전 요청은 공간 인덱스/첫 사용 시 생성으로 처리)
+        """
+        self.knn_table = _load_knn_table(self)
+        self.name_search
+
+    def knn(self, lat: float, lon: float, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        가까운 k개 (geo 위치, 거리 km). 후보표가 있고 k <= KNN_TABLE_K면 셀 후보만 정렬한다 (결과는 같다).
+        mask(필터)가 있으면 마스크 안의 점만 — 후보표로 확정되지 않으면 공간 인덱스가 셀을 넓혀 가며 찾는다.
+        """
+        table = self.knn_table
+        if table is not None:
+            return table.knn(lat, lon, k, mask)
+        return self.index.knn(lat, lon, k, mask)
+
+    def filter_mask(self, filters: Optional[str], grade_scope: str = "national") -> Optional[np.ndarray]:
+        """
+        필터 문자열(filter_util 문법) → geo 행 bool 마스크 (읽기 전용). 필터가 비어 있으면 None.
+        같은 필터(정규화 후)는 캐시된 마스크를 그대로 쓴다 → 요청마다 행을 훑지 않는다.
+        문법 / 필드 / 값 오류는 ValueError.
+        """
+        clauses = parse_filter(filters)
+        if not clauses:
+            return None
+        self.require_geo()  # 좌표 컬럼이 없는 CSV면 다른 조회와 같은 오류
+        # 등급 절이 없으면 등급 기준과 무관한 마스크
+        scoped = any(_FILTER_FIELDS.get(c.field, ("",))[0] == "grade" for c in clauses)
+        key = (clauses, grade_scope if scoped else None)
+        mask = self._filter_masks.get(key)
+        if mask is not None:
+            return mask
+        with self._filter_lock:
+            mask = self.filter_columns.mask(clauses, grade_scope)
+            mask.flags.writeable = False
+            self._filter_masks[key] = mask
+            if len(self._filter_masks) > FILTER_CACHE_SIZE:
+                self._filter_masks.popitem(last=False)
+        return mask
+
+    @property
+    def name_search(self) -> NameSearchIndex:
+        """
+        초성/자모/오타 허용 검색 인덱스. 만드는 비용이 커서(30만 행 기준 수십 초) 스냅샷 로드 때가 아니라
+        첫 사용 때 한 번 만든다. 부분일치는 name_index를 공유.
+        """
+        if self._name_search is None:
+            with self._name_search_lock:
+                if self._name_search is None:
+                    names = self.name_index.texts
+                    names = names.tolist() if isinstance(names, StringTable) else names
+                    self._name_search = NameSearchIndex(names, substring_index=self.name_index)
+        return self._name_search
+
+    def facets(self, filters: Optional[str], grade_scope: str = "national", pos: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        패싯 개수 (_FilterColumns.facets 형식). pos(검색 결과 geo 위치)가 있으면 그 안에서, 필터도 함께 적용.
+        - 필터도 검색도 없으면 로드 때 센 facet_base
+        - 필터만 있으면 (필터, 등급 기준)별 LRU → 같은 필터는 다시 세지 않는다
+        """
+        mask = self.filter_mask(filters, grade_scope)
+        if pos is not None:
+            return self.filter_columns.facets(pos if mask is None else pos[mask[pos]], grade_scope)
+        if mask is None:
+            return self.facet_base[grade_scope]
+        key = (parse_filter(filters), grade_scope)
+        out = self._filter_facets.get(key)
+        if out is not None:
+            return out
+        out = self.filter_columns.facets(mask, grade_scope)
+        with self._filter_lock:
+            self._filter_facets[key] = out
+            if len(self._filter_facets) > FILTER_CACHE_SIZE:
+                self._filter_facets.popitem(last=False)
+        return out
+
+    def match_name(self, q: str, match: str = "substring") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        검색어 q(소문자)에 맞는 geo 행 위치(오름차순)와 이름 정확도 점수.
+        - match="substring": 이름 또는 도로명주소 부분일치. 점수는 None(필요할 때 accuracy_scores로 계산)
+        - match="choseong" | "jamo" | "fuzzy" | "auto": 이름만 대상으로 NameSearchIndex 검색, 점수 함께 반환
+        """
+        if match == "substring":
+            return np.union1d(self.name_index.search(q), self.addr_index.search(q)), None
+        return self.name_search.search(q, match)
+
+    def accuracy_scores(self, q: str, pos: np.ndarray) -> np.ndarray:
+        """
+        이름 정확도 점수: 3(완전 일치) / 2(접두) / 1(부분) / 0(도로명주소만 일치)
+        """
+        names = self.name_index.texts
+        return np.fromiter(
+            (3 if names[i] == q else 2 if names[i].startswith(q) else 1 if q in names[i] else 0 for i in pos.tolist()),
+            dtype=np.int8, count=len(pos),
+        )
+
+    def grade_codes(self, grade_col: str) -> np.ndarray:
+        return self.grades[grade_col]
+
+    def grade_labels(self, grade_col: str, pos: np.ndarray) -> List[Optional[str]]:
+        """
+        geo 위치들의 등급 라벨("A"~"F", 없으면 None)
+        """
+        return _GRADE_LABELS[self.grade_codes(grade_col)[pos]].tolist()
+
+    def response_rows(self, pos: np.ndarray, extra: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return self.payload.rows(self.geo_rows[np.asarray(pos, dtype=np.int64)], extra)
+
+    def responses(self, pos: np.ndarray, extra: Optional[Dict[str, Any]] = None) -> List[ShelterCSVResponse]:
+        """
+        geo 위치 목록 → 응답 모델 목록 (pos 순서 유지)
+        """
+        return self.payload.build(self.geo_rows[np.asarray(pos, dtype=np.int64)], extra)
+
+    def distances_km(self, lat: float, lon: float, pos: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        기준점 → geo 행(또는 pos 위치의 행)까지의 거리(km) 벡터.
+        """
+        if pos is None:
+            return haversine_km_prepared(lat, lon, self.lat_rad, self.lon_rad, self.cos_lat)
+        return haversine_km_prepared(lat, lon, self.lat_rad[pos], self.lon_rad[pos], self.cos_lat[pos])
+
 
 # ----------------------------
-# 공개 함수
+# 공유 스냅샷 파일 (mmap)
 # ----------------------------
-def get_nearby_from_csv(path: str, lat: float, lon: float, limit: int = 20) -> List[ShelterCSVResponse]:
+# 스냅샷 형식/계산 규칙이 바뀌면 올린다 (이전 파일은 다시 만든다)
+_SNAPSHOT_VERSION = 2
+
+def _snapshot_file(path: str, suffix: str = ".snap") -> Optional[str]:
+    if CSV_SNAPSHOT != "auto":
+        return None
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), CACHE_DIR_NAME, os.path.basename(path) + suffix)
+
+def _open_snapshot_file(file: str, kind: str, source: Dict[str, Any]):
+    """
+    스냅샷 파일 → (배열들, meta). 없거나 종류/입력(source)이 다르면 None.
+    """
+    if not os.path.exists(file):
+        return None
+    try:
+        arrays, meta = open_snapshot(file)
+    except (OSError, ValueError) as e:
+        print(f"[SHELTER-CSV] snapshot unreadable: {file} ({e})")
+        return None
+    if meta.get("kind") != kind or meta.get("source") != source:
+        return None
+    return arrays, meta
+
+def _write_snapshot_file(file: str, kind: str, source: Dict[str, Any], state) -> bool:
+    arrays, meta = state
+    meta = {**meta, "kind": kind, "source": source}
+    try:
+        size = write_snapshot(file, arrays, meta)
+    except (OSError, ValueError) as e:
+        print(f"[SHELTER-CSV] snapshot write failed: {file} ({e})")
+        return False
+    print(f"[SHELTER-CSV] snapshot written: {file} bytes={size}")
+    return True
+
+def _snapshot_from_file(path: str, st: os.stat_result, file: str, source: Dict[str, Any]) -> Optional[_CSVSnapshot]:
+    opened = _open_snapshot_file(file, "shelter_csv", source)
+    if opened is None:
+        return None
+    snap = _CSVSnapshot.from_snapshot(path, st.st_mtime, st.st_size, *opened)
+    snap.snapshot = file
+    snap.snapshot_source = source
+    return snap
+
+def _load_knn_table(snap: _CSVSnapshot) -> KnnCellTable:
     """
-    USER용: 기준 좌표에서 가까운 순으로 반환 + recommend_grade 계산
+    근접 후보표: 스냅샷을 파일에서 열었으면 후보표도 옆 파일(<CSV>.knn.snap)에서 열고,
+    없으면 한 워커만 만들어 쓴 뒤 연다. 파일을 쓸 수 없으면 이 워커에서 만든 것을 그대로 쓴다.
     """
+    if snap.snapshot is None:
+        table = KnnCellTable(snap.index, KNN_TABLE_K)
+        print(f"[SHELTER-CSV] knn table built: {snap.path} {table.stats()}")
+        return table
+    file = snap.snapshot[: -len(".snap")] + ".knn.snap"
+    source = {**snap.snapshot_source, "knn_k": KNN_TABLE_K}
+
+    def opened():
+        found = _open_snapshot_file(file, "shelter_csv_knn", source)
+        if found is None:
+            return None
+        arrays, meta = found
+        return KnnCellTable.from_state(snap.index, arrays, meta, "knn")
+
+    table = opened()
+    if table is None:
+        with build_lock(file):
+            table = opened()
+            if table is None:
+                table = KnnCellTable(snap.index, KNN_TABLE_K)
+                print(f"[SHELTER-CSV] knn table built: {snap.path} {table.stats()}")
+                if _write_snapshot_file(file, "shelter_csv_knn", source, table.state("knn")):
+                    table = opened() or table
+    return table
+
+_SNAPSHOT_LOCK = threading.Lock()
+_RELOAD_LOCKS: Dict[str, threading.Lock] = {}
+_SNAPSHOTS: Dict[str, _CSVSnapshot] = {}
+
+def _load_snapshot(path: str, version: int) -> Optional[_CSVSnapshot]:
+    """
+    path를 읽어 새 스냅샷을 만든다 (게시는 호출한 쪽에서). 빈 CSV면 None.
+    공유 스냅샷 파일이 같은 CSV 내용(해시)으로 만든 것이면 CSV를 읽지 않고 mmap만 한다.
+    없으면 한 워커만(파일 락) CSV에서 만들어 파일로 쓰고, 모두 그 파일을 연다.
+    읽기 전후로 파일 식별값을 비교해, 읽는 동안 바뀌었으면(복사/업로드 중) RuntimeError.
+    """
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        raise RuntimeError(f"CSV 읽기 실패: {path} (마지막 오류: {e})")
+    before = file_id(path)
+    digest = file_digest(path)
+    file = _snapshot_file(path)
+    snap = None
+    if file is not None:
+        source = {
+            "version": _SNAPSHOT_VERSION,
+            "csv": digest,
+        }
+        snap = _snapshot_from_file(path, st, file, source)
+        if snap is None:
+            with build_lock(file):
+                # 락을 기다리는 동안 다른 워커가 같은 내용으로 만들었으면 그 파일을 연다
+                snap = _snapshot_from_file(path, st, file, source)
+                if snap is None:
+                    snap = _build_snapshot(path, st)
+                    state = snap.snapshot_state() if snap is not None else None
+                    if state is not None and _write_snapshot_file(file, "shelter_csv", source, state):
+                        snap = _snapshot_from_file(path, st, file, source) or snap
+    else:
+        snap = _build_snapshot(path, st)
+    if file_id(path) != before:
+        raise RuntimeError(f"CSV 읽기 실패: {path} (읽는 동안 파일이 바뀜)")
+    if snap is None:
+        return None
+    snap.version = version
+    snap.file_id = before
+    snap.content_hash = digest
+    return snap
+
+def _build_snapshot(path: str, st: os.stat_result) -> Optional[_CSVSnapshot]:
     df = _safe_read_csv(path)
-    df = _assign_row_ids(df)          # 행 기반 id 생성
-    df = _normalize_coord_columns(df) # 좌표 컬럼 정규화(+숫자화, 결측 제거)
+    if df is None or df.empty:
+        return None
+    return _CSVSnapshot(path, st.st_mtime, st.st_size, df)
 
-    # 거리 계산
-    df["distance_km"] = df.apply(
-        lambda r: _haversine_km(lat, lon, float(r["latitude"]), float(r["longitude"])),
-        axis=1
-    )
+def _get_snapshot(path: str) -> Optional[_CSVSnapshot]:
+    """
+    path에 대한 현재 스냅샷 반환. 요청 경로에서는 게시된 스냅샷을 읽기만 한다 (stat/락 없음).
+    앱 시작 시 preload_snapshots가 미리 적재하고 (그 전이면 여기서 한 번), 이후 파일 변경은 reload_snapshot(관리자 재적재 / 파일 감시)이 반영한다.
+    파일이 없으면 _safe_read_csv와 동일하게 RuntimeError.
+    """
+    snap = _SNAPSHOTS.get(path)
+    if snap is not None:
+        return snap
+
+    with _SNAPSHOT_LOCK:
+        snap = _SNAPSHOTS.get(path)
+        if snap is not None:
+            return snap
+        snap = _load_snapshot(path, 1)
+        if snap is None:
+            return None
+        _SNAPSHOTS[path] = snap
+        print(f"[SHELTER-CSV] snapshot loaded: {path} rows={snap.n_rows}")
+        if snap.coord_error is None:
+            # 근접 후보표 / 초성·오타 검색 인덱스는 백그라운드에서 미리 만들어 둔다 (첫 요청이 기다리지 않도록)
+            threading.Thread(target=snap.warm, name="shelter-csv-warm", daemon=True).start()
+        return snap
+
+def preload_snapshots(paths: Optional[List[str]] = None) -> threading.Thread:
+    """
+    앱 시작 시 사용자/관리자 CSV 스냅샷을 백그라운드 스레드에서 미리 적재 (첫 요청이 적재를 기다리지 않도록).
+    적재 중에 들어온 요청은 _get_snapshot 락에서 같은 적재를 기다린다. 실패는 로그만 남기고,
+    그 경로는 첫 요청에서 다시 시도된다.
+    """
+    paths = list(dict.fromkeys(paths or (USER_CSV, ADMIN_CSV)))
+
+    def _run() -> None:
+        for path in paths:
+            try:
+                _get_snapshot(path)
+            except Exception as e:
+                print(f"[SHELTER-CSV] preload failed: {path} ({e})")
 
-    # recommend_score 분위수 계산(등급 컷오프)
-    q25, q50, q75, q90, q95 = _quantile_thresholds(df.get("recommend_score", pd.Series(dtype=float)))
-
-    # 가까운 순 정렬 → head(limit)
-    df = df.sort_values("distance_km", ascending=True)
-    if limit is not None:
-        df = df.head(limit)
-
-    results: List[ShelterCSVResponse] = []
-    for _, row in df.iterrows():
-        payload = _row_to_payload(row)
-        payload["distance_km"] = _to_float(row["distance_km"])
-        # USER: recommend_grade 추가
-        payload["recommend_grade"] = _grade_by_thresholds(
-            _to_float(row.get("recommend_score")),
-            q25, q50, q75, q90, q95
+    t = threading.Thread(target=_run, name="shelter-csv-preload", daemon=True)
+    t.start()
+    return t
+
+def reload_snapshot(path: str, force: bool = False) -> Dict[str, Any]:
+    """
+    path의 다음 스냅샷을 요청 경로 밖에서 끝까지 만든 뒤(인덱스 / 등급 / 패싯 / 근접 후보표 / 검색 인덱스)
+    한 번에 교체한다. 요청은 교체 전까지 이전 스냅샷을, 이후에는 새 스냅샷을 본다 (중간 상태 없음).
+    - 같은 path의 재적재는 한 번에 하나 (겹치면 앞의 것이 끝난 뒤 파일을 다시 보고 판단)
+    - 파일이 그대로면 force가 아닌 한 다시 만들지 않는다 (changed=False)
+    - 읽는 동안 파일이 바뀌었거나 빈 CSV면 이전 스냅샷을 그대로 두고 RuntimeError
+    """
+    with _RELOAD_LOCKS.setdefault(path, threading.Lock()):
+        old = _SNAPSHOTS.get(path)
+        if old is not None and not force and old.file_id == file_id(path):
+            return {"path": path, "changed": False, "version": old.version, "rows": old.n_rows}
+        t0 = time.perf_counter()
+        snap = _load_snapshot(path, old.version + 1 if old is not None else 1)
+        if snap is None:
+            raise RuntimeError(f"CSV 읽기 실패: {path} (빈 파일)")
+        if snap.coord_error is None:
+            snap.warm()
+        _SNAPSHOTS[path] = snap
+        seconds = round(time.perf_counter() - t0, 3)
+        print(f"[SHELTER-CSV] snapshot swapped: {path} version={snap.version} rows={snap.n_rows} {seconds}s")
+        return {"path": path, "changed": True, "version": snap.version, "rows": snap.n_rows, "seconds": seconds}
+
+# ----------------------------
+# 공개 함수
+# ----------------------------
+def get_nearby_from_csv(
+    path: str,
+    lat: float,
+    lon: float,
+    limit: int = 20,
+    grade_scope: str = "national",
+    filters: Optional[str] = None,
+) -> List[ShelterCSVResponse]:
+    """
+    USER용: 기준 좌표에서 가까운 순으로 반환 + recommend_grade(스냅샷에서 미리 계산)
+    - grade_scope="sigungu"면 같은 시군구 안에서의 분위수 등급
+    - filters: 필터 문자열(filter_util 문법) — 조건에 맞는 행 중에서 가까운 순
+    """
+    snap = _get_snapshot(path)
+    if snap is None:
+        return []
+    n_geo = snap.require_geo()
+    grade_col = snap.grade_col("recommend", grade_scope)
+    mask = snap.filter_mask(filters, grade_scope)
+
+    # 셀별 후보표(없으면 공간 인덱스) k-최근접 (limit=None이면 전체 거리순)
+    top, dist = snap.knn(lat, lon, n_geo if limit is None else limit, mask)
+
+    # USER: recommend_grade 추가
+    return snap.responses(top, {
+        "distance_km": dist.tolist(),
+        "recommend_grade": snap.grade_labels(grade_col, top),
+    })
+
+def get_recommendation_from_csv(
+    path: str,
+    lat: float,
+    lon: float,
+    candidates: int = RECOMMEND_CANDIDATES,
+    alternatives: int = 4,
+    grade_scope: str = "national",
+    filters: Optional[str] = None,
+    vuln_mode: Optional[str] = None,
+) -> ShelterCSVRecommendResponse:
+    """
+    USER용 수용력 기반 추천: 가까운 candidates개 후보를 거리 / 남은 수용력 / 취약성 점수(_RecommendColumns)로
+    다시 매겨 1위를 recommended, 다음 alternatives개를 대안으로 반환 (동점은 가까운 순).
+    후보 찾기는 get_nearby_from_csv와 같은 k-최근접이고, 점수는 후보 수만큼의 벡터 연산.
+    vuln_mode: 취약성 항 방향 reserve | prefer (없으면 RECOMMEND_VULN_MODE). 그 밖의 값은 ValueError.
+    """
+    vuln_mode = vuln_mode or RECOMMEND_VULN_MODE
+    if vuln_mode not in RECOMMEND_VULN_MODES:
+        raise ValueError(f"vuln_mode must be one of {', '.join(RECOMMEND_VULN_MODES)}")
+    snap = _get_snapshot(path)
+    if snap is None:
+        return ShelterCSVRecommendResponse.model_construct(
+            recommended=None, alternatives=[], candidates=0, weights={}, vuln_mode=vuln_mode
         )
-        results.append(ShelterCSVResponse(**payload))
-    return results
+    snap.require_geo()  # 좌표 컬럼이 없는 CSV면 get_nearby_from_csv와 같은 오류
+    grade_col = snap.grade_col("recommend", grade_scope)
+    mask = snap.filter_mask(filters, grade_scope)
+
+    pos, dist = snap.knn(lat, lon, candidates, mask)
+    score, dist_score = snap.recommend.score(pos, dist, vuln_mode)
+    # knn 결과가 (거리, 위치) 순이므로 안정 정렬이면 동점은 가까운 순
+    order = np.argsort(-score, kind="stable")[:alternatives + 1]
+    top = pos[order]
+    rows = snap.response_rows(top, {
+        "distance_km": dist[order].tolist(),
+        "recommend_grade": snap.grade_labels(grade_col, top),
+    })
+    extra = snap.recommend.extra(top, score[order], dist_score[order], vuln_mode)
+    construct = ShelterCSVRecommendItem.model_construct
+    items = [construct(**row, **{k: v[i] for k, v in extra.items()}) for i, row in enumerate(rows)]
+    return ShelterCSVRecommendResponse.model_construct(
+        recommended=items[0] if items else None,
+        alternatives=items[1:],
+        candidates=len(pos),
+        weights=snap.recommend.weights,
+        vuln_mode=vuln_mode,
+    )
+
+def get_within_radius_from_csv(
+    path: str,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int = AREA_MAX_RESULTS,
+    grade_scope: str = "national",
+    filters: Optional[str] = None,
+) -> Tuple[List[ShelterCSVResponse], int]:
+    """
+    지도용: 기준 좌표 반경 radius_km 이내 대피소를 가까운 순(동률은 CSV 행 순서)으로 최대 limit개.
+    (결과, 반경 안 전체 개수) 반환. radius_km / limit은 AREA_MAX_RADIUS_KM / AREA_MAX_RESULTS로 자른다.
+    filters가 있으면 조건에 맞는 행만 (개수도 필터 후 기준).
+    """
+    snap = _get_snapshot(path)
+    if snap is None:
+        return [], 0
+    snap.require_geo()  # 좌표 컬럼이 없는 CSV면 get_nearby_from_csv와 같은 오류
+    grade_col = snap.grade_col("recommend", grade_scope)
+    limit = min(limit, AREA_MAX_RESULTS)
+
+    mask = snap.filter_mask(filters, grade_scope)
+    pos, dist = snap.index.radius(lat, lon, min(radius_km, AREA_MAX_RADIUS_KM), mask)
+    top, d = pos[:limit], dist[:limit]
+    items = snap.responses(top, {
+        "distance_km": d.tolist(),
+        "recommend_grade": snap.grade_labels(grade_col, top),
+    })
+    return items, len(pos)
+
+def get_in_viewport_from_csv(
+    path: str,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    limit: int = AREA_MAX_RESULTS,
+    grade_scope: str = "national",
+    filters: Optional[str] = None,
+) -> Tuple[List[ShelterCSVResponse], int]:
+    """
+    지도용: 위경도 사각형(경계 포함) 안의 대피소를 최대 limit개. (결과, 사각형 안 전체 개수) 반환.
+    정렬은 사각형 중심에서 가까운 순(동률은 CSV 행 순서) → 잘려도 화면 가운데 쪽이 남고,
+    같은 뷰포트는 항상 같은 결과. distance_km는 None(기준 좌표가 없으므로).
+    filters가 있으면 조건에 맞는 행만 (개수도 필터 후 기준).
+    """
+    snap = _get_snapshot(path)
+    if snap is None:
+        return [], 0
+    snap.require_geo()  # 좌표 컬럼이 없는 CSV면 get_nearby_from_csv와 같은 오류
+    grade_col = snap.grade_col("recommend", grade_scope)
+    limit = min(limit, AREA_MAX_RESULTS)
+
+    pos = snap.index.bbox(min_lat, min_lon, max_lat, max_lon, snap.filter_mask(filters, grade_scope))
+    dist = snap.distances_km((min_lat + max_lat) / 2.0, (min_lon + max_lon) / 2.0, pos)
+    # 경계 동률까지 결정적이도록 전체 lexsort (argpartition은 동률 중 임의 선택)
+    top = pos[np.lexsort((pos, dist))[:limit]]
+    items = snap.responses(top, {
+        "distance_km": [None] * len(top),
+        "recommend_grade": snap.grade_labels(grade_col, top),
+    })
+    return items, len(pos)
+
+def _nearby_batch_rows(
+    path: str, lats: Sequence[float], lons: Sequence[float], limit: int, grade_scope: str
+) -> Iterator[List[Dict[str, Any]]]:
+    snap = _get_snapshot(path)
+    if snap is None:
+        for _ in range(len(lats)):
+            yield []
+        return
+    snap.require_geo()  # 좌표 컬럼이 없는 CSV면 get_nearby_from_csv와 같은 오류
+    grade_col = snap.grade_col("recommend", grade_scope)
+    pos, dist = snap.index.knn_batch(lats, lons, limit)
+    k = pos.shape[1]
+    for b0 in range(0, len(pos), _BATCH_CHUNK):
+        block = pos[b0:b0 + _BATCH_CHUNK]
+        rows = snap.response_rows(block.ravel(), {
+            "distance_km": dist[b0:b0 + _BATCH_CHUNK].ravel().tolist(),
+            "recommend_grade": snap.grade_labels(grade_col, block.ravel()),
+        })
+        for j in range(len(block)):
+            yield rows[j * k:(j + 1) * k]
+
+def get_nearby_batch_from_csv(
+    path: str, lats: Sequence[float], lons: Sequence[float], limit: int = 5, grade_scope: str = "national"
+) -> Iterator[List[ShelterCSVResponse]]:
+    """
+    여러 기준점의 근접 대피소를 한 번에: 스냅샷 1회 조회 + 공간 인덱스 knn_batch 1회로 전체 k-NN을 구하고,
+    기준점 순서대로 get_nearby_from_csv와 같은 응답 목록을 만들어 낸다(응답 생성은 _BATCH_CHUNK개씩).
+    """
+    construct = ShelterCSVResponse.model_construct
+    for rows in _nearby_batch_rows(path, lats, lons, limit, grade_scope):
+        yield [construct(**r) for r in rows]
+
+def nearby_batch_ndjson(
+    path: str, points: Sequence[Any], limit: int = 5, grade_scope: str = "national"
+) -> Iterator[bytes]:
+    """
+    일괄 근접 조회 결과를 NDJSON으로: 기준점 1개당 한 줄
+    {"index": i, "key": ..., "latitude": ..., "longitude": ..., "data": [ShelterCSVResponse 필드...]}
+    points: latitude / longitude / key 속성을 가진 객체 목록 (ShelterCSVBatchPoint)
+    응답 모델을 만들지 않고 필드 dict를 바로 직렬화한다.
+    """
+    lats = np.fromiter((p.latitude for p in points), dtype=np.float64, count=len(points))
+    lons = np.fromiter((p.longitude for p in points), dtype=np.float64, count=len(points))
+    lines: List[Dict[str, Any]] = []
+    for i, (p, rows) in enumerate(zip(points, _nearby_batch_rows(path, lats, lons, limit, grade_scope))):
+        lines.append({"index": i, "key": p.key, "latitude": p.latitude, "longitude": p.longitude, "data": rows})
+        if len(lines) >= _BATCH_CHUNK:
+            yield _ndjson(lines)
+            lines = []
+    if lines:
+        yield _ndjson(lines)
+
+def _ndjson(lines: List[Dict[str, Any]]) -> bytes:
+    return b"".join(_LINE_ADAPTER.dump_json(line) + b"\n" for line in lines)
+
+def _file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+def get_snapshot_stats() -> Dict[str, Any]:
+    """
+    로드된 스냅샷별 행 수와 근접 조회 구조의 메모리(bytes). knn_table은 백그라운드 생성 전이면 None.
+    filter_*: 캐시된 필터 마스크 수 / 필터 열 배열 + 마스크 메모리, recommend_bytes: 추천 점수 열 배열
+    snapshot: 워커들이 mmap으로 공유하는 스냅샷 파일 (CSV에서 직접 만들었으면 None)
+    """
+    out: Dict[str, Any] = {}
+    for path, snap in list(_SNAPSHOTS.items()):
+        geo_ok = snap.coord_error is None
+        out[path] = {
+            "version": snap.version,
+            "loaded_at": snap.loaded_at,
+            "rows": snap.n_rows,
+            "geo_rows": len(snap.geo_rows) if geo_ok else 0,
+            "index_bytes": snap.index.nbytes if geo_ok else 0,
+            "knn_table": snap.knn_table.stats() if snap.knn_table is not None else None,
+            "filter_masks": len(snap._filter_masks),
+            "filter_bytes": (snap.filter_columns.nbytes if snap.filter_columns is not None else 0)
+            + sum(m.nbytes for m in list(snap._filter_masks.values())),
+            "recommend_bytes": snap.recommend.nbytes if snap.recommend is not None else 0,
+            "snapshot": {"path": snap.snapshot, "file_bytes": _file_size(snap.snapshot)} if snap.snapshot else None,
+        }
+    return out
+
+def get_facets_from_csv(
+    path: str,
+    query: Optional[str] = None,
+    match: str = "substring",
+    grade_scope: str = "national",
+    filters: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    대시보드용 패싯: 시설 유형(shelter_type_name) / 시군구 / priority_grade / recommend_grade별 개수.
+    query가 있으면 search_by_name_from_csv와 같은 검색 결과 안에서, filters가 있으면 조건에 맞는 행만 센다.
+    스냅샷의 코드 배열을 bincount로 세며, 전체/필터별 결과는 스냅샷에 보관해 둔다 (스냅샷이 바뀌면 함께 바뀜).
+    {"total": 행 수, "facets": {필드: [{"value", "count"}, ...]}}
+    """
+    snap = _get_snapshot(path)
+    if snap is None:
+        return {"total": 0, "facets": {f: [] for f in FACET_FIELDS}}
+    snap.require_geo()  # 좌표 컬럼이 없는 CSV면 다른 조회와 같은 오류
+
+    q = (query or "").strip().lower()
+    if not q:
+        return snap.facets(filters, grade_scope)
+    pos, _ = snap.match_name(q, match)
+    return snap.facets(filters, grade_scope, pos)
 
 def get_shelter_by_id_from_csv(
     path: str, 
@@ -225,98 +1463,66 @@ def get_shelter_by_id_from_csv(
     base_lon: Optional[float] = None
 ) -> Optional[ShelterCSVResponse]:
     """
-    행 기반 자동 id(1..N)로 상세 조회.
+    안정 id(내용 해시)로 상세 조회 — id 정렬 배열 이진 탐색 (O(log n)).
+    ACCEPT_LEGACY_IDS면 예전 행 번호 id(1..N)도 받는다 (안정 id는 2^40 이상이라 겹치지 않음).
     base_lat/lon이 주어지면 distance_km 계산해서 포함.
     (상세에서는 등급은 선택적; 필요하면 USER/ADMIN 컨텍스트에서 다시 계산 가능)
     """
-    df = _safe_read_csv(path)
-    if df is None or df.empty:
+    snap = _get_snapshot(path)
+    if snap is None:
         return None
 
-    df = _assign_row_ids(df)
-
     try:
         target_id = int(str(shelter_id).strip())
     except ValueError:
         return None
 
-    hit = df[df["id"] == target_id]
-    if hit.empty:
+    row_pos = snap.row_of_id(target_id)
+    if row_pos is None and ACCEPT_LEGACY_IDS and 1 <= target_id <= snap.n_rows:
+        row_pos = target_id - 1
+    if row_pos is None:
         return None
 
-    row = hit.iloc[0]
-    payload = _row_to_payload(row)
+    item = snap.payload.build(np.array([row_pos]))[0]
 
     # 좌표 있고, 기준 좌표도 들어오면 거리 계산
     if base_lat is not None and base_lon is not None:
-        lat = _to_float(payload.get("latitude"))
-        lon = _to_float(payload.get("longitude"))
-        if lat is not None and lon is not None:
-            payload["distance_km"] = _haversine_km(base_lat, base_lon, lat, lon)
+        if item.latitude is not None and item.longitude is not None:
+            item.distance_km = haversine_km(base_lat, base_lon, item.latitude, item.longitude)
 
-    return ShelterCSVResponse(**payload)
+    return item
 
-def get_by_priority_from_csv(path: str, limit: int = 20) -> List[ShelterCSVResponse]:
+def get_by_priority_from_csv(
+    path: str, limit: int = 20, grade_scope: str = "national", filters: Optional[str] = None
+) -> List[ShelterCSVResponse]:
     """
     ADMIN 전용: 위경도 없이 priority 내림차순으로 상위 limit개 반환.
     - 좌표는 스키마 필수라서 정규화(_normalize_coord_columns)로 숫자화/결측 제거
     - priority 컬럼 후보: ["priority", "PRIORITY", "admin_priority"]
     - distance_km는 계산하지 않음(None)
-    - priority_grade(A~F) 포함
+    - priority_grade(A~F) 포함 (grade_scope="sigungu"면 시군구 내 분위수 기준)
+    - filters: 필터 문자열(filter_util 문법) — 조건에 맞는 행만
     """
-    df = _safe_read_csv(path)
-    if df is None or df.empty:
+    snap = _get_snapshot(path)
+    if snap is None:
         return []
+    n_geo = snap.require_geo()
+    grade_col = snap.grade_col("priority", grade_scope)
 
-    # 행 기반 id 부여
-    df = _assign_row_ids(df)
-
-    # 좌표 표준화(스키마에 latitude/longitude 필수이므로 없는 행은 제거)
-    df = _normalize_coord_columns(df)
-
-    # priority 후보 고르기 + 정규화
-    cand = None
-    for c in ("priority", "PRIORITY", "admin_priority"):
-        if c in df.columns:
-            cand = c
-            break
+    mask = snap.filter_mask(filters, grade_scope)
 
-    if cand is None:
-        df["_priority_norm"] = 0.0
-        q25 = q50 = q75 = q90 = q95 = 0.0
+    # priority 내림차순, 동점이면 CSV 행 순서 (= 미리 계산한 priority_rank 오름차순)
+    if mask is None:
+        top = top_k_smallest(snap.priority_rank, n_geo if limit is None else limit)
     else:
-        df["_priority_norm"] = pd.to_numeric(df[cand], errors="coerce")
-        q25, q50, q75, q90, q95 = _quantile_thresholds(df["_priority_norm"])
-        df["_priority_norm"] = df["_priority_norm"].fillna(float("-inf"))
+        pos = np.flatnonzero(mask)
+        top = pos[top_k_smallest(snap.priority_rank[pos], len(pos) if limit is None else limit)]
 
-    # priority 내림차순, 동점이면 id 오름차순
-    df = df.sort_values(by=["_priority_norm", "id"], ascending=[False, True])
-
-    if limit is not None:
-        df = df.head(limit)
-
-    results: List[ShelterCSVResponse] = []
-    for _, row in df.iterrows():
-        payload = _row_to_payload(row)
-        payload["distance_km"] = None
-        # ADMIN: priority_grade 추가
-        pval = _to_float(row.get(cand)) if cand else None
-        payload["priority_grade"] = _grade_by_thresholds(pval, q25, q50, q75, q90, q95)
-        results.append(ShelterCSVResponse(**payload))
-
-    return results
-
-def _build_name_series(df: pd.DataFrame) -> pd.Series:
-    """
-    이름 후보(facility_name, name, REARE_NM, MGC_NM) 중 첫 유효값을 문자열로 반환
-    """
-    cols = [c for c in ["facility_name", "name", "REARE_NM", "MGC_NM"] if c in df.columns]
-    if not cols:
-        return pd.Series([""] * len(df), index=df.index, dtype=object)
-    s = df[cols[0]].astype("string")
-    for c in cols[1:]:
-        s = s.fillna(df[c].astype("string"))
-    return s.fillna("")
+    # ADMIN: priority_grade 추가
+    return snap.responses(top, {
+        "distance_km": [None] * len(top),
+        "priority_grade": snap.grade_labels(grade_col, top),
+    })
 
 def search_by_name_from_csv(
     path: str,
@@ -325,120 +1531,83 @@ def search_by_name_from_csv(
     sort_mode: str = "priority",  # "priority" | "name" | "distance" | "priority_grade" | "accuracy"
     base_lat: Optional[float] = None,
     base_lon: Optional[float] = None,
+    grade_scope: str = "national",
+    match: str = "substring",  # "substring" | "choseong" | "jamo" | "fuzzy" | "auto"
+    filters: Optional[str] = None,
 ) -> List[ShelterCSVResponse]:
     """
-    시설명 부분일치 검색.
+    시설명/도로명주소 부분일치 검색(bigram 역색인). 등급은 검색 결과가 아닌 데이터셋 전체(또는 시군구) 기준으로 미리 계산된 값.
     - sort_mode="priority": ADMIN용, priority 내림차순 정렬 (priority_grade 포함)
     - sort_mode="priority_grade": priority_grade 순서(A~F)로 정렬
-    - sort_mode="accuracy": 이름 정확도 점수순 정렬
+    - sort_mode="accuracy": 이름 정확도 점수순 정렬 (완전 > 접두 > 부분 > 주소만 일치)
     - sort_mode="name": 이름 사전순 정렬
     - sort_mode="distance": 기준 좌표 있으면 거리순 (recommend_grade 포함)
+    match가 substring이 아니면 이름만 대상으로 초성("ㄱㄹㄷ") / 자모("경로ㄷ") / 오타 허용 검색을 하고,
+    accuracy 정렬은 그 검색의 점수를 쓴다.
+    filters(filter_util 문법)가 있으면 검색 결과 중 조건에 맞는 행만.
     """
-    df = _safe_read_csv(path)
-    if df is None or df.empty:
+    snap = _get_snapshot(path)
+    if snap is None:
         return []
+    n_geo = snap.require_geo()
 
-    df = _assign_row_ids(df)
-    df = _normalize_coord_columns(df)
-
-    # 이름 시리즈
-    name_s = _build_name_series(df)
     q = (query or "").strip().lower()
     if not q:
         return []
 
-    mask = name_s.str.lower().str.contains(q, na=False)
-    df = df[mask].copy()
-    if df.empty:
+    pos, scores = snap.match_name(q, match)
+    mask = snap.filter_mask(filters, grade_scope)
+    if mask is not None:
+        keep = mask[pos]
+        pos = pos[keep]
+        scores = scores[keep] if scores is not None else None
+    if len(pos) == 0:
         return []
 
-    results: List[ShelterCSVResponse] = []
+    # 정렬은 미리 계산한 순위/코드 배열로 limit개만 고르고, 그 행만 응답으로 만든다.
+    n = n_geo
 
     # -------------------
     # 거리순 (USER 스타일)
     # -------------------
     if sort_mode == "distance" and base_lat is not None and base_lon is not None:
-        df["distance_km"] = df.apply(
-            lambda r: _haversine_km(base_lat, base_lon, float(r["latitude"]), float(r["longitude"])),
-            axis=1
-        )
-        q25, q50, q75, q90, q95 = _quantile_thresholds(df.get("recommend_score", pd.Series(dtype=float)))
-        df = df.sort_values("distance_km", ascending=True).head(limit)
-
-        for _, row in df.iterrows():
-            payload = _row_to_payload(row)
-            payload["distance_km"] = _to_float(row["distance_km"])
-            payload["recommend_grade"] = _grade_by_thresholds(_to_float(row.get("recommend_score")), q25, q50, q75, q90, q95)
-            results.append(ShelterCSVResponse(**payload))
-        return results
+        dist = snap.distances_km(base_lat, base_lon, pos)
+        grade_col = snap.grade_col("recommend", grade_scope)
+        top = top_k_smallest(dist, limit)
+        return snap.responses(pos[top], {
+            "distance_km": dist[top].tolist(),
+            "recommend_grade": snap.grade_labels(grade_col, pos[top]),
+        })
 
     # -------------------
     # priority 기준 (ADMIN)
     # -------------------
     if sort_mode in ("priority", "priority_grade"):
-        cand = None
-        for c in ("priority", "PRIORITY", "admin_priority"):
-            if c in df.columns:
-                cand = c
-                break
-
-        if cand is None:
-            df["_priority_norm"] = 0.0
-            q25 = q50 = q75 = q90 = q95 = 0.0
-        else:
-            df["_priority_norm"] = pd.to_numeric(df[cand], errors="coerce")
-            q25, q50, q75, q90, q95 = _quantile_thresholds(df["_priority_norm"])
-            df["_priority_norm"] = df["_priority_norm"].fillna(float("-inf"))
-
-        # priority_grade 미리 계산
-        df["priority_grade"] = df[cand].apply(lambda v: _grade_by_thresholds(_to_float(v), q25, q50, q75, q90, q95))
+        grade_col = snap.grade_col("priority", grade_scope)
 
         if sort_mode == "priority":
-            df = df.sort_values(by=["_priority_norm", "id"], ascending=[False, True])
-        else:  # priority_grade 순 정렬 (A~F)
-            grade_order = {"A": 0, "B": 1, "C": 2, "D": 3, "E": 4, "F": 5, None: 6}
-            df["_grade_order"] = df["priority_grade"].map(grade_order)
-            df = df.sort_values(by=["_grade_order", "id"], ascending=[True, True])
-
-        df = df.head(limit)
-
-        for _, row in df.iterrows():
-            payload = _row_to_payload(row)
-            payload["distance_km"] = None
-            payload["priority_grade"] = row.get("priority_grade")
-            results.append(ShelterCSVResponse(**payload))
-        return results
+            # priority 내림차순, 동점이면 CSV 행 순서
+            key = snap.priority_rank[pos]
+        else:  # priority_grade 순 정렬 (A~F, 등급 없음은 마지막), 동점이면 CSV 행 순서
+            codes = snap.grade_codes(grade_col)[pos].astype(np.int64)
+            key = np.where(codes < 0, len(GRADE_CATEGORIES), codes) * n + pos
+
+        top = pos[top_k_smallest(key, limit)]
+        return snap.responses(top, {
+            "distance_km": [None] * len(top),
+            "priority_grade": snap.grade_labels(grade_col, top),
+        })
 
     # -------------------
-    # 이름 정확도
+    # 이름 정확도 / 이름 사전순
     # -------------------
     if sort_mode == "accuracy":
-        def score_fn(name: str) -> int:
-            n = (name or "").lower()
-            if n == q:
-                return 3
-            if n.startswith(q):
-                return 2
-            if q in n:
-                return 1
-            return 0
-        df["_acc_score"] = name_s.apply(score_fn)
-        df = df.sort_values(by=["_acc_score", "id"], ascending=[False, True]).head(limit)
-
-        for _, row in df.iterrows():
-            payload = _row_to_payload(row)
-            payload["distance_km"] = None
-            results.append(ShelterCSVResponse(**payload))
-        return results
+        # 점수 내림차순, 동점이면 CSV 행 순서
+        if scores is None:
+            scores = snap.accuracy_scores(q, pos)
+        key = (3 - scores.astype(np.int64)) * n + pos
+    else:
+        key = snap.name_rank[pos]
 
-    # -------------------
-    # 이름 사전순
-    # -------------------
-    df["_name_key"] = name_s.str.lower()
-    df = df.sort_values("_name_key", ascending=True).head(limit)
-
-    for _, row in df.iterrows():
-        payload = _row_to_payload(row)
-        payload["distance_km"] = None
-        results.append(ShelterCSVResponse(**payload))
-    return results
+    top = pos[top_k_smallest(key, limit)]
+    return snap.responses(top, {"distance_km": [None] * len(top)})
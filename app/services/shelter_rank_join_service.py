@@ -0,0 +1,154 @@
+# app/services/shelter_rank_join_service.py
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlmodel import Session
+
+from app.db.session import db_engine
+from app.models.shelter_models import Shelter
+from app.services import shelter_rank_service as rank
+from app.services.geo_index_service import get_db_index
+
+
+class _ShelterRankJoin:
+    """
+    Shelter.id → 랭크 행 위치 (Shelter 전체를 한 번의 배치 공간 조인으로 매칭한 결과).
+    source: 만든 근거가 된 (Shelter 공간 인덱스, 랭크 테이블). 둘 중 하나라도 바뀌면 다시 만든다.
+    - ids: 정렬된 Shelter.id, pos: 같은 순서의 랭크 행 위치 (-1 = 매칭 없음)
+    """
+
+    def __init__(self, db_index, table, ids: np.ndarray, pos: np.ndarray):
+        self.db_index = db_index
+        self.table = table
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.pos = pos[order]
+
+    @property
+    def matched(self) -> int:
+        return int((self.pos >= 0).sum())
+
+    def positions(self, shelter_ids) -> np.ndarray:
+        """
+        Shelter.id 목록 → 랭크 행 위치 배열 (조인에 없는 id / 매칭 없음은 -1).
+        """
+        q = np.asarray(shelter_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(q), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self.ids, q), len(self.ids) - 1)
+        return np.where(self.ids[i] == q, self.pos[i], -1)
+
+    def ranks(self, shelter_ids) -> List[Optional[Dict[str, Any]]]:
+        return [self.table.payload(p) if p >= 0 else None for p in self.positions(shelter_ids).tolist()]
+
+
+_LOCK = threading.Lock()
+# 최근 조인 (최대 2개: 현재 + 재적재 직전에 미리 만든 다음 테이블용)
+_JOINS: List[_ShelterRankJoin] = []
+
+
+def _build(db_index, table) -> _ShelterRankJoin:
+    # GridIndex는 셀 순서로 정렬된 좌표를 들고 있으므로 원래 순서(ids와 같은 순서)로 되돌린다
+    n = db_index.index.n
+    lats = np.empty(n, dtype=np.float64)
+    lons = np.empty(n, dtype=np.float64)
+    lats[db_index.index.order] = db_index.index.lat_deg
+    lons[db_index.index.order] = db_index.index.lon_deg
+    if table is None or table.n == 0:
+        pos = np.full(n, -1, dtype=np.int64)
+    else:
+        pos = table.match(lats, lons)
+    join = _ShelterRankJoin(db_index, table, db_index.ids, pos)
+    print(f"[RANK-JOIN] shelters={n} matched={join.matched} rank_rows={0 if table is None else table.n}")
+    return join
+
+
+def _find(db_index, table) -> Optional[_ShelterRankJoin]:
+    for join in list(_JOINS):
+        if join.db_index is db_index and join.table is table:
+            return join
+    return None
+
+def _find_current(table) -> Optional[_ShelterRankJoin]:
+    # 테이블만 같은 가장 최근 조인 (재적재 직후 정리용)
+    for join in reversed(list(_JOINS)):
+        if join.table is table:
+            return join
+    return None
+
+def _remember(join: _ShelterRankJoin, keep_table=None) -> None:
+    # keep_table이 주어지면 그 테이블의 조인만 남긴다 (이전 테이블 배열을 붙잡고 있지 않도록)
+    global _JOINS
+    joins = [j for j in _JOINS if j is not join and (keep_table is None or j.table is keep_table)]
+    _JOINS = (joins + [join])[-2:]
+
+def get_shelter_rank_join(db: Session, db_index=None) -> _ShelterRankJoin:
+    """
+    현재 Shelter 테이블 / 랭크 테이블 기준 조인 반환. 둘 다 그대로면 저장된 결과를 그대로 쓴다.
+    랭크 재적재(reload_rank_csv)는 교체 전에 조인을 미리 만들어 두므로 요청이 다시 만들지 않는다.
+    db_index: 호출한 쪽이 이미 구한 get_db_index(db, Shelter) (없으면 여기서 구한다)
+    """
+    if db_index is None:
+        db_index = get_db_index(db, Shelter)
+    join = _find(db_index, rank.get_table())
+    if join is not None:
+        return join
+    with _LOCK:
+        # 기다리는 동안 테이블이 바뀌었을 수 있으므로 다시 본다
+        table = rank.get_table()
+        join = _find(db_index, table)
+        if join is None:
+            join = _build(db_index, table)
+            _remember(join, keep_table=table)
+        return join
+
+
+def refresh_shelter_rank_join() -> None:
+    """
+    적재(fetch_and_store_shelters) / 랭크 CSV 재적재 직후 호출: 조인을 미리 다시 계산해 둔다.
+    """
+    try:
+        with Session(db_engine) as session:
+            get_shelter_rank_join(session)
+    except Exception as e:
+        print(f"[RANK-JOIN] refresh failed: {e}")
+
+
+def reload_rank_csv():
+    """
+    랭크 CSV 재적재 + 조인 재계산. 새 테이블의 조인을 교체 전에 만들어 두어 요청이 기다리지 않는다.
+    교체된 랭크 테이블을 반환 (CSV가 없으면 None).
+    """
+    def before_swap(table) -> None:
+        try:
+            with Session(db_engine) as session:
+                db_index = get_db_index(session, Shelter)
+        except Exception as e:
+            print(f"[RANK-JOIN] prepare failed: {e}")
+            return
+        join = _build(db_index, table)
+        with _LOCK:
+            _remember(join)
+
+    table = rank.reload(before_swap)
+    with _LOCK:
+        join = _find_current(table)
+        if join is not None:
+            _remember(join, keep_table=table)
+    return table
+
+
+def ranks_for_shelters(db: Session, shelters: List[Shelter], db_index=None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Shelter 행 목록 → 랭크 payload 목록 (매칭 없음은 None).
+    - db_index(Shelter 공간 인덱스)가 있으면 미리 계산한 Shelter.id → 랭크 행 조인에서 꺼낸다 (행마다 좌표 매칭 안 함)
+    - 없으면(bbox 모드) 그 행들의 좌표만 랭크 테이블에 매칭한다 → Shelter 전체 인덱스/조인을 만들지 않는다
+    조인의 매칭도 같은 table.match라 결과는 같다.
+    """
+    if db_index is None:
+        return rank.lookup_by_latlon_batch(
+            np.array([s.latitude for s in shelters], dtype=np.float64),
+            np.array([s.longitude for s in shelters], dtype=np.float64),
+        )
+    return get_shelter_rank_join(db, db_index).ranks([s.id for s in shelters])
@@ -1,27 +1,41 @@
 # app/services/shelter_rank_service.py
-import os, math, threading
+import os, math, sys, threading, time
+from typing import Dict, Tuple
+
+import numpy as np
 import pandas as pd
 
+from app.utils.csv_cache_util import CACHE_DIR_NAME, file_digest, read_csv_cached
+from app.utils.file_watch_util import file_id
+from app.utils.mmap_snapshot_util import StringTable, build_lock, open_snapshot, write_snapshot
+from app.utils.spatial_index_util import GridIndex, match_nearest_within
+
 USER_ALL_CSV  = os.getenv("SHELTER_USER_ALL_CSV",  "/content/shelters_rank_user_all.csv")
 ADMIN_ALL_CSV = os.getenv("SHELTER_ADMIN_ALL_CSV", "/content/shelters_rank_admin_all.csv")
 MATCH_RADIUS_M = float(os.getenv("SHELTER_NEARBY_MATCH_RADIUS_M", "600"))
+# USER/ADMIN 병합 시 같은 시설로 볼 거리(m). ADMIN 행은 이 안의 가장 가까운 USER 행 하나와 1:1로 합친다 (0 = 같은 좌표만)
+MERGE_RADIUS_M = float(os.getenv("SHELTER_RANK_MERGE_RADIUS_M", "30"))
+# 병합된 랭크 테이블 스냅샷 파일 (모든 워커가 읽기 전용 mmap으로 공유)
+# auto: USER CSV 옆 .csvcache/shelters_rank.snap, 빈 값/0: 쓰지 않음 (워커마다 CSV에서 직접 만든다)
+RANK_SNAPSHOT = os.getenv("SHELTER_RANK_SNAPSHOT", "auto")
+# 다른 워커가 스냅샷을 교체했는지 확인하는 간격(초)
+SNAPSHOT_CHECK_S = float(os.getenv("SHELTER_RANK_SNAPSHOT_CHECK_S", "1"))
 
 
 _LOCK = threading.Lock()
+_RELOAD_LOCK = threading.Lock()   # 재적재는 한 번에 하나 (만드는 동안 _LOCK은 잡지 않는다)
 _LOADED = False
-_IDX = {}          # (round(lat,5), round(lon,5)) -> dict(row)
-_ALL_ROWS = []     # 근접 탐색용 전체 행(dict) 리스트
-_ALL_LATLON = []   # [(lat, lon), ...] 근접 탐색용
+_TABLE = None      # _RankTable: 병합된 랭크 행(좌표 유효)을 열 배열로 보관
+_SNAPSHOT_CHECKED = 0.0
 
 def _safe_read_csv(path: str) -> pd.DataFrame | None:
     if not path or not os.path.exists(path):
         return None
-    for enc in ("utf-8", "utf-8-sig", "cp949", "euc-kr"):
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            pass
-    return None
+    try:
+        return read_csv_cached(path)
+    except Exception as e:
+        print(f"[RANK] CSV 읽기 실패: {path} ({e})")
+        return None
 
 def _grade_user(v):
     try:
@@ -45,37 +59,6 @@ def _grade_admin(v):
     if v < 500: return "B"
     return "A"
 
-def _norm_num(x):
-    try:
-        v = float(x)
-        return v if math.isfinite(v) else None
-    except:
-        return None
-
-def _row_to_payload(row: pd.Series) -> dict:
-    return {
-        "id":              row.get("id"),
-        "source":          row.get("source"),
-        "HCODE":           row.get("HCODE"),
-        "SIGUNGU":         row.get("SIGUNGU"),
-        "EUPMYEON":        row.get("EUPMYEON"),
-        "facility_name":   row.get("name") or row.get("REARE_NM") or row.get("MGC_NM"),
-        "road_address":    row.get("address"),
-        "shelter_type_name": row.get("type_name"),
-        "shelter_type_code": row.get("type_code"),
-        "assigned_pop":    _norm_num(row.get("assigned_pop")),
-        "capacity_est":    _norm_num(row.get("capacity_est")),
-        "p_elderly":       _norm_num(row.get("p_elderly")),
-        "p_child":         _norm_num(row.get("p_child")),
-        "vuln":            _norm_num(row.get("vuln")),
-        "pressure":        _norm_num(row.get("pressure")),
-        "recommend_score": _norm_num(row.get("recommend_score")),
-        "priority":        _norm_num(row.get("priority")),
-        "latitude":        _norm_num(row.get("lat")),
-        "longitude":       _norm_num(row.get("lon")),
-    }
-
-
 def _prep(df: pd.DataFrame, is_user: bool):
     if df is None or df.empty: 
         return pd.DataFrame()
@@ -96,93 +79,500 @@ def _prep(df: pd.DataFrame, is_user: bool):
         df["priority"] = None
     return df
 
-def _merge_user_admin(user_df: pd.DataFrame | None, admin_df: pd.DataFrame | None) -> pd.DataFrame:
+def _merge_user_admin(
+    user_df: pd.DataFrame | None, admin_df: pd.DataFrame | None, radius_m: float | None = None
+) -> pd.DataFrame:
+    """
+    USER/ADMIN 프레임을 합치고, 같은 시설로 보이는 USER-ADMIN 행을 한 행으로 병합.
+    - ADMIN 행마다 반경 radius_m(기본 MERGE_RADIUS_M) 안의 가장 가까운 USER 행과 1:1로 짝짓는다
+      (격자 해시로 반경 안 쌍만 비교, 가까운 쌍 우선). USER끼리 / ADMIN끼리는 합치지 않는다.
+    - 짝지어진 행은 USER 행의 필드(좌표 포함)를 그대로 쓰고, USER 쪽에 없는 열(priority/pressure 등)만
+      ADMIN 행에서 채운다 → 서로 다른 행의 값이 한 필드 묶음에 섞이지 않는다
+    - 같은 쪽 안에서 좌표가 완전히 같은 행은 처음 것만 남긴다 (예전 drop_duplicates와 같음)
+    - 병합 통계는 반환 프레임의 attrs["merge_stats"]
+    """
     U = _prep(user_df, True)
     A = _prep(admin_df, False)
     if U.empty and A.empty: 
         return pd.DataFrame()
     if U.empty:
         A["recommend_score"] = None
-        return A
     if A.empty:
         U["priority"] = None
-        return U
-    # 좌표가 다를 수 있으므로 단순 outer concat 후 중복 제거(동일 lat/lon은 사용자 우선)
-    merged = pd.concat([U.assign(_src="U"), A.assign(_src="A")], ignore_index=True)
-    # 같은 좌표가 둘 다 있으면 사용자(U) 우선으로 정리
-    merged.sort_values(by=["lat","lon","_src"], ascending=[True,True,True], inplace=True)
-    merged = merged.drop_duplicates(subset=["lat","lon"], keep="first")
-    return merged.drop(columns=["_src"], errors="ignore")
-
-def _build_index(df: pd.DataFrame):
-    global _IDX, _ALL_ROWS, _ALL_LATLON
-    _IDX = {}
-    _ALL_ROWS = []
-    _ALL_LATLON = []
-
-    for _, row in df.iterrows():
-        lat = _norm_num(row.get("lat")); lon = _norm_num(row.get("lon"))
-        if lat is None or lon is None: 
-            continue
-        payload = _row_to_payload(row)
-        key = (round(lat,5), round(lon,5))
-        _IDX[key] = payload
-        _ALL_ROWS.append(payload)
-        _ALL_LATLON.append((lat, lon))
+    radius_m = MERGE_RADIUS_M if radius_m is None else radius_m
+
+    def coords(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        for c in ("lat", "lon"):
+            df[c] = pd.to_numeric(df[c], errors="coerce") if c in df.columns else np.nan
+        # 좌표 없는 행은 매칭/지도에 쓸 수 없으므로 버린다
+        return df[df["lat"].notna() & df["lon"].notna()]
+
+    user_rows, admin_rows = len(U), len(A)
+    U, A = coords(U), coords(A)
+    input_rows = len(U) + len(A)
+    U = U.drop_duplicates(subset=["lat", "lon"], keep="first").reset_index(drop=True)
+    A = A.drop_duplicates(subset=["lat", "lon"], keep="first").reset_index(drop=True)
+
+    iu, ia, dist = match_nearest_within(
+        U["lat"].to_numpy(dtype=np.float64), U["lon"].to_numpy(dtype=np.float64),
+        A["lat"].to_numpy(dtype=np.float64), A["lon"].to_numpy(dtype=np.float64),
+        max(radius_m, 0.0) / 1000.0,
+    )
+    # USER 쪽에 없는(또는 전부 빈) 열만 짝 ADMIN 행에서 채운다
+    fill = [c for c in A.columns if c not in ("lat", "lon") and (c not in U.columns or U[c].isna().all())]
+    out_u = U.copy()
+    for c in fill:
+        col = pd.Series(np.nan, index=out_u.index, dtype=A[c].dtype if A[c].dtype.kind in "f" else object)
+        col.iloc[iu] = A[c].to_numpy()[ia]
+        out_u[c] = col
+    unmatched_a = np.ones(len(A), dtype=bool)
+    unmatched_a[ia] = False
+    out = pd.concat([out_u, A[unmatched_a]], ignore_index=True)
+    out.sort_values(by=["lat", "lon"], inplace=True, kind="stable")
+    out = out.reset_index(drop=True)
+
+    stats = {
+        "radius_m": radius_m,
+        "user_rows": user_rows,
+        "admin_rows": admin_rows,
+        "input_rows": input_rows,
+        "duplicate_rows": input_rows - len(U) - len(A),
+        "merged_rows": len(out),
+        "removed_rows": input_rows - len(out),
+        "user_admin_joined": int(len(ia)),
+        "max_join_distance_m": round(float(dist.max()) * 1000.0, 3) if len(dist) else 0.0,
+    }
+    out.attrs["merge_stats"] = stats
+    print(f"[RANK] merge: {stats}")
+    return out
+
+# ----------------------------
+# 열 배열 저장소
+# ----------------------------
+# payload 키 → 병합 프레임 컬럼 (문자열/원본값은 factorize 코드 + 고유값, 숫자는 float64)
+_LABEL_FIELDS = (
+    ("source", "source"), ("HCODE", "HCODE"), ("SIGUNGU", "SIGUNGU"), ("EUPMYEON", "EUPMYEON"),
+    ("facility_name", "name"), ("road_address", "address"),
+    ("shelter_type_name", "type_name"), ("shelter_type_code", "type_code"),
+)
+_NUM_FIELDS = (
+    "assigned_pop", "capacity_est", "p_elderly", "p_child", "vuln", "pressure", "recommend_score", "priority",
+)
+_GRADE_LABELS = ("A", "B", "C", "D", "NA")
+_GRADE_NA = 4
+# 좌표 라운딩 키: 소수 5자리 정수 (위도 + 2^24) << 26 | (경도 + 2^25)
+_KEY_DECIMALS = 5
+
+def _grade_user_codes(v: np.ndarray) -> np.ndarray:
+    """
+    _grade_user의 벡터 버전 → _GRADE_LABELS 코드 (A=0 .. D=3, NA=4)
+    """
+    codes = (3 - np.searchsorted(np.array([0.5, 1.0, 1.5]), v, side="right")).astype(np.int8)
+    with np.errstate(invalid="ignore"):
+        codes[~np.isfinite(v) | (v <= 0)] = _GRADE_NA
+    return codes
+
+def _grade_admin_codes(v: np.ndarray) -> np.ndarray:
+    """
+    _grade_admin의 벡터 버전 → _GRADE_LABELS 코드 (A=0 .. D=3, NA=4)
+    """
+    codes = (3 - np.searchsorted(np.array([50.0, 200.0, 500.0]), v, side="right")).astype(np.int8)
+    codes[~np.isfinite(v)] = _GRADE_NA
+    return codes
+
+def _num_array(df: pd.DataFrame, col: str) -> np.ndarray:
+    # 숫자로 못 바꾸거나 유한하지 않으면 NaN (payload에서는 None)
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    v = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    v[~np.isfinite(v)] = np.nan
+    return v
+
+def _round_keys(lat: np.ndarray, lon: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    (위도, 경도)를 소수 decimals자리로 반올림한 키 (소수 5자리 정수 기준으로 맞춰 비교 가능).
+    """
+    scale = 10.0 ** decimals
+    up = 10 ** (_KEY_DECIMALS - decimals)
+    k_lat = np.round(np.asarray(lat, dtype=np.float64) * scale).astype(np.int64) * up
+    k_lon = np.round(np.asarray(lon, dtype=np.float64) * scale).astype(np.int64) * up
+    return ((k_lat + (1 << 24)) << 26) | (k_lon + (1 << 25))
+
+class _RankTable:
+    """
+    병합된 랭크 행(좌표 유효)의 열 배열 저장소.
+    - 문자열/원본값 컬럼: factorize 코드(int32) + 고유값 목록 → 같은 문자열은 한 번만 저장
+    - 숫자 컬럼: float64 (NaN = None), 등급: int8 코드
+    - 라운딩 키: 정렬된 int64 배열 + searchsorted (같은 키는 마지막 행이 이긴다 — 예전 dict 덮어쓰기와 같음)
+    payload dict는 조회에 걸린 행만 만든다.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        lat = _num_array(df, "lat")
+        lon = _num_array(df, "lon")
+        ok = ~(np.isnan(lat) | np.isnan(lon))
+        df = df[ok]
+        self.lat = lat[ok]
+        self.lon = lon[ok]
+        self.n = len(self.lat)
+
+        self.labels: Dict[str, Tuple[np.ndarray, list]] = {}
+        for field, col in _LABEL_FIELDS:
+            if col in df.columns:
+                codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+                self.labels[field] = (codes.astype(np.int32), uniques.tolist())
+            else:
+                self.labels[field] = (np.full(self.n, -1, dtype=np.int32), [])
+        self.nums = {f: _num_array(df, f) for f in _NUM_FIELDS}
+        self.grade_user = _grade_user_codes(self.nums["recommend_score"])
+        self.grade_admin = _grade_admin_codes(self.nums["priority"])
+
+        keys = _round_keys(self.lat, self.lon, _KEY_DECIMALS)
+        self.key_order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.key_order]
+        # 라운딩 키로 못 찾을 때의 근접 매칭용 (위치 = 행 위치)
+        self.index = GridIndex(self.lat, self.lon)
+        self.merge_stats = None
+        # mmap한 스냅샷 파일 경로 / 열 때의 파일 식별값 (CSV에서 직접 만든 테이블은 None)
+        self.snapshot = None
+        self.snapshot_id = None
+
+    @property
+    def nbytes(self) -> int:
+        total = self.lat.nbytes + self.lon.nbytes + self.keys.nbytes + self.key_order.nbytes + self.index.nbytes
+        total += self.grade_user.nbytes + self.grade_admin.nbytes + sum(v.nbytes for v in self.nums.values())
+        for codes, uniques in self.labels.values():
+            total += codes.nbytes
+            total += uniques.nbytes if hasattr(uniques, "nbytes") else sum(sys.getsizeof(u) for u in uniques)
+        return int(total)
+
+    def snapshot_state(self):
+        """
+        스냅샷 파일용 (배열들, meta). 고유값을 고정폭으로 못 바꾸는 컬럼(문자열/숫자 혼합)이 있으면 None.
+        - 문자열 고유값: StringTable (UTF-8 바이트 + 시작 위치)
+        - 숫자 고유값: int64 / float64 배열
+        """
+        arrays = {
+            "lat": self.lat, "lon": self.lon, "keys": self.keys, "key_order": self.key_order,
+            "grade_user": self.grade_user, "grade_admin": self.grade_admin,
+        }
+        arrays.update({f"num.{f}": v for f, v in self.nums.items()})
+        labels = {}
+        for field, (codes, uniques) in self.labels.items():
+            prefix = f"label.{field}"
+            kind = _uniques_kind(uniques)
+            if kind is None:
+                return None
+            labels[field] = kind
+            arrays[f"{prefix}.codes"] = codes
+            if kind == "str":
+                table = uniques if isinstance(uniques, StringTable) else StringTable.pack(uniques)
+                arrays.update(table.arrays(prefix))
+            else:
+                arrays[f"{prefix}.values"] = np.asarray(uniques, dtype=np.int64 if kind == "int" else np.float64)
+        index_arrays, index_scalars = self.index.state("index")
+        arrays.update(index_arrays)
+        return arrays, {"n": self.n, "labels": labels, "index": index_scalars, "merge_stats": self.merge_stats}
+
+    @classmethod
+    def from_snapshot(cls, arrays: Dict[str, np.ndarray], meta: dict) -> "_RankTable":
+        """
+        snapshot_state()로 쓴 파일의 배열(읽기 전용 mmap 뷰)로 테이블 복원. 계산/복사 없음.
+        """
+        table = cls.__new__(cls)
+        table.n = int(meta["n"])
+        for name in ("lat", "lon", "keys", "key_order", "grade_user", "grade_admin"):
+            setattr(table, name, arrays[name])
+        table.nums = {f: arrays[f"num.{f}"] for f in _NUM_FIELDS}
+        table.labels = {}
+        for field, kind in meta["labels"].items():
+            prefix = f"label.{field}"
+            uniques = StringTable.from_arrays(arrays, prefix) if kind == "str" else arrays[f"{prefix}.values"]
+            table.labels[field] = (arrays[f"{prefix}.codes"], uniques)
+        table.index = GridIndex.from_state(arrays, meta["index"], "index")
+        table.merge_stats = meta.get("merge_stats")
+        table.snapshot = None
+        table.snapshot_id = None
+        return table
+
+    def find_keys(self, keys: np.ndarray) -> np.ndarray:
+        """
+        라운딩 키 배열 → 행 위치 배열 (없으면 -1). 같은 키가 여럿이면 마지막 행.
+        """
+        if len(self.keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        i = np.maximum(np.searchsorted(self.keys, keys, side="right") - 1, 0)
+        return np.where(self.keys[i] == keys, self.key_order[i], -1)
+
+    def match(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        좌표 배열 → 매칭된 행 위치 배열 (없으면 -1). lookup_by_latlon과 같은 규칙:
+        1) 라운딩 키 5→4→3자리 (키는 5자리로 저장 → 4/3자리 키는 끝자리가 0인 좌표와 일치)
+        2) 못 찾은 좌표만 가장 가까운 행, MATCH_RADIUS_M 이내일 때만 (동률은 행 순서)
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        out = np.full(len(lats), -1, dtype=np.int64)
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        for d in (5, 4, 3):
+            todo = np.flatnonzero((out < 0) & valid)
+            if len(todo) == 0:
+                return out
+            out[todo] = self.find_keys(_round_keys(lats[todo], lons[todo], d))
+        todo = np.flatnonzero((out < 0) & valid)
+        if len(todo) and self.n:
+            pos, _ = self.index.nearest_within_batch(lats[todo], lons[todo], MATCH_RADIUS_M / 1000.0)
+            out[todo] = pos
+        return out
+
+    def payload(self, i: int) -> dict:
+        row = {"id": None}
+        for field, (codes, uniques) in self.labels.items():
+            c = codes[i]
+            v = uniques[c] if c >= 0 else None
+            # 스냅샷의 숫자 고유값은 numpy 스칼라 → 파이썬 값으로 (CSV에서 만든 테이블과 같은 payload)
+            row[field] = v.item() if isinstance(v, np.generic) else v
+        for f in _NUM_FIELDS:
+            v = self.nums[f][i]
+            row[f] = None if v != v else float(v)
+        row["latitude"] = float(self.lat[i])
+        row["longitude"] = float(self.lon[i])
+        row["grade_user"] = _GRADE_LABELS[self.grade_user[i]]
+        row["grade_admin"] = _GRADE_LABELS[self.grade_admin[i]]
+        return row
+
+def _uniques_kind(uniques) -> str | None:
+    # 고유값 목록 → 스냅샷 저장 방식 (str / int / float), 섞여 있으면 None
+    if isinstance(uniques, StringTable):
+        return "str"
+    if isinstance(uniques, np.ndarray):
+        return "int" if uniques.dtype.kind in "iu" else "float"
+    if all(isinstance(u, str) for u in uniques):
+        return "str"
+    if any(isinstance(u, (bool, np.bool_)) for u in uniques):
+        return None
+    if all(isinstance(u, (int, np.integer)) for u in uniques):
+        return "int"
+    if all(isinstance(u, (int, float, np.integer, np.floating)) for u in uniques):
+        return "float"
+    return None
+
+def _build_table():
+    before = (file_id(USER_ALL_CSV), file_id(ADMIN_ALL_CSV))
+    user_df  = _safe_read_csv(USER_ALL_CSV)
+    admin_df = _safe_read_csv(ADMIN_ALL_CSV)
+    # 복사/업로드 중인 파일로 만든 테이블(과 스냅샷)은 쓰지 않는다
+    if (file_id(USER_ALL_CSV), file_id(ADMIN_ALL_CSV)) != before:
+        raise RuntimeError("랭크 CSV가 읽는 동안 바뀜 (쓰는 중인 파일)")
+    merged = _merge_user_admin(user_df, admin_df)
+    print(f"[RANK] user_rows={0 if user_df is None else len(user_df)}, admin_rows={0 if admin_df is None else len(admin_df)}, merged={len(merged)}")
+    if not merged.empty:
+     print("[RANK] sample columns:", list(merged.columns)[:20])
+    if merged is None or merged.empty:
+        return None
+    table = _RankTable(merged)
+    table.merge_stats = merged.attrs.get("merge_stats")
+    print(f"[RANK] index built: rows={table.n} bytes={table.nbytes}")
+    return table
+
+# ----------------------------
+# 공유 스냅샷 (mmap)
+# ----------------------------
+# 스냅샷 형식/병합 규칙이 바뀌면 올린다 (이전 파일은 다시 만든다)
+_SNAPSHOT_VERSION = 2
+
+def _snapshot_path() -> str | None:
+    if RANK_SNAPSHOT in ("", "0"):
+        return None
+    if RANK_SNAPSHOT == "auto":
+        return os.path.join(os.path.dirname(os.path.abspath(USER_ALL_CSV)), CACHE_DIR_NAME, "shelters_rank.snap")
+    return RANK_SNAPSHOT
+
+def _snapshot_source() -> dict:
+    # 스냅샷이 어떤 입력으로 만들어졌는지: 둘 다 같으면 CSV를 다시 읽지 않는다
+    def digest(path):
+        return file_digest(path) if path and os.path.exists(path) else None
+    return {
+        "version": _SNAPSHOT_VERSION,
+        "user": digest(USER_ALL_CSV),
+        "admin": digest(ADMIN_ALL_CSV),
+        "merge_radius_m": MERGE_RADIUS_M,
+    }
+
+def _open_snapshot(path: str, source: dict | None = None):
+    """
+    스냅샷 파일 → mmap 테이블. 없거나 형식/버전이 다르거나, source가 주어졌는데 입력이 다르면 None.
+    """
+    current = file_id(path)
+    if current is None:
+        return None
+    try:
+        arrays, meta = open_snapshot(path)
+    except (OSError, ValueError) as e:
+        print(f"[RANK] snapshot unreadable: {path} ({e})")
+        return None
+    if meta.get("kind") != "shelter_rank" or meta.get("source", {}).get("version") != _SNAPSHOT_VERSION:
+        return None
+    if source is not None and meta["source"] != source:
+        return None
+    table = _RankTable.from_snapshot(arrays, meta)
+    table.snapshot = path
+    table.snapshot_id = current
+    return table
+
+def _write_snapshot(path: str, table, source: dict):
+    """
+    테이블을 스냅샷 파일로 쓰고, 그 파일을 mmap한 테이블을 반환 (이 워커도 공유 사본을 쓰도록).
+    쓸 수 없으면 직접 만든 테이블을 그대로 반환.
+    """
+    state = table.snapshot_state()
+    if state is None:
+        print("[RANK] snapshot skipped: mixed-type label column")
+        return table
+    arrays, meta = state
+    meta.update({"kind": "shelter_rank", "source": source})
+    try:
+        size = write_snapshot(path, arrays, meta)
+    except OSError as e:
+        print(f"[RANK] snapshot write failed: {path} ({e})")
+        return table
+    print(f"[RANK] snapshot written: {path} bytes={size}")
+    return _open_snapshot(path, source) or table
+
+def _load_table():
+    """
+    스냅샷이 현재 CSV(내용 해시)로 만든 것이면 mmap만 하고, 아니면 CSV에서 만들어 스냅샷을 쓴 뒤 연다.
+    """
+    path = _snapshot_path()
+    if path is None:
+        return _build_table()
+    source = _snapshot_source()
+    table = _open_snapshot(path, source)
+    if table is None:
+        with build_lock(path):
+            # 락을 기다리는 동안 다른 워커가 같은 입력으로 만들었으면 그 파일을 쓴다
+            table = _open_snapshot(path, source)
+            if table is None:
+                table = _build_table()
+                if table is not None:
+                    table = _write_snapshot(path, table, source)
+    if table is not None and table.snapshot:
+        print(f"[RANK] snapshot mapped: {path} rows={table.n}")
+    return table
+
+def _check_snapshot(table):
+    """
+    다른 워커가 스냅샷 파일을 교체했으면(reload) 새 파일을 열어 테이블을 바꾼다. SNAPSHOT_CHECK_S마다 stat 한 번.
+    """
+    global _TABLE, _SNAPSHOT_CHECKED
+    now = time.monotonic()
+    if now - _SNAPSHOT_CHECKED < SNAPSHOT_CHECK_S:
+        return table
+    _SNAPSHOT_CHECKED = now
+    if file_id(table.snapshot) in (None, table.snapshot_id):
+        return table
+    with _LOCK:
+        if _TABLE is not table:
+            return _TABLE
+        # 입력 해시는 다시 보지 않는다: 파일을 바꾼 워커가 현재 CSV로 만든 것
+        new = _open_snapshot(table.snapshot)
+        if new is None:
+            return table
+        _TABLE = new
+        print(f"[RANK] snapshot swapped: {table.snapshot} rows={new.n}")
+        return new
 
 def ensure_loaded():
-    global _LOADED
+    global _LOADED, _TABLE
     if _LOADED: 
         return
     with _LOCK:
         if _LOADED: 
             return
-        user_df  = _safe_read_csv(USER_ALL_CSV)
-        admin_df = _safe_read_csv(ADMIN_ALL_CSV)
-        merged = _merge_user_admin(user_df, admin_df)
-        print(f"[RANK] user_rows={0 if user_df is None else len(user_df)}, admin_rows={0 if admin_df is None else len(admin_df)}, merged={len(merged)}")
-        if not merged.empty:
-         print("[RANK] sample columns:", list(merged.columns)[:20])
-        if merged is None or merged.empty:
-            _LOADED = True
-            return
-        merged["grade_user"]  = merged["recommend_score"].apply(_grade_user)
-        merged["grade_admin"] = merged["priority"].apply(_grade_admin)
-        _build_index(merged)
+        _TABLE = _load_table()
         _LOADED = True
 
-def _haversine_m(lat1, lon1, lat2, lon2):
-    R = 6371000.0
-    from math import radians, sin, cos, asin, sqrt
-    dlat = radians(lat2-lat1)
-    dlon = radians(lon2-lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1))*cos(radians(lat2))*sin(dlon/2)**2
-    return 2*R*asin(sqrt(a))
+def reload(before_swap=None):
+    """
+    랭크 CSV를 다시 읽어 테이블을 교체한다 (CSV 갱신 후 호출). 교체된 테이블을 반환.
+    새 테이블을 락 없이 다 만든 뒤 한 번에 바꾸므로, 그동안의 조회는 이전 테이블을 쓰고 기다리지 않는다.
+    before_swap(table): 교체 직전에 새 테이블로 미리 만들어 둘 것이 있으면 (예: Shelter 조인)
+    만드는 중 오류(읽는 동안 CSV가 바뀜 등)면 이전 테이블을 그대로 두고 예외를 올린다.
+    """
+    global _LOADED, _TABLE
+    with _RELOAD_LOCK:
+        table = _load_table()
+        if before_swap is not None:
+            before_swap(table)
+        with _LOCK:
+            _TABLE = table
+            _LOADED = True
+    return table
+
+def get_table():
+    """
+    현재 랭크 테이블 (없으면 None). 테이블이 바뀌었는지는 객체 동일성으로 판단한다.
+    스냅샷을 쓰는 중이면 다른 워커의 교체도 여기서 반영된다.
+    """
+    ensure_loaded()
+    table = _TABLE
+    if table is not None and table.snapshot:
+        table = _check_snapshot(table)
+    return table
+
+def get_stats() -> dict:
+    """
+    랭크 테이블 현황: 행 수 / 메모리 / 병합 통계 / 공유 스냅샷 (CSV가 없으면 rows=0).
+    """
+    table = get_table()
+    if table is None:
+        return {"rows": 0, "bytes": 0, "merge": None, "snapshot": None}
+    snapshot = None
+    if table.snapshot:
+        # bytes는 mmap된 공유 페이지 (워커 수와 무관하게 물리 사본 하나)
+        snapshot = {"path": table.snapshot, "file_bytes": table.snapshot_id[2]}
+    return {"rows": table.n, "bytes": table.nbytes, "merge": table.merge_stats, "snapshot": snapshot}
 
 def lookup_by_latlon(lat: float, lon: float) -> dict | None:
-    ensure_loaded()
-    if not _IDX and not _ALL_ROWS:
+    table = get_table()
+    if table is None or table.n == 0:
         return None
 
     lat = float(lat); lon = float(lon)
-    # 1) 점진적 라운딩 키 조회: 5→4→3
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return None
+    # 1) 점진적 라운딩 키 조회: 5→4→3 (키는 5자리로 저장 → 4/3자리 키는 끝자리가 0인 좌표와 일치)
     for d in (5, 4, 3):
-        key = (round(lat, d), round(lon, d))
-        row = _IDX.get(key)
-        if row:
-            return row
-
-
-    # 2) 근접 탐색 (env로 조절되는 반경)
-    best = None; best_d = 1e18
-    for (lt, ln), r in zip(_ALL_LATLON, _ALL_ROWS):
-        d = _haversine_m(lat, lon, lt, ln)
-        if d < best_d:
-            best = r; best_d = d
-    if best is not None and best_d <= MATCH_RADIUS_M:
-        return best
+        i = int(table.find_keys(_round_keys(np.array([lat]), np.array([lon]), d))[0])
+        if i >= 0:
+            return table.payload(i)
+
+    # 2) 근접 탐색: 공간 인덱스로 반경(env로 조절) 안만 본다. 가장 가까운 행(동률은 행 순서)
+    pos, _ = table.index.radius(lat, lon, MATCH_RADIUS_M / 1000.0)
+    if len(pos):
+        return table.payload(int(pos[0]))
     return None
 
+def match_latlon_batch(lats, lons) -> np.ndarray:
+    """
+    lookup_by_latlon의 배열 버전: 좌표마다 매칭된 랭크 행 위치(없으면 -1).
+    위치는 호출 시점의 테이블 기준 — 행을 꺼낼 때도 같은 테이블(get_table())을 써야 한다.
+    """
+    table = get_table()
+    if table is None or table.n == 0:
+        return np.full(len(lats), -1, dtype=np.int64)
+    return table.match(lats, lons)
+
+def lookup_by_latlon_batch(lats, lons) -> list:
+    """
+    여러 좌표를 한 번에 매칭 → lookup_by_latlon과 같은 결과의 리스트 (dict 또는 None).
+    """
+    table = get_table()
+    if table is None or table.n == 0:
+        return [None] * len(lats)
+    return [table.payload(i) if i >= 0 else None for i in table.match(lats, lons).tolist()]
+
 
 def grade_user(score: float | None) -> str:
     return _grade_user(score)
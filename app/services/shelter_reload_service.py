@@ -0,0 +1,141 @@
+# app/services/shelter_reload_service.py
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services import shelter_csv_service as csv_service
+from app.services import shelter_rank_service as rank
+from app.services.shelter_rank_join_service import reload_rank_csv
+from app.utils.file_watch_util import FileWatcher
+
+# 데이터 파일 감시 간격(초, 0 = 감시 안 함) / 바뀐 뒤 이만큼 그대로여야 재적재 (쓰는 중인 파일 방지)
+WATCH_INTERVAL_S = float(os.getenv("SHELTER_DATA_WATCH_S", "5"))
+WATCH_SETTLE_S = float(os.getenv("SHELTER_DATA_WATCH_SETTLE_S", "2"))
+# 관리자 요청의 force 재적재는 target별로 이 간격(초) 안에 한 번만
+FORCE_MIN_INTERVAL_S = float(os.getenv("SHELTER_RELOAD_FORCE_MIN_INTERVAL_S", "60"))
+
+# csv: 사용자/관리자 CSV 스냅샷 (shelter_csv_service), rank: 병합 랭크 테이블 + Shelter 조인
+TARGETS = ("csv", "rank")
+
+_LOCKS = {t: threading.Lock() for t in TARGETS}
+_STATUS: Dict[str, Dict[str, Any]] = {t: {"state": "idle"} for t in TARGETS}
+_WATCHER: Optional[FileWatcher] = None
+# 관리자 요청 접수(상태 확인 + queued 표시)를 한 번에 / target별 마지막 force 접수 시각(monotonic)
+_ADMIT_LOCK = threading.Lock()
+_LAST_FORCED: Dict[str, float] = {}
+
+
+class ReloadRejected(Exception):
+    """
+    관리자 재적재 요청 거절: 이미 진행 중(409) / force 간격 제한(429)
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _csv_paths() -> List[str]:
+    return list(dict.fromkeys((csv_service.USER_CSV, csv_service.ADMIN_CSV)))
+
+
+def _reload_target(target: str, force: bool) -> Any:
+    if target == "csv":
+        return [csv_service.reload_snapshot(p, force) for p in _csv_paths()]
+    table = reload_rank_csv()
+    if table is None:
+        return {"rows": 0}
+    return {"rows": table.n, "snapshot": table.snapshot}
+
+
+def _run(target: str, force: bool, trigger: str) -> None:
+    """
+    target 재적재 한 번 (같은 target은 한 번에 하나). 결과/오류는 _STATUS에 남긴다.
+    실패해도 이전 데이터가 그대로 서비스된다.
+    """
+    with _LOCKS[target]:
+        started = time.time()
+        _STATUS[target] = {"state": "running", "trigger": trigger, "started_at": started}
+        try:
+            result = _reload_target(target, force)
+            status = {"state": "ok", "result": result}
+        except Exception as e:
+            print(f"[RELOAD] {target} failed: {e}")
+            status = {"state": "failed", "error": str(e)}
+        finished = time.time()
+        status.update(trigger=trigger, started_at=started, finished_at=finished, seconds=round(finished - started, 3))
+        _STATUS[target] = status
+
+
+def _admit(targets, force: bool) -> None:
+    """
+    관리자 요청 접수: 대상 중 하나라도 대기/진행 중이면 409, force가 FORCE_MIN_INTERVAL_S 안에 또 오면 429.
+    통과하면 대상을 queued로 표시한다 (같은 요청이 동시에 와도 하나만 통과).
+    """
+    with _ADMIT_LOCK:
+        busy = [t for t in targets if _STATUS[t]["state"] in ("queued", "running") or _LOCKS[t].locked()]
+        if busy:
+            raise ReloadRejected(f"reload already in progress: {', '.join(busy)}", 409)
+        now = time.monotonic()
+        if force:
+            wait_s = max((_LAST_FORCED.get(t, -FORCE_MIN_INTERVAL_S) + FORCE_MIN_INTERVAL_S - now for t in targets))
+            if wait_s > 0:
+                raise ReloadRejected(f"forced reload allowed once per {FORCE_MIN_INTERVAL_S:g}s", 429, int(wait_s) + 1)
+            for t in targets:
+                _LAST_FORCED[t] = now
+        for t in targets:
+            _STATUS[t] = {**_STATUS[t], "state": "queued"}
+
+
+def reload_datasets(
+    target: str = "all", force: bool = False, wait: bool = False, trigger: str = "admin", admit: bool = False
+) -> Dict[str, Any]:
+    """
+    데이터셋 재적재 요청. 새 스냅샷은 요청 경로 밖에서 끝까지 만든 뒤 한 번에 교체된다.
+    - target: all | csv | rank
+    - force: 파일이 그대로여도 다시 만든다 (csv)
+    - wait: False면 백그라운드 스레드로 돌리고 바로 현재 상태를 반환
+    - admit: 관리자 API 요청이면 True → 진행 중 / force 간격 제한을 검사 (ReloadRejected)
+      (업로드 / 파일 감시는 같은 target 락에서 차례를 기다린다)
+    """
+    targets = TARGETS if target == "all" else (target,)
+    if admit:
+        _admit(targets, force)
+    for t in targets:
+        if wait:
+            _run(t, force, trigger)
+        else:
+            threading.Thread(target=_run, args=(t, force, trigger), name=f"shelter-reload-{t}", daemon=True).start()
+    return get_reload_status()
+
+
+def get_reload_status() -> Dict[str, Any]:
+    """
+    target별 마지막 재적재 상태 (idle | queued | running | ok | failed) + 감시 설정.
+    """
+    return {
+        "targets": {t: dict(s) for t, s in _STATUS.items()},
+        "watch": {
+            "enabled": _WATCHER is not None,
+            "interval_s": WATCH_INTERVAL_S,
+            "settle_s": WATCH_SETTLE_S,
+        },
+        "force_min_interval_s": FORCE_MIN_INTERVAL_S,
+    }
+
+
+def start_shelter_data_watcher() -> None:
+    """
+    사용자/관리자 CSV, 랭크 CSV를 감시해 바뀌면(쓰기가 끝나 안정되면) 재적재. 앱 시작 시 한 번 호출.
+    """
+    global _WATCHER
+    if _WATCHER is not None or WATCH_INTERVAL_S <= 0:
+        return
+    watcher = FileWatcher(WATCH_INTERVAL_S, WATCH_SETTLE_S, name="shelter-data-watch")
+    watcher.watch(_csv_paths(), lambda: _run("csv", False, "watch"))
+    watcher.watch((rank.USER_ALL_CSV, rank.ADMIN_ALL_CSV), lambda: _run("rank", False, "watch"))
+    watcher.start()
+    _WATCHER = watcher
+    print(f"[RELOAD] watching shelter data every {WATCH_INTERVAL_S}s (settle {WATCH_SETTLE_S}s)")
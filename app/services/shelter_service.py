@@ -6,6 +6,8 @@ from datetime import datetime
 from dotenv import load_dotenv
 from sqlmodel import Session, select
 from app.db.session import db_engine
+from app.services.geo_index_service import invalidate_db_index
+from app.services.shelter_rank_join_service import refresh_shelter_rank_join
 from app.models.shelter_models import Shelter
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -68,4 +70,7 @@ def store_shelters(items: list):
 
 def fetch_and_store_shelters():
     items = fetch_shelters()
-    store_shelters(items)
\ No newline at end of file
+    store_shelters(items)
+    invalidate_db_index(Shelter)
+    # 새 행까지 포함해 Shelter.id → 랭크 행 매칭을 한 번에 다시 계산
+    refresh_shelter_rank_join()
\ No newline at end of file
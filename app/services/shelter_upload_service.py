@@ -0,0 +1,172 @@
+# app/services/shelter_upload_service.py
+import os
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services import shelter_csv_service as csv_service
+from app.services.shelter_csv_service import _LAT_CANDIDATES, _LON_CANDIDATES, _PRIORITY_CANDIDATES, _first_existing
+from app.services.shelter_reload_service import reload_datasets
+from app.utils.csv_cache_util import ENCODINGS, detect_encoding
+
+# 업로드 크기 상한(bytes): 100만 행 사용자 CSV가 약 256MB → 1.5배 여유 /
+# 검증 시 한 번에 읽는 행 수 (메모리는 이 청크 크기로 제한된다)
+UPLOAD_MAX_BYTES = int(os.getenv("SHELTER_UPLOAD_MAX_BYTES", str(384 << 20)))
+UPLOAD_CHUNK_ROWS = int(os.getenv("SHELTER_UPLOAD_CHUNK_ROWS", "100000"))
+# 잘못된 행 비율이 이보다 크면 거부 (좌표가 잘못된 행은 적재 시 빠지므로 조금은 허용)
+UPLOAD_MAX_BAD_RATIO = float(os.getenv("SHELTER_UPLOAD_MAX_BAD_RATIO", "0.01"))
+# 허용 좌표 범위: 위도 최소, 경도 최소, 위도 최대, 경도 최대 (기본: 국내 + 도서)
+UPLOAD_BBOX = tuple(float(v) for v in os.getenv("SHELTER_UPLOAD_BBOX", "32.5,124,39.5,132.5").split(","))
+# 보고서에 담을 잘못된 행 예시 수
+MAX_REPORTED_ROWS = 50
+
+# 데이터셋별 필수 점수 컬럼 후보
+_SCORE_CANDIDATES = {
+    "user": ("recommend_score",),
+    "admin": _PRIORITY_CANDIDATES,
+}
+# 병합 랭크 테이블(shelter_rank_service)은 lat/lon 컬럼만 읽는다
+_RANK_COORD_COLUMNS = ("lat", "lon")
+
+
+def upload_target(dataset: str) -> str:
+    """
+    데이터셋(user | admin) → 교체할 CSV 경로.
+    """
+    return csv_service.USER_CSV if dataset == "user" else csv_service.ADMIN_CSV
+
+
+def open_upload(dataset: str) -> Tuple[BinaryIO, str]:
+    """
+    교체할 CSV와 같은 디렉터리에 임시 파일을 연다 (다 받은 뒤 os.replace로 원자적으로 교체하기 위해).
+    파일 감시는 대상 경로만 보므로 받는 중인 임시 파일로는 재적재하지 않는다.
+    """
+    target = os.path.abspath(upload_target(dataset))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=".upload-", suffix=".csv", dir=os.path.dirname(target))
+    return os.fdopen(fd, "wb"), path
+
+
+def discard_upload(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _num(values: pd.Series) -> np.ndarray:
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _raw(v):
+    # 보고서용 원본 값 (빈 칸은 None — NaN은 JSON으로 못 보낸다)
+    return None if pd.isna(v) else v
+
+
+def validate_csv(path: str, dataset: str) -> Dict[str, Any]:
+    """
+    업로드된 CSV를 UPLOAD_CHUNK_ROWS 행씩 읽어 검증 (파일 전체를 메모리에 올리지 않는다).
+    - 인코딩: ENCODINGS 중 디코딩되는 것 (적재와 같은 규칙)
+    - 컬럼: 좌표 컬럼(적재와 같은 후보) + 데이터셋별 점수 컬럼이 있어야 한다
+    - 행: 좌표가 비었거나 숫자가 아니거나 UPLOAD_BBOX 밖이면, 점수 값이 숫자가 아니면 잘못된 행
+    반환 보고서의 ok가 False면 errors(치명적 오류) 또는 잘못된 행 비율 초과.
+    행 번호(row)는 헤더 다음 행을 1로 센 데이터 행 번호.
+    """
+    report: Dict[str, Any] = {
+        "ok": False, "dataset": dataset, "bytes": os.path.getsize(path), "encoding": None, "columns": [],
+        "rows": 0, "valid_rows": 0, "bad_rows": 0, "reasons": {}, "samples": [], "errors": [], "warnings": [],
+    }
+    encoding = detect_encoding(path)
+    if encoding is None:
+        report["errors"].append(f"unknown encoding (tried {', '.join(ENCODINGS)})")
+        return report
+    report["encoding"] = encoding
+    try:
+        columns = list(pd.read_csv(path, encoding=encoding, nrows=0).columns)
+    except ValueError as e:
+        report["errors"].append(f"invalid CSV header: {e}")
+        return report
+    report["columns"] = columns
+
+    lat_col = _first_existing(columns, _LAT_CANDIDATES)
+    lon_col = _first_existing(columns, _LON_CANDIDATES)
+    score_col = _first_existing(columns, _SCORE_CANDIDATES[dataset])
+    if lat_col is None or lon_col is None:
+        report["errors"].append(f"missing coordinate columns (one of {_LAT_CANDIDATES} and one of {_LON_CANDIDATES})")
+    if score_col is None:
+        report["errors"].append(f"missing score column (one of {_SCORE_CANDIDATES[dataset]})")
+    if report["errors"]:
+        return report
+    if (lat_col, lon_col) != _RANK_COORD_COLUMNS:
+        report["warnings"].append(f"rank table reads only lat/lon columns (found {lat_col}/{lon_col})")
+
+    lat_min, lon_min, lat_max, lon_max = UPLOAD_BBOX
+    reasons: Dict[str, int] = {}
+    samples: List[Dict[str, Any]] = []
+    offset = 0
+    try:
+        reader = pd.read_csv(
+            path, encoding=encoding, usecols=[lat_col, lon_col, score_col], dtype=str, chunksize=UPLOAD_CHUNK_ROWS
+        )
+        for chunk in reader:
+            n = len(chunk)
+            lat_raw, lon_raw, score_raw = chunk[lat_col], chunk[lon_col], chunk[score_col]
+            lat, lon, score = _num(lat_raw), _num(lon_raw), _num(score_raw)
+            missing = lat_raw.isna().to_numpy() | lon_raw.isna().to_numpy()
+            # 행마다 첫 번째로 걸린 사유 하나만 센다
+            checks = (
+                ("missing coordinate", missing),
+                ("non-numeric coordinate", ~missing & (np.isnan(lat) | np.isnan(lon) | np.isinf(lat) | np.isinf(lon))),
+                ("coordinate out of range", ~((lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))),
+                (f"non-numeric {score_col}", score_raw.notna().to_numpy() & np.isnan(score)),
+            )
+            bad = np.zeros(n, dtype=bool)
+            for reason, mask in checks:
+                hit = mask & ~bad
+                count = int(hit.sum())
+                if count:
+                    reasons[reason] = reasons.get(reason, 0) + count
+                    for i in np.flatnonzero(hit)[: max(MAX_REPORTED_ROWS - len(samples), 0)].tolist():
+                        samples.append({
+                            "row": offset + i + 1, "reason": reason,
+                            "lat": _raw(lat_raw.iat[i]), "lon": _raw(lon_raw.iat[i]), "score": _raw(score_raw.iat[i]),
+                        })
+                bad |= mask
+            report["bad_rows"] += int(bad.sum())
+            offset += n
+    except ValueError as e:  # ParserError / UnicodeDecodeError 포함
+        report["errors"].append(f"invalid CSV after data row {offset}: {e}")
+    report["rows"] = offset
+    report["valid_rows"] = offset - report["bad_rows"]
+    report["reasons"] = reasons
+    report["samples"] = sorted(samples, key=lambda s: s["row"])[:MAX_REPORTED_ROWS]
+
+    if report["errors"]:
+        return report
+    if report["valid_rows"] == 0:
+        report["errors"].append("no valid rows")
+    elif report["bad_rows"] > UPLOAD_MAX_BAD_RATIO * report["rows"]:
+        report["errors"].append(
+            f"too many bad rows: {report['bad_rows']} / {report['rows']} (max ratio {UPLOAD_MAX_BAD_RATIO})"
+        )
+    report["ok"] = not report["errors"]
+    return report
+
+
+def install_upload(path: str, dataset: str) -> Dict[str, Any]:
+    """
+    검증된 임시 파일을 대상 CSV로 원자적으로 교체하고, 새 스냅샷을 백그라운드에서 만들게 한다.
+    반환: 재적재 상태 (GET /shelters/csv/admin/reload와 같은 형식).
+    """
+    target = upload_target(dataset)
+    # mkstemp는 0600으로 만든다 → 기존 파일 권한을 따른다
+    if os.path.exists(target):
+        shutil.copymode(target, path)
+    else:
+        os.chmod(path, 0o644)
+    os.replace(path, target)
+    print(f"[UPLOAD] {dataset} CSV replaced: {target}")
+    return reload_datasets("all", trigger=f"upload:{dataset}")
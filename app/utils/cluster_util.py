@@ -0,0 +1,142 @@
+# app/utils/cluster_util.py
+from math import pi
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 웹 메르카토르 유효 위도 범위
+MAX_MERCATOR_LAT = 85.05112878
+# 타일 한 변을 2^CELL_BITS 칸으로 나눠 칸 단위로 묶는다 (256px 타일 기준 16px 칸)
+CELL_BITS = 4
+# 등급 없음(-1)을 최솟값 집계에서 빼기 위한 값
+_NO_GRADE = np.int8(127)
+
+
+def _part1by1(v: np.ndarray) -> np.ndarray:
+    """
+    하위 32비트의 각 비트 사이에 0을 끼워 넣는다 (Morton 코드용).
+    """
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+
+def morton(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    (x, y) 정수 격자 좌표 → Z-order(Morton) 코드. 같은 쿼드트리 노드의 점은 코드가 연속 구간이 된다.
+    """
+    return (_part1by1(x) << np.uint64(1)) | _part1by1(y)
+
+
+def mercator_xy(lats, lons):
+    """
+    위경도 → 웹 메르카토르 정규 좌표 (x, y ∈ [0, 1), 타일 좌표계와 같은 방향: y는 북→남)
+    """
+    lat = np.clip(np.asarray(lats, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    lon = np.asarray(lons, dtype=np.float64)
+    x = (lon + 180.0) / 360.0
+    s = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1.0 + s) / (1.0 - s)) / (4.0 * pi)
+    return x, y
+
+
+class ClusterIndex:
+    """
+    줌 레벨별 마커 클러스터 계층 (supercluster와 같은 용도, 데이터셋 버전마다 1회 생성 후 읽기 전용).
+
+    - 점을 최대 줌의 칸(타일당 2^CELL_BITS x 2^CELL_BITS) Morton 코드 순으로 정렬해 두면
+      어느 줌의 칸이든, 어느 타일이든 정렬 배열의 연속 구간이 된다.
+    - 레벨마다 칸의 시작 위치(starts)와 최고 등급(best)만 저장하고,
+      개수/중심점은 누적합 차이로 바로 계산한다 → 레벨당 칸 1개에 5바이트.
+    - 반경 기반 병합 대신 격자 칸 병합이므로 칸 경계에 걸친 점들은 서로 다른 클러스터가 될 수 있다.
+    - 반환 위치(pos)는 생성 시 넘긴 배열의 위치(0..n-1)이다.
+    """
+
+    def __init__(self, lats, lons, grades: Optional[np.ndarray] = None, max_zoom: int = 16):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self.n = len(lats)
+        self.max_zoom = int(max_zoom)
+        self.bits = self.max_zoom + CELL_BITS
+
+        res = 1 << self.bits
+        x, y = mercator_xy(lats, lons)
+        cx = np.clip((x * res).astype(np.int64), 0, res - 1)
+        cy = np.clip((y * res).astype(np.int64), 0, res - 1)
+        codes = morton(cx, cy)
+
+        self.order = np.argsort(codes, kind="stable")
+        self.codes = codes[self.order]
+        # 중심점(평균 위경도)은 구간 합 / 개수 → 누적합(앞에 0). 누적 오차를 줄이려고 평균을 빼고 더한다.
+        self._lat_ref = float(lats.mean()) if self.n else 0.0
+        self._lon_ref = float(lons.mean()) if self.n else 0.0
+        self._lat_cum = np.concatenate(([0.0], np.cumsum(lats[self.order] - self._lat_ref)))
+        self._lon_cum = np.concatenate(([0.0], np.cumsum(lons[self.order] - self._lon_ref)))
+
+        if grades is None:
+            self.has_grades = False
+            g = np.full(self.n, _NO_GRADE, dtype=np.int8)
+        else:
+            self.has_grades = True
+            g = np.asarray(grades, dtype=np.int8)[self.order].copy()
+            g[g < 0] = _NO_GRADE
+
+        # 최대 줌부터 위로: 위 레벨의 칸 시작은 아래 레벨 칸 시작의 부분집합
+        self.starts: List[np.ndarray] = [np.empty(0, dtype=np.int32)] * (self.max_zoom + 1)
+        self.best: List[np.ndarray] = [np.empty(0, dtype=np.int8)] * (self.max_zoom + 1)
+        if self.n == 0:
+            return
+        starts = np.flatnonzero(np.concatenate(([True], self.codes[1:] != self.codes[:-1])))
+        best = np.minimum.reduceat(g, starts)
+        for z in range(self.max_zoom, -1, -1):
+            self.starts[z] = starts.astype(np.int32)
+            self.best[z] = best
+            if z == 0:
+                break
+            cell = self.codes[starts] >> np.uint64(2 * (self.max_zoom - z + 1))
+            keep = np.flatnonzero(np.concatenate(([True], cell[1:] != cell[:-1])))
+            starts = starts[keep]
+            best = np.minimum.reduceat(best, keep)
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.order.nbytes + self.codes.nbytes + self._lat_cum.nbytes + self._lon_cum.nbytes
+            + sum(s.nbytes for s in self.starts) + sum(b.nbytes for b in self.best)
+        )
+
+    def cluster_count(self, z: int) -> int:
+        return len(self.starts[z])
+
+    def tile(self, z: int, x: int, y: int) -> Dict[str, Any]:
+        """
+        타일 (z, x, y) 안의 클러스터들을 열 배열로 반환 (Morton 순서 → 같은 타일은 항상 같은 순서).
+        - count / latitude / longitude(멤버 평균) / best(최고 등급 코드, 없으면 -1)
+        - pos: 멤버가 1개인 클러스터는 그 점의 위치, 아니면 -1
+        z는 0..max_zoom (더 깊은 줌은 클러스터 없이 개별 점 조회를 쓴다).
+        """
+        if not 0 <= z <= self.max_zoom:
+            raise ValueError(f"zoom must be in 0..{self.max_zoom}")
+        span_shift = np.uint64(2 * (self.max_zoom - z + CELL_BITS))
+        tile_code = morton(np.array([x]), np.array([y]))[0]
+        a = int(np.searchsorted(self.codes, tile_code << span_shift, side="left"))
+        b = int(np.searchsorted(self.codes, (tile_code + np.uint64(1)) << span_shift, side="left"))
+
+        starts = self.starts[z]
+        i0 = int(np.searchsorted(starts, a, side="left"))
+        i1 = int(np.searchsorted(starts, b, side="left"))
+        s = starts[i0:i1].astype(np.int64)
+        e = np.append(s[1:], b).astype(np.int64)[:len(s)]
+        count = e - s
+        best = self.best[z][i0:i1]
+        return {
+            "count": count,
+            "latitude": self._lat_ref + (self._lat_cum[e] - self._lat_cum[s]) / np.maximum(count, 1),
+            "longitude": self._lon_ref + (self._lon_cum[e] - self._lon_cum[s]) / np.maximum(count, 1),
+            "best": np.where(best == _NO_GRADE, -1, best).astype(np.int8),
+            "pos": np.where(count == 1, self.order[s], -1),
+        }
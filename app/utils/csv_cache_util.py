@@ -0,0 +1,165 @@
+# app/utils/csv_cache_util.py
+import codecs
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 시도할 인코딩 (앞쪽 우선). euc-kr은 cp949의 부분집합이라 cp949가 실패하면 사실상 같이 실패한다.
+ENCODINGS = ("utf-8", "utf-8-sig", "cp949", "euc-kr")
+# CSV 옆에 열 캐시를 만들지 (0이면 매번 CSV를 파싱)
+CACHE_ENABLED = os.getenv("CSV_COLUMN_CACHE", "1") == "1"
+# 캐시 디렉터리 이름: <CSV 디렉터리>/.csvcache/<CSV 파일명>/<내용 해시>/
+CACHE_DIR_NAME = ".csvcache"
+# 포맷이 바뀌면 올린다 (이전 버전 캐시는 무시하고 다시 만든다)
+CACHE_VERSION = 1
+
+_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """
+    파일 내용 해시 (sha256 hex) — 캐시 키. 파싱 없이 바이트만 훑는다.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def detect_encoding(path: str) -> Optional[str]:
+    """
+    ENCODINGS 중 파일 전체가 디코딩되는 첫 번째 인코딩 (없으면 None).
+    pd.read_csv를 인코딩마다 통째로 다시 돌리지 않고, 증분 디코더로 바이트만 검사한다.
+    맞지 않는 인코딩은 보통 첫 한글에서 바로 실패하므로 파일 전체를 읽는 건 사실상 한 번.
+    """
+    for enc in ENCODINGS:
+        decoder = codecs.getincrementaldecoder(enc)()
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(_CHUNK)
+                    decoder.decode(chunk, not chunk)
+                    if not chunk:
+                        return enc
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _cache_root(path: str) -> str:
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), CACHE_DIR_NAME, os.path.basename(path))
+
+
+def _encode_columns(df: pd.DataFrame) -> Optional[Tuple[Dict[str, np.ndarray], list]]:
+    """
+    DataFrame → (.npy로 쓸 배열들, 열 메타). 저장할 수 없는 열이 있으면 None.
+    - 숫자/불리언 열: 그대로
+    - 문자열 열: factorize 코드(int32, 결측 -1) + 고유값 목록(메타에 JSON으로)
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    columns = []
+    for i, name in enumerate(df.columns):
+        s = df[name]
+        if not isinstance(name, str):
+            return None
+        key = f"c{i}"
+        if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biuf":
+            arrays[key] = s.to_numpy()
+            columns.append({"name": name, "dtype": str(s.dtype), "kind": "num", "file": key})
+            continue
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+        uniques = list(uniques)
+        if not all(isinstance(u, str) for u in uniques):
+            return None
+        arrays[key] = codes.astype(np.int32, copy=False)
+        columns.append({"name": name, "dtype": str(s.dtype), "kind": "str", "file": key, "uniques": uniques})
+    return arrays, columns
+
+
+def _write_cache(cache_dir: str, df: pd.DataFrame, encoding: str) -> bool:
+    encoded = _encode_columns(df)
+    if encoded is None:
+        return False
+    arrays, columns = encoded
+    parent = os.path.dirname(cache_dir)
+    os.makedirs(parent, exist_ok=True)
+    # 임시 디렉터리에 다 쓴 뒤 이름만 바꾼다 → 다른 프로세스가 반쯤 쓴 캐시를 읽지 않는다
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        for key, arr in arrays.items():
+            np.save(os.path.join(tmp, key + ".npy"), arr, allow_pickle=False)
+        meta = {"version": CACHE_VERSION, "encoding": encoding, "rows": len(df), "columns": columns}
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, cache_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(cache_dir):
+            raise
+    # 이전 내용의 캐시는 지운다 (CSV당 하나만 유지, 다른 프로세스가 쓰는 중인 임시 디렉터리는 두고)
+    for name in os.listdir(parent):
+        if name != os.path.basename(cache_dir) and not name.startswith(".tmp-"):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+    return True
+
+
+def _read_cache(cache_dir: str) -> Optional[pd.DataFrame]:
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    data = {}
+    for col in meta["columns"]:
+        # 숫자 열은 memmap 위의 ndarray 뷰 (읽기 전용, 필요한 페이지만 올라온다)
+        arr = np.load(os.path.join(cache_dir, col["file"] + ".npy"), mmap_mode="r", allow_pickle=False).view(np.ndarray)
+        if col["kind"] == "num":
+            data[col["name"]] = pd.Series(arr, dtype=col["dtype"], copy=False)
+        else:
+            uniques = np.asarray(col["uniques"] + [np.nan], dtype=object)
+            data[col["name"]] = pd.Series(uniques[arr], dtype=col["dtype"])
+    df = pd.DataFrame(data, copy=False)
+    if len(df) != meta["rows"]:
+        return None
+    return df
+
+
+def read_csv_cached(path: str) -> pd.DataFrame:
+    """
+    pd.read_csv(path)와 같은 DataFrame을 열 캐시를 거쳐 반환.
+    - 내용 해시가 같은 캐시가 있으면 .npy 열을 memmap으로 읽어 만든다 (인코딩 판별/CSV 파싱 없음)
+    - 없으면 인코딩을 한 번 판별해 한 번만 파싱하고 캐시를 써 둔다 (쓰기 실패는 무시)
+    디코딩되는 인코딩이 없으면 ValueError, 파일/파싱 오류는 그대로 올린다.
+    """
+    cache_dir = None
+    if CACHE_ENABLED:
+        cache_dir = os.path.join(_cache_root(path), file_digest(path))
+        df = _read_cache(cache_dir) if os.path.isdir(cache_dir) else None
+        if df is not None:
+            return df
+
+    encoding = detect_encoding(path)
+    if encoding is None:
+        raise ValueError(f"unknown encoding (tried {', '.join(ENCODINGS)}): {path}")
+    df = pd.read_csv(path, encoding=encoding)
+    if cache_dir is None:
+        return df
+    try:
+        if _write_cache(cache_dir, df, encoding):
+            print(f"[CSV-CACHE] written: {cache_dir} rows={len(df)} encoding={encoding}")
+    except OSError as e:
+        print(f"[CSV-CACHE] write failed: {path} ({e})")
+    return df
@@ -0,0 +1,94 @@
+# app/utils/file_watch_util.py
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+FileId = Optional[Tuple[int, int, int]]
+
+
+def file_id(path: str) -> FileId:
+    """
+    (inode, mtime_ns, size) — 내용이 바뀌었는지 싸게 비교하는 용도. 파일이 없으면 None.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class FileWatcher:
+    """
+    파일 변경 폴링 감시 (데몬 스레드 하나, interval_s마다 stat).
+
+    - 파일 식별값(file_id)이 바뀐 뒤 settle_s 동안 더 바뀌지 않아야 콜백을 부른다
+      → 복사/업로드 중인 반쯤 쓴 파일로는 다시 적재하지 않는다.
+    - 콜백은 감시 스레드에서 차례로 실행된다 (예외는 로그만 남기고 계속 감시).
+    - 같은 콜백에 여러 경로를 묶을 수 있다 (예: USER/ADMIN 랭크 CSV → 재적재 한 번).
+    """
+
+    def __init__(self, interval_s: float = 5.0, settle_s: float = 2.0, name: str = "file-watcher"):
+        self.interval_s = interval_s
+        self.settle_s = settle_s
+        self.name = name
+        self._groups: List[Tuple[Tuple[str, ...], Callable[[], None]]] = []
+        self._seen: Dict[str, FileId] = {}
+        self._pending: Dict[str, Tuple[FileId, float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, paths, callback: Callable[[], None]) -> None:
+        """
+        paths 중 하나라도 바뀌어 안정되면 callback() (현재 상태를 기준으로 삼는다).
+        """
+        paths = tuple(paths)
+        for p in paths:
+            self._seen[p] = file_id(p)
+        self._groups.append((paths, callback))
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval_s <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def poll(self) -> None:
+        """
+        한 번 검사: 안정된 변경이 있는 묶음의 콜백을 부른다 (테스트/수동 호출용으로도 쓴다).
+        """
+        now = time.monotonic()
+        for paths, callback in self._groups:
+            settled = unsettled = False
+            for p in paths:
+                cur = file_id(p)
+                if cur == self._seen.get(p):
+                    self._pending.pop(p, None)
+                    continue
+                pending = self._pending.get(p)
+                if pending is None or pending[0] != cur:
+                    # 바뀐 걸 처음 봤거나 아직 쓰는 중 → 안정될 때까지 기다린다
+                    self._pending[p] = (cur, now)
+                    unsettled = True
+                elif now - pending[1] >= self.settle_s:
+                    settled = True
+                else:
+                    unsettled = True
+            # 묶음 안에 아직 쓰는 중인 파일이 있으면 함께 기다린다
+            if not settled or unsettled:
+                continue
+            for p in paths:
+                pending = self._pending.pop(p, None)
+                if pending is not None:
+                    self._seen[p] = pending[0]
+            try:
+                callback()
+            except Exception as e:
+                print(f"[WATCH] {self.name} callback failed: {paths} ({e})")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.poll()
@@ -0,0 +1,62 @@
+# app/utils/filter_util.py
+import re
+from typing import NamedTuple, Optional, Tuple
+
+# 절 구분자 / 값 구분자
+CLAUSE_SEP = ";"
+VALUE_SEP = ","
+# 값 목록(OR)을 받는 연산자 / 숫자 1개와 비교하는 연산자
+LIST_OPS = ("=", "!=")
+RANGE_OPS = (">=", "<=", ">", "<")
+# API 문서용 설명 (filter 쿼리 파라미터)
+FILTER_HELP = (
+    "필터 (절은 ';'로 AND, '='/'!='는 ','로 여러 값). "
+    "예) shelter_type_code=1,3; capacity_est>=500; recommend_grade=A,B; SIGUNGU=정읍시; p_elderly>=0.3"
+)
+
+# 필드 이름 + 연산자(두 글자 연산자를 먼저) + 값
+_CLAUSE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(!=|>=|<=|=|>|<)\s*(.*?)\s*$")
+
+
+class FilterClause(NamedTuple):
+    field: str                # 소문자 필드 이름
+    op: str                   # = != >= <= > <
+    values: Tuple[str, ...]   # = / != 는 정렬된 값 목록, 비교 연산자는 값 1개
+
+
+def parse_filter(expr: Optional[str]) -> Tuple[FilterClause, ...]:
+    """
+    "필드 연산자 값; 필드 연산자 값; ..." 형식의 필터 → 절 목록 (절끼리는 AND).
+    - = / != : 쉼표로 값 여러 개 (= 는 그중 하나, != 는 모두 아님)
+    - >= <= > < : 숫자 값 1개
+    예) "shelter_type_code=1,3; capacity_est>=500; recommend_grade=A,B; SIGUNGU=정읍시"
+    필드 이름은 대소문자 구분 없음. 절/값을 정렬해 두므로 같은 뜻의 필터는 같은 결과(캐시 키로 사용).
+    문법 오류는 ValueError.
+    """
+    clauses = []
+    for part in (expr or "").split(CLAUSE_SEP):
+        if not part.strip():
+            continue
+        m = _CLAUSE.match(part)
+        if m is None:
+            raise ValueError(f"invalid filter clause: {part.strip()!r}")
+        field, op, raw = m.group(1).lower(), m.group(2), m.group(3)
+        if op in LIST_OPS:
+            values = tuple(sorted({v.strip() for v in raw.split(VALUE_SEP) if v.strip()}))
+        else:
+            values = (raw,)
+            try:
+                float(raw)
+            except ValueError:
+                raise ValueError(f"filter {field}{op} needs a number: {raw!r}")
+        if not values:
+            raise ValueError(f"filter {field}{op} has no value")
+        clauses.append(FilterClause(field, op, values))
+    return tuple(sorted(set(clauses)))
+
+
+def format_filter(clauses: Tuple[FilterClause, ...]) -> str:
+    """
+    절 목록 → 정규화된 필터 문자열 (parse_filter의 역변환).
+    """
+    return CLAUSE_SEP.join(f"{c.field}{c.op}{VALUE_SEP.join(c.values)}" for c in clauses)
@@ -0,0 +1,151 @@
+# app/utils/geo_util.py
+from math import asin, atan2, cos, degrees, radians, sin, sqrt
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = EARTH_RADIUS_KM * np.pi / 180.0
+
+# 등장방형(equirectangular) 근사를 써도 되는 최대 거리(km).
+# 하버사인 대비 상대오차(실측): 위도 33~39도에서 50km 이내 < 2.5e-6, 100km 이내 < 1e-5 (100km에서 1m 미만),
+# 위도 60도에서도 100km 이내 < 4e-5. 이 범위를 넘으면 haversine을 쓴다.
+EQUIRECT_MAX_RANGE_KM = 100.0
+
+
+# ----------------------------
+# 스칼라
+# ----------------------------
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    두 점(도) 사이 하버사인 거리(km).
+    """
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2.0) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * asin(sqrt(min(a, 1.0)))
+
+
+def equirect_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    등장방형 근사 거리(km). 삼각함수 1번이라 빠르며 EQUIRECT_MAX_RANGE_KM 이내에서만 사용.
+    """
+    x = radians(lon2 - lon1) * cos(radians((lat1 + lat2) * 0.5))
+    y = radians(lat2 - lat1)
+    return EARTH_RADIUS_KM * sqrt(x * x + y * y)
+
+
+def bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    점1 → 점2 초기 방위각(도, 북=0, 시계방향, 0~360).
+    """
+    p1 = radians(lat1); p2 = radians(lat2)
+    dl = radians(lon2 - lon1)
+    x = sin(dl) * cos(p2)
+    y = cos(p1) * sin(p2) - sin(p1) * cos(p2) * cos(dl)
+    return (degrees(atan2(x, y)) + 360.0) % 360.0
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    기준점에서 반경 radius_km 안의 모든 점을 포함하는 위경도 사각형 (min_lat, min_lon, max_lat, max_lon).
+    경도 폭은 사각형 안 최대 위도 기준으로 계산하므로 하버사인 반경을 항상 포함한다.
+    """
+    dlat = radius_km / KM_PER_DEG_LAT
+    min_lat = max(lat - dlat, -90.0)
+    max_lat = min(lat + dlat, 90.0)
+    cos_m = cos(radians(max(abs(min_lat), abs(max_lat))))
+    s = sin(radius_km / (2.0 * EARTH_RADIUS_KM))
+    if cos_m <= 0 or s >= cos_m:
+        return min_lat, -180.0, max_lat, 180.0
+    dlon = 2.0 * degrees(asin(s / cos_m))
+    return min_lat, lon - dlon, max_lat, lon + dlon
+
+
+# ----------------------------
+# 배열(NumPy)
+# ----------------------------
+def prepare_latlon(lats, lons) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    위경도(도) 배열을 거리 계산용 연속 float64 배열로 변환.
+    반환: (lat_rad, lon_rad, cos_lat) — 데이터셋 로드 시 1회만 계산해 두고 재사용.
+    """
+    lat_rad = np.radians(np.ascontiguousarray(lats, dtype=np.float64))
+    lon_rad = np.radians(np.ascontiguousarray(lons, dtype=np.float64))
+    return lat_rad, lon_rad, np.cos(lat_rad)
+
+
+def haversine_km_prepared(
+    lat: float, lon: float, lat_rad: np.ndarray, lon_rad: np.ndarray, cos_lat: np.ndarray
+) -> np.ndarray:
+    """
+    기준점(lat, lon: 도) → prepare_latlon 결과 배열 전체의 하버사인 거리(km).
+    """
+    lat0 = np.radians(lat)
+    lon0 = np.radians(lon)
+    a = np.sin((lat_rad - lat0) * 0.5) ** 2 + np.cos(lat0) * cos_lat * np.sin((lon_rad - lon0) * 0.5) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def haversine_km_np(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    기준점 → 위경도(도) 배열의 하버사인 거리(km). 준비 배열이 없을 때 쓰는 편의 함수.
+    """
+    return haversine_km_prepared(lat, lon, *prepare_latlon(lats, lons))
+
+
+def equirect_km_prepared(lat: float, lon: float, lat_rad: np.ndarray, lon_rad: np.ndarray) -> np.ndarray:
+    """
+    기준점 → 배열 전체의 등장방형 근사 거리(km). 근거리(EQUIRECT_MAX_RANGE_KM 이내) 전용.
+    """
+    lat0 = np.radians(lat)
+    x = (lon_rad - np.radians(lon)) * np.cos((lat_rad + lat0) * 0.5)
+    y = lat_rad - lat0
+    return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+
+def bearing_deg_np(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    기준점 → 위경도(도) 배열 각 점으로의 초기 방위각(도, 0~360).
+    """
+    p1 = np.radians(lat)
+    p2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dl = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    x = np.sin(dl) * np.cos(p2)
+    y = np.cos(p1) * np.sin(p2) - np.sin(p1) * np.cos(p2) * np.cos(dl)
+    return (np.degrees(np.arctan2(x, y)) + 360.0) % 360.0
+
+
+def top_k_smallest(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    values에서 가장 작은 k개의 위치를 오름차순으로 반환. 결과는 (값, 위치) 순 전체 정렬의 앞 k개와 같다.
+    전체 정렬 대신 argpartition으로 k개만 고른 뒤 그 k개만 정렬한다.
+    argpartition은 k번째 값과 같은 값(경계 동률)이 여럿이면 그중 아무것이나 고르므로,
+    그런 경우에만 경계값 행을 위치가 작은 것부터 다시 채운다 (knn / knn_batch의 (거리, 위치) 순과 같은 규칙).
+    NaN은 가장 큰 값으로 취급한다.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if k is None or k >= n:
+        idx = np.arange(n)
+    elif k <= 0:
+        return np.empty(0, dtype=np.int64)
+    else:
+        idx = np.argpartition(values, k - 1)[:k]
+        kth = values[idx].max()
+        tie = np.isnan(values) if kth != kth else values == kth
+        if np.count_nonzero(tie) > np.count_nonzero(tie[idx]):
+            keep = idx[~tie[idx]]
+            idx = np.concatenate([keep, np.flatnonzero(tie)[:k - len(keep)]])
+    order = np.lexsort((idx, values[idx]))
+    return idx[order]
+
+
+def nearest_k(lat: float, lon: float, lats, lons, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    기준점에서 가장 가까운 k개 (위치 배열, 거리 km 배열)을 가까운 순으로 반환.
+    """
+    dist = haversine_km_np(lat, lon, lats, lons)
+    idx = top_k_smallest(dist, k)
+    return idx, dist[idx]
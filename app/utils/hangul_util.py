@@ -0,0 +1,87 @@
+# app/utils/hangul_util.py
+from typing import List
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_COUNT = 11172  # 가 ~ 힣
+_JUNG_COUNT = 21
+_JONG_COUNT = 28
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = (
+    "", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+    "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+)
+
+# 호환 자모 중 자음(ㄱ~ㅎ, 겹자음 포함): 초성 검색어 판별용
+_CONSONANT_SET = frozenset(chr(c) for c in range(0x3131, 0x314F))
+# 호환 자모 전체(자음+모음)
+_JAMO_SET = frozenset(chr(c) for c in range(0x3131, 0x3164))
+
+
+def _build_tables():
+    cho, jamo = {}, {}
+    for i in range(_HANGUL_COUNT):
+        c, rest = divmod(i, _JUNG_COUNT * _JONG_COUNT)
+        jung, jong = divmod(rest, _JONG_COUNT)
+        cho[_HANGUL_BASE + i] = CHOSEONG[c]
+        jamo[_HANGUL_BASE + i] = CHOSEONG[c] + JUNGSEONG[jung] + JONGSEONG[jong]
+    return cho, jamo
+
+
+# 음절 → 초성 / 자모 문자열 str.translate 표 (문자 단위 파이썬 루프 없이 변환)
+_CHOSEONG_TABLE, _JAMO_TABLE = _build_tables()
+
+
+def _syllable_index(ch: str) -> int:
+    code = ord(ch) - _HANGUL_BASE
+    return code if 0 <= code < _HANGUL_COUNT else -1
+
+
+def to_choseong(text: str) -> str:
+    """
+    한글 음절을 초성으로 바꾼 문자열. 한글이 아닌 문자는 그대로 둔다.
+    예) "은선경로당" → "ㅇㅅㄱㄹㄷ"
+    """
+    return (text or "").translate(_CHOSEONG_TABLE)
+
+
+def decompose_str(text: str) -> str:
+    """
+    decompose의 문자열 버전. 예) "경로" → "ㄱㅕㅇㄹㅗ"
+    """
+    return (text or "").translate(_JAMO_TABLE)
+
+
+def decompose(text: str) -> List[str]:
+    """
+    한글 음절을 초성/중성/종성 자모로 분해한 리스트. 한글이 아닌 문자는 그대로 둔다.
+    """
+    out: List[str] = []
+    for ch in text or "":
+        i = _syllable_index(ch)
+        if i < 0:
+            out.append(ch)
+            continue
+        cho, rest = divmod(i, _JUNG_COUNT * _JONG_COUNT)
+        jung, jong = divmod(rest, _JONG_COUNT)
+        out.append(CHOSEONG[cho])
+        out.append(JUNGSEONG[jung])
+        if jong:
+            out.append(JONGSEONG[jong])
+    return out
+
+
+def is_choseong_query(q: str) -> bool:
+    """
+    검색어가 초성(자음)만으로 이루어졌는지. 공백은 무시.
+    """
+    chars = [c for c in (q or "") if not c.isspace()]
+    return bool(chars) and all(c in _CONSONANT_SET for c in chars)
+
+
+def has_jamo(q: str) -> bool:
+    """
+    검색어에 낱자 자모가 섞여 있는지 (예: 입력 중인 "경로ㄷ").
+    """
+    return any(c in _JAMO_SET for c in (q or ""))
@@ -0,0 +1,157 @@
+# app/utils/mmap_snapshot_util.py
+import json
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: 워커 간 락 없이 (스냅샷 교체가 원자적이라 깨진 파일은 보이지 않는다)
+    fcntl = None
+
+# 파일 구조: MAGIC(8) + 헤더 길이(uint64 LE) + 헤더 JSON + (64바이트 정렬) 배열들
+# 헤더: {"meta": {...}, "arrays": {이름: {"dtype", "shape", "offset"}}}
+MAGIC = b"RSQSNAP1"
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> int:
+    """
+    고정폭 배열들 + meta(JSON)를 스냅샷 파일 하나로 쓴다. 반환: 파일 크기(bytes).
+    같은 디렉터리의 임시 파일에 다 쓰고 fsync한 뒤 os.replace → 읽는 쪽은 이전 파일 아니면 새 파일만 본다.
+    이미 이전 파일을 mmap한 프로세스는 자기 매핑을 그대로 쓴다 (교체돼도 이전 inode는 매핑이 풀릴 때까지 남는다).
+    """
+    layout = {}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        if arr.dtype.hasobject:
+            raise ValueError(f"snapshot array {name!r} has object dtype")
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = _aligned(offset + arr.nbytes)
+    header = json.dumps({"meta": meta, "arrays": layout}, ensure_ascii=False).encode("utf-8")
+    base = _aligned(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for name, arr in arrays.items():
+                f.seek(base + layout[name]["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+            f.truncate(base + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return base + offset
+
+
+def open_snapshot(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    스냅샷 파일을 읽기 전용 mmap으로 열어 (배열 뷰들, meta) 반환. 배열은 복사하지 않으며 쓰기 불가.
+    같은 파일을 연 프로세스들은 페이지 캐시의 한 물리 사본을 공유한다.
+    형식이 맞지 않으면 ValueError.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(MAGIC) + 8:
+            raise ValueError(f"not a snapshot file: {path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(MAGIC)] != MAGIC:
+        mm.close()
+        raise ValueError(f"not a snapshot file: {path}")
+    n = int.from_bytes(mm[len(MAGIC):len(MAGIC) + 8], "little")
+    header = json.loads(mm[len(MAGIC) + 8:len(MAGIC) + 8 + n].decode("utf-8"))
+    base = _aligned(len(MAGIC) + 8 + n)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        if base + spec["offset"] + count * dtype.itemsize > size:
+            raise ValueError(f"truncated snapshot file: {path}")
+        # 각 배열이 mm을 참조(base)하므로 배열이 살아 있는 동안 매핑도 유지된다
+        arrays[name] = np.frombuffer(mm, dtype=dtype, count=count, offset=base + spec["offset"]).reshape(spec["shape"])
+    return arrays, header["meta"]
+
+
+@contextmanager
+def build_lock(path: str):
+    """
+    스냅샷 path를 만드는 동안 잡는 프로세스 간 락 (path + ".lock"에 flock).
+    여러 워커가 동시에 떠도 만들기/쓰기는 한 프로세스만 하고, 나머지는 기다렸다가 그 파일을 연다.
+    락 파일을 만들 수 없으면 락 없이 진행한다.
+    """
+    if fcntl is None:
+        yield
+        return
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        f = open(path + ".lock", "a")
+    except OSError:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class StringTable:
+    """
+    문자열 목록을 UTF-8 바이트 하나 + 시작 위치(int64) 배열로 보관 (스냅샷에 그대로 쓰고 mmap으로 공유).
+    t[i]는 필요할 때만 디코딩한다 → 프로세스마다 파이썬 str 사본을 만들지 않는다.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob          # uint8
+        self.offsets = offsets    # int64, 길이 n+1
+
+    @classmethod
+    def pack(cls, strings: Sequence[str]) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        return [self[i] for i in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.blob.nbytes + self.offsets.nbytes)
+
+    def arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f"{prefix}.blob": self.blob, f"{prefix}.off": self.offsets}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> Optional["StringTable"]:
+        if f"{prefix}.blob" not in arrays:
+            return None
+        return cls(arrays[f"{prefix}.blob"], arrays[f"{prefix}.off"])
@@ -0,0 +1,177 @@
+# app/utils/name_search_util.py
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.utils.hangul_util import decompose_str, has_jamo, is_choseong_query, to_choseong
+from app.utils.ngram_index_util import NgramIndex
+
+# 오타 허용 최대 편집거리(음절 단위). 삭제 변형 사전 크기가 (길이+1)배라서 1로 둔다.
+FUZZY_MAX_EDIT = 1
+# 이보다 짧은 검색어는 오타 검색을 하지 않는다(1글자는 모든 이름과 거리 1).
+FUZZY_MIN_LEN = 2
+
+MATCH_MODES = ("substring", "choseong", "jamo", "fuzzy", "auto")
+
+_TOKEN_SPLIT = re.compile(r"[\s()\[\],·/]+")
+
+
+def _norm(text: str) -> str:
+    return "".join((text or "").lower().split())
+
+
+def _deletes(term: str, max_edit: int) -> Set[str]:
+    out = {term}
+    frontier = {term}
+    for _ in range(max_edit):
+        nxt = set()
+        for t in frontier:
+            for i in range(len(t)):
+                nxt.add(t[:i] + t[i + 1:])
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+def edit_distance(a: str, b: str, max_edit: int) -> int:
+    """
+    제한된 OSA(인접 전치 포함) 편집거리. max_edit를 넘으면 max_edit + 1 반환.
+    """
+    if abs(len(a) - len(b)) > max_edit:
+        return max_edit + 1
+    prev2: Optional[List[int]] = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= max_edit else max_edit + 1
+
+
+class NameSearchIndex:
+    """
+    시설명 검색 인덱스 (데이터셋 로드 시 1회 생성, 요청 중에는 읽기만).
+
+    - substring: 이름 bigram 역색인(NgramIndex) 부분일치
+    - choseong : 이름을 초성 문자열로 바꾼 bigram 역색인. 예) "ㄱㄹㄷ" → "...경로당"
+    - jamo     : 이름을 자모로 분해한 trigram 역색인. 입력 중인 검색어(예: "경로ㄷ")도 부분일치
+    - fuzzy    : 이름 전체와 이름 토큰(공백/괄호 기준)에 대한 대칭 삭제(symmetric deletion) 사전.
+                 검색어의 삭제 변형과 겹치는 용어만 꺼내 편집거리로 검증 → 행 스캔 없음
+    search()는 (행 위치 오름차순, 점수) 를 반환하며 점수는 클수록 잘 맞은 것이다.
+    """
+
+    def __init__(self, names: Iterable[str], substring_index: Optional[NgramIndex] = None):
+        names = [n or "" for n in names]
+        self.names = [n.lower() for n in names]
+        self.substring = substring_index or NgramIndex(self.names)
+        self.choseong_texts = [_norm(to_choseong(n)) for n in self.names]
+        self.choseong = NgramIndex(self.choseong_texts)
+        self.jamo_texts = [decompose_str(_norm(n)) for n in self.names]
+        self.jamo = NgramIndex(self.jamo_texts, n=3)
+
+        term_rows: Dict[str, List[int]] = defaultdict(list)
+        for i, n in enumerate(self.names):
+            terms = {_norm(n)} | {t for t in _TOKEN_SPLIT.split(n) if len(t) >= FUZZY_MIN_LEN}
+            for t in terms:
+                if t:
+                    term_rows[t].append(i)
+        self.terms: List[str] = list(term_rows)
+        self.term_rows = [np.asarray(term_rows[t], dtype=np.int64) for t in self.terms]
+        deletes: Dict[str, List[int]] = defaultdict(list)
+        for tid, t in enumerate(self.terms):
+            for v in _deletes(t, FUZZY_MAX_EDIT):
+                deletes[v].append(tid)
+        self._deletes = dict(deletes)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _scored(pos: np.ndarray, score: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(pos, kind="stable")
+        return pos[order], score[order]
+
+    def search_substring(self, q: str) -> Tuple[np.ndarray, np.ndarray]:
+        q = (q or "").strip().lower()
+        pos = self.substring.search(q)
+        names = self.names
+        score = np.fromiter(
+            (3 if names[i] == q else 2 if names[i].startswith(q) else 1 for i in pos.tolist()),
+            dtype=np.int8, count=len(pos),
+        )
+        return pos, score
+
+    def search_choseong(self, q: str) -> Tuple[np.ndarray, np.ndarray]:
+        q = _norm(q)
+        pos = self.choseong.search(q)
+        texts = self.choseong_texts
+        score = np.fromiter(
+            (3 if texts[i] == q else 2 if texts[i].startswith(q) else 1 for i in pos.tolist()),
+            dtype=np.int8, count=len(pos),
+        )
+        return pos, score
+
+    def search_jamo(self, q: str) -> Tuple[np.ndarray, np.ndarray]:
+        q = decompose_str(_norm(q))
+        pos = self.jamo.search(q)
+        texts = self.jamo_texts
+        score = np.fromiter(
+            (3 if texts[i] == q else 2 if texts[i].startswith(q) else 1 for i in pos.tolist()),
+            dtype=np.int8, count=len(pos),
+        )
+        return pos, score
+
+    def search_fuzzy(self, q: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        이름(또는 이름 토큰)과 편집거리 FUZZY_MAX_EDIT 이내인 행. 점수 = FUZZY_MAX_EDIT + 1 - 거리.
+        """
+        q = _norm(q)
+        if len(q) < FUZZY_MIN_LEN:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+        cand: Set[int] = set()
+        for v in _deletes(q, FUZZY_MAX_EDIT):
+            cand.update(self._deletes.get(v, ()))
+        best: Dict[int, int] = {}
+        for tid in cand:
+            d = edit_distance(q, self.terms[tid], FUZZY_MAX_EDIT)
+            if d > FUZZY_MAX_EDIT:
+                continue
+            for i in self.term_rows[tid].tolist():
+                if d < best.get(i, FUZZY_MAX_EDIT + 1):
+                    best[i] = d
+        if not best:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+        pos = np.fromiter(best.keys(), dtype=np.int64, count=len(best))
+        score = np.fromiter((FUZZY_MAX_EDIT + 1 - d for d in best.values()), dtype=np.int8, count=len(best))
+        return self._scored(pos, score)
+
+    def search(self, q: str, mode: str = "auto") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        mode:
+        - "substring" / "choseong" / "jamo" / "fuzzy": 해당 방식만
+        - "auto": 초성만 입력했으면 choseong, 낱자 자모가 섞였으면 jamo,
+                  아니면 substring → 결과가 없으면 fuzzy
+        """
+        if mode == "choseong":
+            return self.search_choseong(q)
+        if mode == "jamo":
+            return self.search_jamo(q)
+        if mode == "fuzzy":
+            return self.search_fuzzy(q)
+        if mode == "substring":
+            return self.search_substring(q)
+        if is_choseong_query(q):
+            return self.search_choseong(q)
+        if has_jamo(q):
+            return self.search_jamo(q)
+        pos, score = self.search_substring(q)
+        if len(pos) == 0:
+            return self.search_fuzzy(q)
+        return pos, score
@@ -0,0 +1,137 @@
+# app/utils/ngram_index_util.py
+import bisect
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from app.utils.mmap_snapshot_util import StringTable
+
+
+def _grams(text: str, n: int) -> Iterable[str]:
+    if len(text) < n:
+        return ()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class _PostingTable:
+    """
+    정렬된 키(StringTable) + 포스팅을 이어 붙인 배열(CSR). dict처럼 get(key)만 지원.
+    스냅샷에서 mmap으로 복원한 인덱스용 — 키 조회는 이진 탐색(키 디코딩 log n번), 파이썬 dict를 만들지 않는다.
+    """
+
+    def __init__(self, keys: StringTable, off: np.ndarray, data: np.ndarray):
+        self.keys = keys
+        self.off = off
+        self.data = data
+
+    def get(self, key: str, default=None):
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return default
+        return self.data[self.off[i]:self.off[i + 1]]
+
+    def values(self) -> List[np.ndarray]:
+        return [self.data]
+
+    @classmethod
+    def pack(cls, postings: Dict[str, np.ndarray]) -> "_PostingTable":
+        keys = sorted(postings)
+        off = np.zeros(len(keys) + 1, dtype=np.int64)
+        if keys:
+            np.cumsum([len(postings[k]) for k in keys], out=off[1:])
+        data = np.concatenate([postings[k] for k in keys]) if keys else np.empty(0, dtype=np.int32)
+        return cls(StringTable.pack(keys), off, data.astype(np.int32, copy=False))
+
+    def arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {**self.keys.arrays(f"{prefix}.keys"), f"{prefix}.off": self.off, f"{prefix}.data": self.data}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> "_PostingTable":
+        return cls(StringTable.from_arrays(arrays, f"{prefix}.keys"), arrays[f"{prefix}.off"], arrays[f"{prefix}.data"])
+
+
+class NgramIndex:
+    """
+    문자 n-gram(기본 bigram) 역색인. 한글은 음절 단위 그대로 자른다.
+
+    - 생성 시 texts(이미 소문자화된 문자열)의 각 n-gram → 행 위치(int32, 오름차순) 포스팅을 만든다.
+    - 1글자 질의를 위해 unigram 포스팅도 함께 보관한다.
+    - search(q)는 q의 n-gram 포스팅을 짧은 것부터 교집합한 뒤, 남은 후보만 실제 부분일치로 검증한다.
+      → 전체 행을 훑지 않고 q를 포함하는 행 위치를 정확히 반환.
+    - state()/from_state()로 고정폭 배열(포스팅 CSR + 문자열 표)로 저장/복원 → 스냅샷 mmap으로 워커 간 공유.
+    """
+
+    def __init__(self, texts: Iterable[str], n: int = 2):
+        self.n = n
+        self.texts: List[str] = [t or "" for t in texts]
+        grams: Dict[str, List[int]] = defaultdict(list)
+        units: Dict[str, List[int]] = defaultdict(list)
+        for i, t in enumerate(self.texts):
+            for g in _grams(t, n):
+                grams[g].append(i)
+            for ch in set(t):
+                units[ch].append(i)
+        self._grams = {g: np.asarray(p, dtype=np.int32) for g, p in grams.items()}
+        self._units = {c: np.asarray(p, dtype=np.int32) for c, p in units.items()}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def state(self, prefix: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        (배열들 {prefix.이름: 배열}, 스칼라 dict) — from_state로 같은 인덱스를 다시 만든다.
+        """
+        texts = self.texts if isinstance(self.texts, StringTable) else StringTable.pack(self.texts)
+        grams = self._grams if isinstance(self._grams, _PostingTable) else _PostingTable.pack(self._grams)
+        units = self._units if isinstance(self._units, _PostingTable) else _PostingTable.pack(self._units)
+        arrays = {**texts.arrays(f"{prefix}.texts"), **grams.arrays(f"{prefix}.grams"), **units.arrays(f"{prefix}.units")}
+        return arrays, {"n": self.n}
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], scalars: Dict[str, Any], prefix: str) -> "NgramIndex":
+        """
+        state()로 저장한 배열(읽기 전용 mmap 뷰여도 됨)로 복원. texts[i]는 접근할 때 디코딩한다.
+        """
+        index = cls.__new__(cls)
+        index.n = scalars["n"]
+        index.texts = StringTable.from_arrays(arrays, f"{prefix}.texts")
+        index._grams = _PostingTable.from_arrays(arrays, f"{prefix}.grams")
+        index._units = _PostingTable.from_arrays(arrays, f"{prefix}.units")
+        return index
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(p.nbytes for p in self._grams.values()) + sum(p.nbytes for p in self._units.values()))
+
+    def candidates(self, q: str) -> np.ndarray:
+        """
+        q의 n-gram을 모두 가진 행 위치(오름차순). 부분일치의 필요조건만 만족.
+        """
+        if not q:
+            return np.empty(0, dtype=np.int32)
+        if len(q) < self.n:
+            return self._units.get(q, np.empty(0, dtype=np.int32))
+        postings = []
+        for g in _grams(q, self.n):
+            p = self._grams.get(g)
+            if p is None:
+                return np.empty(0, dtype=np.int32)
+            postings.append(p)
+        postings.sort(key=len)
+        out = postings[0]
+        for p in postings[1:]:
+            out = np.intersect1d(out, p, assume_unique=True)
+            if len(out) == 0:
+                break
+        return out
+
+    def search(self, q: str) -> np.ndarray:
+        """
+        texts[i]에 q가 부분문자열로 들어있는 위치 i (오름차순).
+        """
+        cand = self.candidates(q)
+        if len(q) <= self.n:
+            return cand.astype(np.int64)
+        texts = self.texts
+        return np.fromiter((i for i in cand.tolist() if q in texts[i]), dtype=np.int64)
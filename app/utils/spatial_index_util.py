@@ -0,0 +1,781 @@
+# app/utils/spatial_index_util.py
+from math import asin, cos, radians, sin, sqrt
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.geo_util import EARTH_RADIUS_KM, KM_PER_DEG_LAT, bounding_box, haversine_km_prepared, prepare_latlon
+
+# 셀 하나에 평균적으로 들어갈 점 개수 목표치(셀 크기 자동 결정용)
+_TARGET_POINTS_PER_CELL = 16
+# knn_batch에서 한 번에 만드는 (기준점 x 후보) 거리 행렬 원소 수 상한
+_BATCH_MATRIX_CELLS = 2_000_000
+
+
+def _require_finite(lats, lons) -> None:
+    # NaN/inf 기준점은 셀 번호를 만들 수 없다 (정수 변환 오버플로 → 셀 확장 루프가 끝나지 않음)
+    if not (np.isfinite(lats).all() and np.isfinite(lons).all()):
+        raise ValueError("latitude/longitude must be finite numbers")
+
+
+class GridIndex:
+    """
+    위경도 균일 격자 공간 인덱스 (데이터셋 버전마다 1회 생성, 이후 읽기 전용).
+
+    - 점을 (행, 열) 셀 키로 정렬해 두고, 셀 행 단위로 searchsorted 해서 후보를 모은다.
+    - knn / radius / bbox 결과의 거리는 모두 하버사인 기준으로 정확하다.
+      (격자는 후보를 줄이는 용도일 뿐, 최종 순위는 실제 거리로 매긴다)
+    - 반환 위치는 생성 시 넘긴 배열의 위치(0..n-1)이다.
+    - 경도 ±180 경계 넘김은 고려하지 않는다(국내 데이터 전용).
+    """
+
+    def __init__(self, lats, lons, cell_deg: Optional[float] = None):
+        lats = np.ascontiguousarray(lats, dtype=np.float64)
+        lons = np.ascontiguousarray(lons, dtype=np.float64)
+        self.n = len(lats)
+
+        if self.n == 0:
+            self.cell_deg = cell_deg or 0.05
+            self.lat0 = self.lon0 = 0.0
+            self.ny = self.nx = 1
+            self.max_abs_lat = 0.0
+            self.keys = np.empty(0, dtype=np.int64)
+            self.order = np.empty(0, dtype=np.int64)
+            self.lat_deg = self.lon_deg = np.empty(0, dtype=np.float64)
+            self.lat_rad = self.lon_rad = self.cos_lat = np.empty(0, dtype=np.float64)
+            return
+
+        self.lat0 = float(lats.min())
+        self.lon0 = float(lons.min())
+        span_lat = max(float(lats.max()) - self.lat0, 1e-6)
+        span_lon = max(float(lons.max()) - self.lon0, 1e-6)
+        if cell_deg is None:
+            cell_deg = sqrt(span_lat * span_lon * _TARGET_POINTS_PER_CELL / self.n)
+            cell_deg = min(max(cell_deg, 0.001), 1.0)
+        self.cell_deg = float(cell_deg)
+        self.ny = int(span_lat // self.cell_deg) + 1
+        self.nx = int(span_lon // self.cell_deg) + 1
+        self.max_abs_lat = float(np.abs(lats).max())
+
+        iy = ((lats - self.lat0) // self.cell_deg).astype(np.int64)
+        ix = ((lons - self.lon0) // self.cell_deg).astype(np.int64)
+        keys = iy * self.nx + ix
+
+        # 셀 키 순으로 정렬(같은 셀 안에서는 원래 순서 유지)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.lat_deg = lats[self.order]
+        self.lon_deg = lons[self.order]
+        self.lat_rad, self.lon_rad, self.cos_lat = prepare_latlon(self.lat_deg, self.lon_deg)
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.keys.nbytes + self.order.nbytes + self.lat_deg.nbytes + self.lon_deg.nbytes
+            + self.lat_rad.nbytes + self.lon_rad.nbytes + self.cos_lat.nbytes
+        )
+
+    # 스냅샷 저장/복원 (mmap_snapshot_util): 배열은 그대로, 스칼라는 meta로
+    _STATE_ARRAYS = ("keys", "order", "lat_deg", "lon_deg", "lat_rad", "lon_rad", "cos_lat")
+    _STATE_SCALARS = ("n", "cell_deg", "lat0", "lon0", "ny", "nx", "max_abs_lat")
+
+    def state(self, prefix: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        (배열들 {prefix.이름: 배열}, 스칼라 dict) — from_state로 같은 인덱스를 다시 만든다 (재계산 없음).
+        """
+        arrays = {f"{prefix}.{name}": getattr(self, name) for name in self._STATE_ARRAYS}
+        return arrays, {name: getattr(self, name) for name in self._STATE_SCALARS}
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], scalars: Dict[str, Any], prefix: str) -> "GridIndex":
+        """
+        state()로 저장한 배열(읽기 전용 mmap 뷰여도 됨)로 인덱스 복원. 조회는 배열을 읽기만 한다.
+        """
+        index = cls.__new__(cls)
+        for name in cls._STATE_ARRAYS:
+            setattr(index, name, arrays[f"{prefix}.{name}"])
+        for name in cls._STATE_SCALARS:
+            setattr(index, name, scalars[name])
+        return index
+
+    # ----------------------------
+    # 내부 유틸
+    # ----------------------------
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            int((lat - self.lat0) // self.cell_deg),
+            int((lon - self.lon0) // self.cell_deg),
+        )
+
+    def _gather(self, iy0: int, iy1: int, ix0: int, ix1: int) -> np.ndarray:
+        """
+        셀 사각형 [iy0..iy1] x [ix0..ix1] 안의 점들의 (정렬 배열 기준) 위치.
+        같은 행의 셀들은 키가 연속이므로 행마다 searchsorted 두 번이면 된다.
+        """
+        iy0 = max(iy0, 0); iy1 = min(iy1, self.ny - 1)
+        ix0 = max(ix0, 0); ix1 = min(ix1, self.nx - 1)
+        if iy0 > iy1 or ix0 > ix1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(iy0, iy1 + 1, dtype=np.int64) * self.nx
+        lo = np.searchsorted(self.keys, rows + ix0, side="left")
+        hi = np.searchsorted(self.keys, rows + ix1, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # 각 구간 [lo, hi)를 이어붙인 인덱스 배열
+        starts = np.repeat(lo - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        return starts + np.arange(total, dtype=np.int64)
+
+    def _min_dist_outside_km(self, lat: float, lon: float, iy0: int, iy1: int, ix0: int, ix1: int) -> float:
+        """
+        셀 사각형 밖(격자 안)에 있는 어떤 점까지의 거리 하한(km).
+        사각형이 격자 끝에 닿은 방향은 바깥에 점이 없으므로 무시한다.
+        """
+        bound = float("inf")
+        if iy0 > 0:
+            bound = min(bound, (lat - (self.lat0 + iy0 * self.cell_deg)) * KM_PER_DEG_LAT)
+        if iy1 < self.ny - 1:
+            bound = min(bound, ((self.lat0 + (iy1 + 1) * self.cell_deg) - lat) * KM_PER_DEG_LAT)
+        cos_m = cos(radians(max(abs(lat), self.max_abs_lat)))
+        for gap in (
+            (lon - (self.lon0 + ix0 * self.cell_deg)) if ix0 > 0 else None,
+            ((self.lon0 + (ix1 + 1) * self.cell_deg) - lon) if ix1 < self.nx - 1 else None,
+        ):
+            if gap is None:
+                continue
+            gap = max(gap, 0.0)
+            bound = min(bound, 2.0 * EARTH_RADIUS_KM * asin(min(1.0, cos_m * sin(radians(gap) / 2.0))))
+        return max(bound, 0.0)
+
+    def _dist(self, lat: float, lon: float, cand: np.ndarray) -> np.ndarray:
+        return haversine_km_prepared(lat, lon, self.lat_rad[cand], self.lon_rad[cand], self.cos_lat[cand])
+
+    def _ranges_many(
+        self, iy0: np.ndarray, iy1: np.ndarray, ix0: np.ndarray, ix1: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        _gather의 배열 버전(모으기 전 단계): 기준점 i의 셀 사각형을 셀 행마다 [lo, lo+count) 구간으로 반환.
+        반환 shape은 (기준점 수, 사각형 행 수)이며 격자 밖 행은 count=0.
+        """
+        iy0 = np.maximum(iy0, 0); iy1 = np.minimum(iy1, self.ny - 1)
+        ix0 = np.maximum(ix0, 0); ix1 = np.minimum(ix1, self.nx - 1)
+        h = max(int((iy1 - iy0).max()) + 1, 1) if len(iy0) else 1
+        rows = iy0[:, None] + np.arange(h, dtype=np.int64)[None, :]
+        valid = (rows <= iy1[:, None]) & (ix0 <= ix1)[:, None]
+        base = rows * self.nx
+        lo = np.searchsorted(self.keys, base + ix0[:, None], side="left")
+        hi = np.searchsorted(self.keys, base + ix1[:, None], side="right")
+        return lo, np.where(valid, hi - lo, 0)
+
+    def _knn_block(
+        self, q_lat_rad: np.ndarray, q_lon_rad: np.ndarray, q_cos: np.ndarray,
+        lo: np.ndarray, counts: np.ndarray, k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        기준점 묶음의 후보를 (기준점, 후보 칸) 밀집 행렬로 펼쳐 행마다 가까운 k개를 고른다.
+        k번째 경계의 동률까지 (거리, 위치) 순서로 정확히 고른다. 모든 행의 후보는 k개 이상이어야 한다.
+        """
+        per_q = counts.sum(axis=1)
+        width = int(per_q.max())
+        flat_counts = counts.ravel()
+        total = int(flat_counts.sum())
+        starts = np.repeat(lo.ravel() - np.concatenate(([0], np.cumsum(flat_counts)[:-1])), flat_counts)
+        cand = starts + np.arange(total, dtype=np.int64)
+        row = np.repeat(np.arange(len(per_q), dtype=np.int64), per_q)
+        col = np.arange(total, dtype=np.int64) - np.repeat(np.concatenate(([0], np.cumsum(per_q)[:-1])), per_q)
+
+        a = (
+            np.sin((self.lat_rad[cand] - q_lat_rad[row]) * 0.5) ** 2
+            + q_cos[row] * self.cos_lat[cand] * np.sin((self.lon_rad[cand] - q_lon_rad[row]) * 0.5) ** 2
+        )
+        np.clip(a, 0.0, 1.0, out=a)
+        D = np.full((len(per_q), width), np.inf)
+        P = np.full((len(per_q), width), self.n, dtype=np.int64)
+        D[row, col] = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        P[row, col] = self.order[cand]
+
+        # k번째 거리 v를 구한 뒤 v 이하인 칸만 남긴다 (대부분 행은 정확히 k칸)
+        if width > k:
+            part = np.argpartition(D, k - 1, axis=1)[:, :k]
+            v = np.take_along_axis(D, part, axis=1).max(axis=1)
+        else:
+            v = D.max(axis=1)
+        within = D <= v[:, None]
+        n_within = within.sum(axis=1)
+        out_pos = np.empty((len(per_q), k), dtype=np.int64)
+        out_dist = np.empty((len(per_q), k), dtype=np.float64)
+        exact = n_within == k
+        if exact.any():
+            cols = np.nonzero(within[exact])[1].reshape(-1, k)
+            d = np.take_along_axis(D[exact], cols, axis=1)
+            p = np.take_along_axis(P[exact], cols, axis=1)
+            o = np.lexsort((p, d))
+            out_pos[exact] = np.take_along_axis(p, o, axis=1)
+            out_dist[exact] = np.take_along_axis(d, o, axis=1)
+        # 경계 동률이 있는 행: 동률 중 위치가 작은 쪽부터
+        for i in np.flatnonzero(~exact).tolist():
+            o = np.lexsort((P[i], D[i]))[:k]
+            out_pos[i] = P[i, o]
+            out_dist[i] = D[i, o]
+        return out_pos, out_dist
+
+    def _min_dist_outside_km_many(
+        self, lat: np.ndarray, lon: np.ndarray, iy0: np.ndarray, iy1: np.ndarray, ix0: np.ndarray, ix1: np.ndarray
+    ) -> np.ndarray:
+        """
+        _min_dist_outside_km의 배열 버전.
+        """
+        inf = np.full(len(lat), np.inf)
+        bound = np.minimum(
+            np.where(iy0 > 0, (lat - (self.lat0 + iy0 * self.cell_deg)) * KM_PER_DEG_LAT, inf),
+            np.where(iy1 < self.ny - 1, ((self.lat0 + (iy1 + 1) * self.cell_deg) - lat) * KM_PER_DEG_LAT, inf),
+        )
+        cos_m = np.cos(np.radians(np.maximum(np.abs(lat), self.max_abs_lat)))
+        for has, gap in (
+            (ix0 > 0, lon - (self.lon0 + ix0 * self.cell_deg)),
+            (ix1 < self.nx - 1, (self.lon0 + (ix1 + 1) * self.cell_deg) - lon),
+        ):
+            gap = np.maximum(gap, 0.0)
+            km = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, cos_m * np.sin(np.radians(gap) / 2.0)))
+            bound = np.minimum(bound, np.where(has, km, inf))
+        return np.maximum(bound, 0.0)
+
+    # ----------------------------
+    # 공개 메서드
+    # ----------------------------
+    def knn(self, lat: float, lon: float, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        가장 가까운 k개 (위치, 거리 km)를 가까운 순으로 반환. 동률은 위치 순.
+        mask(원본 위치 기준 bool 배열)가 있으면 True인 점만 대상으로 한다.
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        if self.n == 0 or k is None or k <= 0:
+            return empty
+        available = self.n if mask is None else int(np.count_nonzero(mask))
+        k = min(k, available)
+        if k == 0:
+            return empty
+
+        _require_finite(lat, lon)
+        cy, cx = self._cell_of(lat, lon)
+        # 격자 밖 기준점은 바로 바깥 셀로 당긴다 (격자 밖 셀은 비어 있으므로 결과는 같고, 확장 횟수가 유한해진다)
+        cy = min(max(cy, -1), self.ny)
+        cx = min(max(cx, -1), self.nx)
+        r = 1
+        while True:
+            iy0, iy1, ix0, ix1 = cy - r, cy + r, cx - r, cx + r
+            # r이 격자 크기를 넘으면 사각형이 격자 전체를 덮는다 (어떤 입력도 무한히 돌지 않도록 명시)
+            covers_all = (iy0 <= 0 and ix0 <= 0 and iy1 >= self.ny - 1 and ix1 >= self.nx - 1) \
+                or r > max(self.ny, self.nx) + 1
+            cand = self._gather(iy0, iy1, ix0, ix1)
+            if mask is not None and len(cand):
+                cand = cand[mask[self.order[cand]]]
+            if len(cand) >= k:
+                dist = self._dist(lat, lon, cand)
+                # 같은 거리라면 원본 위치 순으로 (k번째 경계의 동률도 위치가 작은 쪽이 들어가도록 후보 전체를 정렬)
+                pos = self.order[cand]
+                top = np.lexsort((pos, dist))[:k]
+                if covers_all or dist[top[-1]] <= self._min_dist_outside_km(lat, lon, iy0, iy1, ix0, ix1):
+                    return pos[top], dist[top]
+            if covers_all:
+                # 마스크 때문에 후보가 k보다 적은 경우
+                dist = self._dist(lat, lon, cand)
+                pos = self.order[cand]
+                o = np.lexsort((pos, dist))
+                return pos[o], dist[o]
+            r *= 2
+
+    def knn_batch(self, lats, lons, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 기준점의 k-최근접을 한 번에 계산. (m, k) 위치 / 거리(km) 배열을 반환하며 k는 min(k, n)으로 줄어든다.
+        knn()의 셀 사각형 확장을 모든 기준점에 대해 배열 연산으로 수행한다:
+        반경 r의 후보를 (기준점 x 후보) 행렬로 펼쳐 행마다 앞 k개를 고르고,
+        k번째 거리가 사각형 밖 하한보다 큰 기준점만 r을 2배로 키워 다시 계산한다.
+        각 행은 knn(lat, lon, k)과 같다 (가까운 순, 동률은 위치 순).
+        """
+        lats = np.ascontiguousarray(lats, dtype=np.float64)
+        lons = np.ascontiguousarray(lons, dtype=np.float64)
+        _require_finite(lats, lons)
+        m = len(lats)
+        k = 0 if k is None else min(max(int(k), 0), self.n)
+        out_pos = np.empty((m, k), dtype=np.int64)
+        out_dist = np.empty((m, k), dtype=np.float64)
+        if m == 0 or k == 0:
+            return out_pos, out_dist
+
+        q_lat_rad = np.radians(lats)
+        q_lon_rad = np.radians(lons)
+        q_cos = np.cos(q_lat_rad)
+        # 격자 밖 기준점은 바로 바깥 셀로 (knn과 같음). 정수 변환 전에 잘라 오버플로도 막는다
+        cy = np.clip((lats - self.lat0) // self.cell_deg, -1, self.ny).astype(np.int64)
+        cx = np.clip((lons - self.lon0) // self.cell_deg, -1, self.nx).astype(np.int64)
+
+        pending = np.arange(m, dtype=np.int64)
+        r = 1
+        while len(pending):
+            iy0, iy1, ix0, ix1 = cy[pending] - r, cy[pending] + r, cx[pending] - r, cx[pending] + r
+            covers_all = (iy0 <= 0) & (ix0 <= 0) & (iy1 >= self.ny - 1) & (ix1 >= self.nx - 1)
+            if r > max(self.ny, self.nx) + 1:
+                covers_all[:] = True
+            lo, counts = self._ranges_many(iy0, iy1, ix0, ix1)
+            per_q = counts.sum(axis=1)
+            # 후보가 k개 미만이면 계산 없이 다음 반경으로
+            ready = np.flatnonzero(per_q >= k)
+            done = np.zeros(len(pending), dtype=bool)
+            # 후보 수가 비슷한 기준점끼리 묶어 밀집 행렬 크기(묶음 수 x 최대 후보 수)를 제한
+            ready = ready[np.argsort(per_q[ready], kind="stable")]
+            sizes = per_q[ready]
+            b0 = 0
+            while b0 < len(ready):
+                # 정렬돼 있으므로 [b0, b1) 묶음의 행렬 크기 = (b1 - b0) * sizes[b1 - 1] (b1에 대해 단조 증가)
+                span = np.arange(1, len(ready) - b0 + 1) * sizes[b0:]
+                b1 = b0 + max(1, int(np.searchsorted(span, _BATCH_MATRIX_CELLS, side="right")))
+                blk = ready[b0:b1]
+                qs = pending[blk]
+                pos, dist = self._knn_block(q_lat_rad[qs], q_lon_rad[qs], q_cos[qs], lo[blk], counts[blk], k)
+                bound = self._min_dist_outside_km_many(lats[qs], lons[qs], iy0[blk], iy1[blk], ix0[blk], ix1[blk])
+                ok = covers_all[blk] | (dist[:, -1] <= bound)
+                out_pos[qs[ok]] = pos[ok]
+                out_dist[qs[ok]] = dist[ok]
+                done[blk[ok]] = True
+                b0 = b1
+            pending = pending[~done]
+            r *= 2
+        return out_pos, out_dist
+
+    def nearest_within_batch(self, lats, lons, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 기준점마다 반경 radius_km 이내에서 가장 가까운 점 1개. (위치, 거리 km) 배열을 반환하며 없으면 -1 / inf.
+        각 원소는 radius(lat, lon, radius_km)의 첫 결과와 같다 (동률은 위치 순).
+        knn_batch(k=1)과 달리 반경 사각형에 걸친 셀만 보므로 반경이 셀보다 작을 때 후보가 적다.
+        """
+        lats = np.ascontiguousarray(lats, dtype=np.float64)
+        lons = np.ascontiguousarray(lons, dtype=np.float64)
+        m = len(lats)
+        out_pos = np.full(m, -1, dtype=np.int64)
+        out_dist = np.full(m, np.inf)
+        if m == 0 or self.n == 0 or radius_km is None or radius_km < 0:
+            return out_pos, out_dist
+
+        # bounding_box()의 배열 버전 → 셀 사각형
+        dlat = radius_km / KM_PER_DEG_LAT
+        min_lat = np.maximum(lats - dlat, -90.0)
+        max_lat = np.minimum(lats + dlat, 90.0)
+        cos_m = np.cos(np.radians(np.maximum(np.abs(min_lat), np.abs(max_lat))))
+        s = sin(radius_km / (2.0 * EARTH_RADIUS_KM))
+        wide = (cos_m <= 0) | (s >= cos_m)
+        dlon = np.where(wide, 360.0, 2.0 * np.degrees(np.arcsin(np.minimum(s / np.where(wide, 1.0, cos_m), 1.0))))
+        iy0 = ((min_lat - self.lat0) // self.cell_deg).astype(np.int64)
+        iy1 = ((max_lat - self.lat0) // self.cell_deg).astype(np.int64)
+        ix0 = ((lons - dlon - self.lon0) // self.cell_deg).astype(np.int64)
+        ix1 = ((lons + dlon - self.lon0) // self.cell_deg).astype(np.int64)
+        lo, counts = self._ranges_many(iy0, iy1, ix0, ix1)
+        per_q = counts.sum(axis=1)
+
+        q_lat_rad = np.radians(lats)
+        q_lon_rad = np.radians(lons)
+        q_cos = np.cos(q_lat_rad)
+        # 후보 총량이 _BATCH_MATRIX_CELLS를 넘지 않도록 기준점을 연속 구간으로 나눠 계산
+        cum = np.cumsum(per_q)
+        b0 = 0
+        while b0 < m:
+            base = int(cum[b0 - 1]) if b0 else 0
+            b1 = max(b0 + 1, int(np.searchsorted(cum, base + _BATCH_MATRIX_CELLS, side="right")))
+            blk_counts = counts[b0:b1].ravel()
+            total = int(blk_counts.sum())
+            if total:
+                starts = np.repeat(
+                    lo[b0:b1].ravel() - np.concatenate(([0], np.cumsum(blk_counts)[:-1])), blk_counts
+                )
+                cand = starts + np.arange(total, dtype=np.int64)
+                row = b0 + np.repeat(np.arange(b1 - b0, dtype=np.int64), per_q[b0:b1])
+                a = (
+                    np.sin((self.lat_rad[cand] - q_lat_rad[row]) * 0.5) ** 2
+                    + q_cos[row] * self.cos_lat[cand] * np.sin((self.lon_rad[cand] - q_lon_rad[row]) * 0.5) ** 2
+                )
+                np.clip(a, 0.0, 1.0, out=a)
+                dist = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+                keep = dist <= radius_km
+                row, dist, pos = row[keep], dist[keep], self.order[cand[keep]]
+                # 기준점별 (거리, 위치) 최소
+                o = np.lexsort((pos, dist, row))
+                row, dist, pos = row[o], dist[o], pos[o]
+                first = np.flatnonzero(np.concatenate(([True], row[1:] != row[:-1]))) if len(row) else row
+                out_pos[row[first]] = pos[first]
+                out_dist[row[first]] = dist[first]
+            b0 = b1
+        return out_pos, out_dist
+
+    def radius(
+        self, lat: float, lon: float, radius_km: float, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        반경 radius_km 이내 점 (위치, 거리 km)을 가까운 순으로 반환. 동률은 위치 순.
+        """
+        if self.n == 0 or radius_km is None or radius_km < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius_km)
+        iy0, ix0 = self._cell_of(min_lat, min_lon)
+        iy1, ix1 = self._cell_of(max_lat, max_lon)
+        cand = self._gather(iy0, iy1, ix0, ix1)
+        if mask is not None and len(cand):
+            cand = cand[mask[self.order[cand]]]
+        dist = self._dist(lat, lon, cand)
+        keep = dist <= radius_km
+        pos = self.order[cand[keep]]
+        dist = dist[keep]
+        o = np.lexsort((pos, dist))
+        return pos[o], dist[o]
+
+    def bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        위경도 사각형 안(경계 포함)의 점 위치를 오름차순으로 반환.
+        """
+        if self.n == 0 or min_lat > max_lat or min_lon > max_lon:
+            return np.empty(0, dtype=np.int64)
+        iy0, ix0 = self._cell_of(min_lat, min_lon)
+        iy1, ix1 = self._cell_of(max_lat, max_lon)
+        cand = self._gather(iy0, iy1, ix0, ix1)
+        if len(cand) == 0:
+            return cand
+        lat = self.lat_deg[cand]
+        lon = self.lon_deg[cand]
+        keep = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        pos = self.order[cand[keep]]
+        if mask is not None:
+            pos = pos[mask[pos]]
+        return np.sort(pos)
+
+
+# 격자 셀 k-최근접 후보표: 밀집 셀을 4등분하는 최대 단계 수
+_TABLE_MAX_DEPTH = 6
+
+
+def _corner_km(lat_lo: np.ndarray, lon_lo: np.ndarray, size: float) -> np.ndarray:
+    """
+    정사각 위경도 셀(한 변 size도)의 중심 → 가장 먼 꼭짓점까지 거리(km).
+    적도 쪽 변이 경도 폭이 더 넓으므로 위/아래 꼭짓점 중 큰 쪽.
+    """
+    half = size / 2.0
+    c_lat = np.radians(lat_lo + half)
+    out = np.zeros(len(lat_lo))
+    for corner in (lat_lo, lat_lo + size):
+        c2 = np.radians(corner)
+        a = np.sin((c2 - c_lat) * 0.5) ** 2 + np.cos(c_lat) * np.cos(c2) * np.sin(np.radians(half) * 0.5) ** 2
+        out = np.maximum(out, 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))))
+    return out
+
+
+def _reach_km(kth_km: np.ndarray, corner_km: np.ndarray) -> np.ndarray:
+    # r_k + 2h, 좌표 반올림으로 셀 경계 바깥에 떨어진 기준점까지 덮도록 약간 여유
+    return (kth_km + 2.0 * corner_km) * 1.001 + 1e-6
+
+
+class KnnCellTable:
+    """
+    GridIndex 격자 셀마다 "셀 안 어느 점에서든 k-최근접이 될 수 있는 점" 후보를 미리 모아 둔 표.
+    (데이터셋 버전마다 1회 생성, 이후 읽기 전용)
+
+    - 셀 중심 c의 k번째 거리 r_k(c), 중심→꼭짓점 거리 h에 대해 셀 안의 어떤 기준점 q도
+      k-최근접은 c에서 r_k(c) + 2h 이내에 있다 (삼각부등식). 그 원 안의 점이 셀의 후보.
+    - 후보가 max_candidates를 넘는 셀(밀집 지역)은 4등분한다. 하위 셀의 원은 상위 셀의 원 안에 있으므로
+      하위 셀 후보는 상위 셀 후보에서 거리로 걸러 만든다 (최대 _TABLE_MAX_DEPTH단).
+    - 점이 있는 셀만 표를 만든다. 빈 셀(바다 등), 격자 밖 기준점, k > self.k는 GridIndex.knn으로 넘긴다.
+    - knn(lat, lon, k)은 셀을 찾아 후보만 정확한 거리로 정렬한다 → GridIndex.knn과 결과가 같다.
+    - 노드마다 후보 원의 반지름(reach)을 두므로, 마스크(필터)가 있을 때도 후보 중 마스크 안의 k번째 점이
+      "기준점에서 원 안쪽까지 확실히 덮이는 거리" 이내면 그대로 답이 된다. 아니면 GridIndex.knn(mask)로 넘긴다.
+    """
+
+    def __init__(self, index: GridIndex, k: int = 20, max_candidates: Optional[int] = None):
+        self.index = index
+        self.k = min(int(k), index.n)
+        self.max_candidates = max_candidates or 4 * self.k + 32
+
+        # 노드 0..(ny*nx-1)은 격자 셀. child: -2 = 표 없음, -1 = 잎(후보 보유), 그 외 = 자식 4개의 첫 번호
+        # 자식 순서: (아래, 왼) (아래, 오른) (위, 왼) (위, 오른)
+        n_cells = index.ny * index.nx
+        self.child = np.full(n_cells, -2, dtype=np.int64)
+        self.off = np.zeros(n_cells, dtype=np.int64)
+        self.cnt = np.zeros(n_cells, dtype=np.int64)
+        self.reach = np.zeros(n_cells, dtype=np.float64)
+        self.depth = 0
+        cands = []
+        total = 0
+        if self.k > 0:
+            # 단계 0: 점이 있는 격자 셀마다 원 안의 후보
+            nodes = np.unique(index.keys)
+            size = index.cell_deg
+            lat_lo = index.lat0 + (nodes // index.nx) * size
+            lon_lo = index.lon0 + (nodes % index.nx) * size
+            _, kd = index.knn_batch(lat_lo + size / 2.0, lon_lo + size / 2.0, self.k)
+            reach = _reach_km(kd[:, -1], _corner_km(lat_lo, lon_lo, size))
+            self.reach[nodes] = reach
+            parts = [
+                self._within_km(la + size / 2.0, lo + size / 2.0, r)
+                for la, lo, r in zip(lat_lo.tolist(), lon_lo.tolist(), reach.tolist())
+            ]
+            counts = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+            cand = np.concatenate(parts)
+
+            # 단계마다: 후보가 많은 노드는 4등분, 나머지는 잎으로 확정 (같은 단계의 노드는 크기가 같다)
+            while True:
+                split = counts > self.max_candidates
+                if self.depth >= _TABLE_MAX_DEPTH:
+                    split[:] = False
+                seg = np.repeat(np.arange(len(nodes)), counts)
+                leaf = ~split
+                self.child[nodes[leaf]] = -1
+                self.off[nodes[leaf]] = total + np.cumsum(counts[leaf]) - counts[leaf]
+                self.cnt[nodes[leaf]] = counts[leaf]
+                leaf_cand = cand[leaf[seg]]
+                cands.append(leaf_cand.astype(np.int32))
+                total += len(leaf_cand)
+                if not split.any():
+                    break
+
+                s_idx = np.flatnonzero(split)
+                first = len(self.child)
+                n_new = 4 * len(s_idx)
+                self.child[nodes[s_idx]] = first + 4 * np.arange(len(s_idx))
+                self.child = np.concatenate((self.child, np.full(n_new, -1, dtype=np.int64)))
+                self.off = np.concatenate((self.off, np.zeros(n_new, dtype=np.int64)))
+                self.cnt = np.concatenate((self.cnt, np.zeros(n_new, dtype=np.int64)))
+                self.reach = np.concatenate((self.reach, np.zeros(n_new, dtype=np.float64)))
+
+                # 자식 후보 = 부모 후보 중 자식 원 안의 점 (부모별 구간은 seg 순으로 연속)
+                h = size / 2.0
+                in_split = split[seg]
+                pc = cand[in_split]
+                rank = np.full(len(nodes), -1, dtype=np.int64)
+                rank[s_idx] = np.arange(len(s_idx))
+                ps = rank[seg[in_split]]
+                p_starts = np.concatenate(([0], np.cumsum(counts[s_idx])[:-1]))
+                sub_lat = lat_lo[s_idx][:, None] + np.array((0.0, 0.0, h, h))[None, :]
+                sub_lon = lon_lo[s_idx][:, None] + np.array((0.0, h, 0.0, h))[None, :]
+                c_lat = np.radians(sub_lat + h / 2.0)
+                c_lon = np.radians(sub_lon + h / 2.0)
+                c_cos = np.cos(c_lat)
+                p_lat, p_lon, p_cos = index.lat_rad[pc], index.lon_rad[pc], index.cos_lat[pc]
+                ids, vals = [], []
+                for j in range(4):
+                    a = (
+                        np.sin((p_lat - c_lat[:, j][ps]) * 0.5) ** 2
+                        + c_cos[:, j][ps] * p_cos * np.sin((p_lon - c_lon[:, j][ps]) * 0.5) ** 2
+                    )
+                    d = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+                    # 부모 구간마다 k번째 거리 (자식 중심의 k-최근접은 부모 후보 안에 있다).
+                    # (부모 번호, 거리 mm 내림) 정수 키 한 번 정렬 → 올림한 k번째 거리는 실제 이상이라 안전하다
+                    key = np.sort((ps << 42) | (d * 1e6).astype(np.int64))
+                    kth = ((key[p_starts + self.k - 1] & ((1 << 42) - 1)) + 1) / 1e6
+                    r = _reach_km(kth, _corner_km(sub_lat[:, j], sub_lon[:, j], h))
+                    keep = d <= r[ps]
+                    self.reach[first + 4 * np.arange(len(s_idx)) + j] = r
+                    ids.append(4 * ps[keep] + j)
+                    vals.append(pc[keep])
+                ids = np.concatenate(ids)
+                o = np.argsort(ids, kind="stable")
+                cand = np.concatenate(vals)[o]
+                counts = np.bincount(ids, minlength=n_new)
+                nodes = first + np.arange(n_new)
+                lat_lo, lon_lo = sub_lat.ravel(), sub_lon.ravel()
+                size = h
+                self.depth += 1
+
+        # 후보는 GridIndex 정렬 배열 기준 위치 (거리 계산용 배열을 그대로 쓰기 위해)
+        self.cand = np.concatenate(cands) if cands else np.empty(0, dtype=np.int32)
+
+    _STATE_ARRAYS = ("child", "off", "cnt", "reach", "cand")
+    _STATE_SCALARS = ("k", "max_candidates", "depth")
+
+    def state(self, prefix: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        (배열들 {prefix.이름: 배열}, 스칼라 dict) — from_state로 같은 표를 다시 만든다 (GridIndex는 따로 저장).
+        """
+        arrays = {f"{prefix}.{name}": getattr(self, name) for name in self._STATE_ARRAYS}
+        return arrays, {name: getattr(self, name) for name in self._STATE_SCALARS}
+
+    @classmethod
+    def from_state(
+        cls, index: GridIndex, arrays: Dict[str, np.ndarray], scalars: Dict[str, Any], prefix: str
+    ) -> "KnnCellTable":
+        """
+        state()로 저장한 배열(읽기 전용 mmap 뷰여도 됨)과 같은 GridIndex로 표 복원. 재계산 없음.
+        """
+        table = cls.__new__(cls)
+        table.index = index
+        for name in cls._STATE_ARRAYS:
+            setattr(table, name, arrays[f"{prefix}.{name}"])
+        for name in cls._STATE_SCALARS:
+            setattr(table, name, scalars[name])
+        return table
+
+    def _within_km(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        idx = self.index
+        min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius_km)
+        iy0, ix0 = idx._cell_of(min_lat, min_lon)
+        iy1, ix1 = idx._cell_of(max_lat, max_lon)
+        cand = idx._gather(iy0, iy1, ix0, ix1)
+        return cand[idx._dist(lat, lon, cand) <= radius_km]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.child.nbytes + self.off.nbytes + self.cnt.nbytes + self.reach.nbytes + self.cand.nbytes)
+
+    def stats(self) -> dict:
+        leaves = self.child == -1
+        return {
+            "k": self.k,
+            "cells": self.index.ny * self.index.nx,
+            "cells_with_table": int(np.count_nonzero(self.child[: self.index.ny * self.index.nx] != -2)),
+            "nodes": len(self.child),
+            "depth": self.depth,
+            "candidates": len(self.cand),
+            "max_candidates_per_cell": int(self.cnt[leaves].max()) if leaves.any() else 0,
+            "bytes": self.nbytes,
+        }
+
+    def knn(self, lat: float, lon: float, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        GridIndex.knn과 같은 결과 (가까운 순, 동률은 위치 순). mask는 GridIndex.knn과 같은 뜻.
+        """
+        idx = self.index
+        if k is None or k <= 0 or k > self.k:
+            return idx.knn(lat, lon, k, mask)
+        _require_finite(lat, lon)
+        iy, ix = idx._cell_of(lat, lon)
+        if not (0 <= iy < idx.ny and 0 <= ix < idx.nx) or self.child[iy * idx.nx + ix] == -2:
+            return idx.knn(lat, lon, k, mask)
+        node = iy * idx.nx + ix
+        lat_lo = idx.lat0 + iy * idx.cell_deg
+        lon_lo = idx.lon0 + ix * idx.cell_deg
+        size = idx.cell_deg
+        while self.child[node] >= 0:
+            size /= 2.0
+            up = lat >= lat_lo + size
+            right = lon >= lon_lo + size
+            lat_lo += size if up else 0.0
+            lon_lo += size if right else 0.0
+            node = int(self.child[node]) + 2 * up + right
+        o = int(self.off[node])
+        cand = self.cand[o:o + int(self.cnt[node])]
+        pos = idx.order[cand]
+        if mask is not None:
+            keep = mask[pos]
+            cand, pos = cand[keep], pos[keep]
+            if len(cand) < k:
+                return idx.knn(lat, lon, k, mask)
+        dist = idx._dist(lat, lon, cand)
+        top = np.lexsort((pos, dist))[:k]
+        if mask is not None:
+            # 기준점 q에서 반경 reach - d(q, 중심) 안의 점은 모두 후보 → k번째가 그 안이면 정답 (반올림 여유를 둔다)
+            half = size / 2.0
+            to_center = float(haversine_km_prepared(
+                lat, lon, np.radians([lat_lo + half]), np.radians([lon_lo + half]), np.cos(np.radians([lat_lo + half]))
+            )[0])
+            if dist[top[-1]] > self.reach[node] / 1.001 - to_center - 1e-6:
+                return idx.knn(lat, lon, k, mask)
+        return pos[top], dist[top]
+
+
+# ----------------------------
+# 반경 내 점 묶기 (중복 시설 병합용)
+# ----------------------------
+def pairs_within(lats, lons, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    하버사인 거리 radius_km 이내인 점 쌍 (i, j), i < j 를 모두 반환.
+    한 변이 반경 이상인 격자에 점을 해시해 두고 자기 셀 + 이웃 8셀만 비교하므로 전체 쌍 비교를 하지 않는다.
+    """
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    n = len(lats)
+    if n < 2 or radius_km is None or radius_km < 0:
+        return empty
+
+    # 셀 크기(도): 위도는 반경 그대로, 경도는 가장 높은 위도에서도 반경을 덮도록 넓힌다
+    cell_lat = max(radius_km / KM_PER_DEG_LAT, 1e-9)
+    cos_m = cos(radians(min(float(np.abs(lats).max()), 89.0)))
+    cell_lon = cell_lat / cos_m
+    iy = np.floor((lats - lats.min()) / cell_lat).astype(np.int64)
+    ix = np.floor((lons - lons.min()) / cell_lon).astype(np.int64)
+    nx = int(ix.max()) + 3
+    keys = (iy + 1) * nx + (ix + 1)
+    order = np.argsort(keys, kind="stable")
+    skeys = keys[order]
+
+    lat_rad, lon_rad, cos_lat = prepare_latlon(lats, lons)
+    out_i, out_j = [], []
+    # 정렬된 키 순서로 이웃 셀을 찾는다 (정렬된 질의라 searchsorted가 훨씬 빠르다)
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            nk = skeys + (dy * nx + dx)
+            lo = np.searchsorted(skeys, nk, side="left")
+            cnt = np.searchsorted(skeys, nk, side="right") - lo
+            total = int(cnt.sum())
+            if total == 0:
+                continue
+            i = np.repeat(order, cnt)
+            j = order[np.repeat(lo - np.concatenate(([0], np.cumsum(cnt)[:-1])), cnt) + np.arange(total, dtype=np.int64)]
+            keep = i < j
+            i, j = i[keep], j[keep]
+            a = (
+                np.sin((lat_rad[j] - lat_rad[i]) * 0.5) ** 2
+                + cos_lat[i] * cos_lat[j] * np.sin((lon_rad[j] - lon_rad[i]) * 0.5) ** 2
+            )
+            np.clip(a, 0.0, 1.0, out=a)
+            near = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)) <= radius_km
+            out_i.append(i[near])
+            out_j.append(j[near])
+    if not out_i:
+        return empty
+    return np.concatenate(out_i), np.concatenate(out_j)
+
+
+def match_nearest_within(lats_a, lons_a, lats_b, lons_b, radius_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    A 점과 B 점을 반경 radius_km 안에서 1:1로 짝짓는다: 반경 안의 (A, B) 쌍을 거리 오름차순
+    (동률은 A 위치, B 위치 순)으로 보며 둘 다 아직 짝이 없을 때만 짝으로 정한다 (가까운 쌍 우선 greedy).
+    A 하나에 B가 여럿 붙거나 A-A / B-B가 이어지는 일은 없다.
+    반환: (A 위치, B 위치, 거리 km) — A 위치 오름차순.
+    """
+    lats_a = np.asarray(lats_a, dtype=np.float64)
+    lats_b = np.asarray(lats_b, dtype=np.float64)
+    na = len(lats_a)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    if na == 0 or len(lats_b) == 0:
+        return empty
+    lats = np.concatenate([lats_a, lats_b])
+    lons = np.concatenate([np.asarray(lons_a, dtype=np.float64), np.asarray(lons_b, dtype=np.float64)])
+    i, j = pairs_within(lats, lons, radius_km)
+    # pairs_within은 i < j → A-B 쌍은 i가 A, j가 B
+    cross = (i < na) & (j >= na)
+    ia, ib = i[cross], j[cross] - na
+    if len(ia) == 0:
+        return empty
+    lat_rad, lon_rad, cos_lat = prepare_latlon(lats, lons)
+    jb = ib + na
+    h = (
+        np.sin((lat_rad[jb] - lat_rad[ia]) * 0.5) ** 2
+        + cos_lat[ia] * cos_lat[jb] * np.sin((lon_rad[jb] - lon_rad[ia]) * 0.5) ** 2
+    )
+    np.clip(h, 0.0, 1.0, out=h)
+    dist = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+    order = np.lexsort((ib, ia, dist))
+    used_a = np.zeros(na, dtype=bool)
+    used_b = np.zeros(len(lats_b), dtype=bool)
+    keep = []
+    # 반경 안 쌍은 보통 점 수와 비슷한 규모라 파이썬 루프로 충분하다
+    for k, a, b in zip(order.tolist(), ia[order].tolist(), ib[order].tolist()):
+        if not used_a[a] and not used_b[b]:
+            used_a[a] = used_b[b] = True
+            keep.append(k)
+    keep = np.array(keep, dtype=np.int64)
+    keep = keep[np.argsort(ia[keep], kind="stable")]
+    return ia[keep], ib[keep], dist[keep]
@@ -0,0 +1,91 @@
+"""
+랭크 CSV 콜드 스타트 읽기 벤치마크: 인코딩 판별 + 열 캐시(app/utils/csv_cache_util).
+
+- legacy : 인코딩 4개를 pd.read_csv로 차례로 시도 (예전 _safe_read_csv) — cp949 파일은 utf-8 파싱 실패 후 다시 파싱
+- detect : detect_encoding으로 한 번 판별 + pd.read_csv 한 번 (캐시 없이)
+- ingest : 캐시가 없을 때의 read_csv_cached (판별 + 파싱 + .npy 쓰기)
+- cached : 캐시가 있을 때의 read_csv_cached (내용 해시 + memmap 읽기, 판별/파싱 없음)
+
+USER/ADMIN 파일을 utf-8 / cp949 사본으로 임시 디렉터리에 만든 뒤 잰다. 마지막에 두 파일로
+랭크 테이블 전체 적재(shelter_rank_service.reload)를 캐시 없음/있음으로 잰다.
+
+실행: python -m benchmarks.bench_csv_cache [USER CSV] [ADMIN CSV]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from app.services import shelter_rank_service as rank
+from app.utils import csv_cache_util as cache
+
+
+def _legacy(path):
+    for enc in cache.ENCODINGS:
+        try:
+            return pd.read_csv(path, encoding=enc)
+        except Exception:
+            pass
+    return None
+
+
+def _detect(path):
+    return pd.read_csv(path, encoding=cache.detect_encoding(path))
+
+
+def _ingest(path):
+    shutil.rmtree(os.path.join(os.path.dirname(path), cache.CACHE_DIR_NAME), ignore_errors=True)
+    return cache.read_csv_cached(path)
+
+
+def _timed(fn, path, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best, df
+
+
+def main():
+    user = sys.argv[1] if len(sys.argv) > 1 else "data/shelters_rank_user_all.csv"
+    admin = sys.argv[2] if len(sys.argv) > 2 else "data/shelters_rank_admin_all.csv"
+    work = tempfile.mkdtemp(prefix="bench_csv_cache_")
+    try:
+        copies = {}
+        for label, src in (("user", user), ("admin", admin)):
+            df = pd.read_csv(src)
+            for enc in ("utf-8", "cp949"):
+                path = os.path.join(work, f"{label}_{enc}.csv")
+                df.to_csv(path, index=False, encoding=enc)
+                copies[(label, enc)] = path
+
+        print(f"  {'file':<14} {'rows':>8} {'MB':>6} {'legacy':>9} {'detect':>9} {'ingest':>9} {'cached':>9} {'vs legacy':>10}")
+        for (label, enc), path in copies.items():
+            t_legacy, ref = _timed(_legacy, path)
+            t_detect, _ = _timed(_detect, path)
+            t_ingest, _ = _timed(_ingest, path)
+            t_cached, df = _timed(cache.read_csv_cached, path)
+            pd.testing.assert_frame_equal(df, ref)
+            mb = os.path.getsize(path) / 1e6
+            print(
+                f"  {label + '/' + enc:<14} {len(ref):>8,} {mb:>6.1f} {t_legacy * 1e3:>7.1f}ms {t_detect * 1e3:>7.1f}ms "
+                f"{t_ingest * 1e3:>7.1f}ms {t_cached * 1e3:>7.1f}ms {t_legacy / t_cached:>9.1f}x"
+            )
+
+        # 랭크 테이블 전체 적재 (cp949 사본): 캐시 없음 → 있음
+        rank.USER_ALL_CSV, rank.ADMIN_ALL_CSV = copies[("user", "cp949")], copies[("admin", "cp949")]
+        shutil.rmtree(os.path.join(work, cache.CACHE_DIR_NAME), ignore_errors=True)
+        for name in ("rank load (no cache)", "rank load (cached)"):
+            t0 = time.perf_counter()
+            rank.reload()
+            print(f"{name}: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+CSV 대피소 응답 직렬화 벤치마크 (limit = 20 / 100 / 500).
+
+- legacy : df.iloc 행 → row.to_dict() 기반 payload → ShelterCSVResponse(**payload) 검증,
+           FastAPI response_model 처리(model_dump → 재검증 → JSON 인코딩) + json.dumps
+- current: 스냅샷의 열 배열에서 model_construct로 생성 + shelters_json(검증 없는 pydantic-core 직렬화)
+
+두 경로 모두 같은 스냅샷 / 같은 행 위치(priority 상위 limit개)를 쓰므로 정렬·색인 비용은 빠지고
+행 → 응답 바이트 변환 비용만 비교된다.
+
+실행: python -m benchmarks.bench_csv_serialization [CSV 경로]
+"""
+import asyncio
+import json
+import sys
+import time
+from typing import List
+
+import pandas as pd
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.shelter_csv_schema import ShelterCSVResponse
+from app.services.shelter_csv_service import (
+    ADMIN_CSV, _assign_row_ids, _get_snapshot, _normalize_coord_columns, _safe_read_csv, shelters_json,
+)
+from app.utils.geo_util import top_k_smallest
+
+LIMITS = (20, 100, 500)
+REPEAT = 20
+
+
+def _legacy_payload(row: pd.Series) -> dict:
+    # 기존 _row_to_payload와 같은 행 단위 변환 (pick_first + pd.isna + float/int 캐스팅)
+    r = row.to_dict()
+
+    def pick(*keys):
+        for k in keys:
+            if k in r and r[k] not in (None, "", "NaN"):
+                return r[k]
+        return None
+
+    def f(x):
+        try:
+            v = float(x)
+            return None if v != v else v
+        except Exception:
+            return None
+
+    def i(x):
+        try:
+            return None if pd.isna(x) else int(float(x))
+        except Exception:
+            return None
+
+    def s(x, empty=None):
+        if x is None or pd.isna(x):
+            return empty
+        x = str(x).strip()
+        return x if x != "" else empty
+
+    return {
+        "id": r.get("id"), "source": s(r.get("source")), "HCODE": i(r.get("HCODE")),
+        "SIGUNGU": s(r.get("SIGUNGU")), "EUPMYEON": s(r.get("EUPMYEON")),
+        "facility_name": s(pick("facility_name", "name", "REARE_NM", "MGC_NM"), ""),
+        "road_address": s(pick("road_address", "address")),
+        "shelter_type_name": s(pick("shelter_type_name", "type_name")),
+        "shelter_type_code": i(pick("shelter_type_code", "type_code")),
+        "assigned_pop": f(r.get("assigned_pop")), "capacity_est": f(r.get("capacity_est")),
+        "p_elderly": f(r.get("p_elderly")), "p_child": f(r.get("p_child")), "vuln": f(r.get("vuln")),
+        "recommend_score": f(r.get("recommend_score")),
+        "priority": f(pick("priority", "PRIORITY", "admin_priority")),
+        "latitude": f(pick("latitude", "lat", "LAT")), "longitude": f(pick("longitude", "lon", "LOT")),
+        "distance_km": None,
+    }
+
+
+_FIELD = create_model_field(name="Response", type_=List[ShelterCSVResponse], mode="serialization")
+
+
+def _legacy_frame(snap) -> pd.DataFrame:
+    # 스냅샷은 DataFrame을 들고 있지 않으므로 legacy 경로용 geo 프레임을 따로 만든다 (id / 등급은 스냅샷 값)
+    df = _normalize_coord_columns(_assign_row_ids(_safe_read_csv(snap.path)))
+    df["id"] = snap.ids[snap.geo_rows]
+    grade_col = snap.grade_col("priority")
+    df[grade_col] = snap.grade_labels(grade_col, slice(None))
+    return df
+
+
+def _legacy(snap, df, top) -> bytes:
+    grade_col = snap.grade_col("priority")
+    items = []
+    for p in top:
+        row = df.iloc[p]
+        payload = _legacy_payload(row)
+        g = row[grade_col]
+        payload["priority_grade"] = None if pd.isna(g) else str(g)
+        items.append(ShelterCSVResponse(**payload))
+    content = asyncio.run(serialize_response(field=_FIELD, response_content=items, is_coroutine=False))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _current(snap, top) -> bytes:
+    items = snap.responses(top, {
+        "distance_km": [None] * len(top),
+        "priority_grade": snap.grade_labels(snap.grade_col("priority"), top),
+    })
+    return shelters_json(items)
+
+
+def _timeit(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else ADMIN_CSV
+    snap = _get_snapshot(path)
+    df = _legacy_frame(snap)
+    print(f"{path}: {len(df):,} rows, best of {REPEAT}")
+    print(f"  {'limit':>5} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for limit in LIMITS:
+        top = top_k_smallest(snap.priority_rank, limit)
+        assert json.loads(_legacy(snap, df, top)) == json.loads(_current(snap, top))
+        a = _timeit(lambda: _legacy(snap, df, top))
+        b = _timeit(lambda: _current(snap, top))
+        print(f"  {limit:>5} {a:>10.2f} {b:>11.2f} {a / b:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
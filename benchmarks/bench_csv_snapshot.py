@@ -0,0 +1,106 @@
+"""
+CSV 스냅샷 워커별 메모리 벤치마크: 워커마다 CSV에서 직접 만들기 vs 공유 스냅샷 파일 mmap.
+
+워커 N개(별도 프로세스)가 각각 CSV 스냅샷과 근접 후보표를 적재하고 스냅샷이 들고 있는 배열을 모두 한 번씩
+읽은 뒤, /proc/self/smaps_rollup의 Private(그 워커만의 메모리)와 Pss(공유 페이지를 나눠 가진 몫)를
+적재 전 대비 증가분으로 보고한다. 초성/오타 검색 인덱스(NameSearchIndex)는 두 모드 모두 워커별이라 뺐다.
+(Linux 전용)
+
+실행: python -m benchmarks.bench_csv_snapshot [CSV 경로] [워커 수]
+"""
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _rollup():
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                out[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "private": out.get("Private_Clean", 0) + out.get("Private_Dirty", 0),
+        "pss": out.get("Pss", 0),
+    }
+
+
+def _touch(obj, seen):
+    # 스냅샷이 참조하는 숫자 배열을 모두 한 번 읽는다 (mmap은 읽은 페이지만 RSS에 잡힌다)
+    import numpy as np
+
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        if not obj.dtype.hasobject and obj.size:
+            obj.reshape(-1).view(np.uint8).sum()
+        return
+    if isinstance(obj, dict):
+        items = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        items = obj if len(obj) < 64 else ()
+    elif hasattr(obj, "__dict__"):
+        items = vars(obj).values()
+    else:
+        return
+    for v in items:
+        _touch(v, seen)
+
+
+def _worker(path, snapshot, start, results, done):
+    from app.services import shelter_csv_service as csv
+
+    csv.CSV_SNAPSHOT = snapshot
+    before = _rollup()
+    t0 = time.perf_counter()
+    snap = csv._load_snapshot(path, 1)
+    snap.knn_table = csv._load_knn_table(snap)
+    load_s = time.perf_counter() - t0
+    _touch(snap, set())
+    start.wait()  # 모두 적재한 뒤에 재야 Pss가 공유 몫으로 나뉜다
+    after = _rollup()
+    results.put((load_s, after["private"] - before["private"], after["pss"] - before["pss"]))
+    done.wait()
+
+
+def _run(path, snapshot, n):
+    ctx = mp.get_context("spawn")
+    start, done, results = ctx.Barrier(n), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(path, snapshot, start, results, done)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main():
+    src = sys.argv[1] if len(sys.argv) > 1 else "data/shelters_rank_user_all.csv"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    work = tempfile.mkdtemp(prefix="bench_csv_snapshot_")
+    try:
+        path = os.path.join(work, os.path.basename(src))
+        shutil.copy(src, path)
+        _run(path, "auto", 1)  # 스냅샷/후보표 파일과 열 캐시를 미리 만들어 둔다
+
+        print(f"workers={n}")
+        print(f"  {'mode':<10} {'load (s)':>9} {'private/worker (MB)':>20} {'pss/worker (MB)':>16} {'pss total (MB)':>15}")
+        for mode, snapshot in (("csv", "0"), ("snapshot", "auto")):
+            rows = _run(path, snapshot, n)
+            load = max(r[0] for r in rows)
+            private = sum(r[1] for r in rows) / n / 1e6
+            pss = sum(r[2] for r in rows) / 1e6
+            print(f"  {mode:<10} {load:>9.2f} {private:>20.1f} {pss / n:>16.1f} {pss:>15.1f}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+공용 거리 커널(app.utils.geo_util) 마이크로벤치마크.
+
+기존 서비스들이 쓰던 행 단위 math 하버사인 호출과
+geo_util의 스칼라 / 배열 하버사인 / 배열 등장방형 근사를 같은 점 집합에서 비교하고,
+등장방형 근사의 하버사인 대비 최대 상대오차도 함께 출력한다.
+
+실행: python -m benchmarks.bench_geo_kernel
+"""
+import time
+from math import radians, sin, cos, asin, sqrt
+
+import numpy as np
+
+from app.utils.geo_util import (
+    EARTH_RADIUS_KM,
+    equirect_km_prepared,
+    haversine_km,
+    haversine_km_prepared,
+    prepare_latlon,
+)
+
+N = 100_000
+REPEAT = 5
+
+
+def _legacy_calculate_distance(lat1, lon1, lat2, lon2):
+    # shelter_handler / hospital_handler 에 있던 구현 그대로
+    R = 6371
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * asin(sqrt(a))
+    return R * c
+
+
+def _timeit(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _equirect_error(rng: np.random.Generator, max_km: float, lat0: float) -> float:
+    n = 200_000
+    d = rng.uniform(0.05, max_km, n)
+    th = rng.uniform(0.0, 2.0 * np.pi, n)
+    lats = lat0 + np.degrees(d * np.cos(th) / EARTH_RADIUS_KM)
+    lons = 127.0 + np.degrees(d * np.sin(th) / EARTH_RADIUS_KM / np.cos(np.radians(lat0)))
+    lat_rad, lon_rad, cos_lat = prepare_latlon(lats, lons)
+    h = haversine_km_prepared(lat0, 127.0, lat_rad, lon_rad, cos_lat)
+    e = equirect_km_prepared(lat0, 127.0, lat_rad, lon_rad)
+    return float(np.max(np.abs(e - h) / h))
+
+
+def main():
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(33.1, 38.6, N)
+    lons = rng.uniform(124.6, 131.9, N)
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+    lat_rad, lon_rad, cos_lat = prepare_latlon(lats, lons)
+    q = (37.5665, 126.9780)
+
+    rows = [
+        ("legacy per-row math", lambda: [_legacy_calculate_distance(q[0], q[1], a, b) for a, b in zip(lat_list, lon_list)]),
+        ("geo_util.haversine_km per-row", lambda: [haversine_km(q[0], q[1], a, b) for a, b in zip(lat_list, lon_list)]),
+        ("geo_util.haversine_km_prepared", lambda: haversine_km_prepared(q[0], q[1], lat_rad, lon_rad, cos_lat)),
+        ("geo_util.equirect_km_prepared", lambda: equirect_km_prepared(q[0], q[1], lat_rad, lon_rad)),
+    ]
+    print(f"{N:,} points, best of {REPEAT}")
+    for name, fn in rows:
+        print(f"  {name:<34} {_timeit(fn):>9.2f} ms")
+
+    print("equirect max relative error vs haversine")
+    for lat0 in (35.0, 60.0):
+        errs = ", ".join(f"<= {km:g}km: {_equirect_error(rng, km, lat0):.1e}" for km in (10, 50, 100))
+        print(f"  lat {lat0:g}: {errs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+셀별 k-최근접 후보표 벤치마크 (k = 20).
+
+- GridIndex.knn    : 셀 사각형을 넓혀 가며 후보를 모아 정렬
+- KnnCellTable.knn : 기준점 셀(하위 셀)의 미리 모은 후보만 정렬
+기준점은 데이터 점 주변(사용자가 실제로 있는 곳)과 전체 범위 균일(바다 등 빈 셀 포함 → 후보표 없음)
+두 묶음으로 나눠 잰다.
+두 결과가 같은지도 함께 확인하고, 후보표 생성 시간과 메모리를 출력한다.
+
+실행: python -m benchmarks.bench_knn_table [CSV 경로]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.shelter_csv_service import USER_CSV, _get_snapshot
+from app.utils.spatial_index_util import KnnCellTable
+
+K = 20
+QUERIES = 5_000
+
+
+def _per_query_us(fn, queries) -> float:
+    t0 = time.perf_counter()
+    for lat, lon in queries:
+        fn(lat, lon, K)
+    return (time.perf_counter() - t0) / len(queries) * 1e6
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else USER_CSV
+    snap = _get_snapshot(path)
+    lat = snap.latitude
+    lon = snap.longitude
+    idx = snap.index
+
+    t0 = time.perf_counter()
+    table = KnnCellTable(idx, K)
+    build_s = time.perf_counter() - t0
+
+    rng = np.random.default_rng(7)
+    near = rng.integers(0, len(lat), QUERIES)
+    groups = {
+        "near data": list(zip(
+            (lat[near] + rng.normal(0, 0.005, QUERIES)).tolist(),
+            (lon[near] + rng.normal(0, 0.005, QUERIES)).tolist(),
+        )),
+        "uniform": list(zip(
+            rng.uniform(lat.min(), lat.max(), QUERIES).tolist(),
+            rng.uniform(lon.min(), lon.max(), QUERIES).tolist(),
+        )),
+    }
+    for queries in groups.values():
+        for a, b in queries[::50]:
+            p1, d1 = idx.knn(a, b, K)
+            p2, d2 = table.knn(a, b, K)
+            assert np.array_equal(p1, p2) and np.array_equal(d1, d2)
+
+    print(f"{path}: {len(lat):,} shelters, {QUERIES:,} queries per group, k={K}")
+    print(f"  table build {build_s:.2f} s, {table.stats()}")
+    print(f"  {'queries':<10} {'GridIndex.knn':>14} {'KnnCellTable.knn':>17}  (us/query)")
+    for name, queries in groups.items():
+        print(f"  {name:<10} {_per_query_us(idx.knn, queries):>14.1f} {_per_query_us(table.knn, queries):>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+일괄 근접 조회 벤치마크 (기준점 10,000개, limit = 5 / 20).
+
+- per-point : 기준점마다 get_nearby_from_csv 호출 (지금 클라이언트가 /shelters/csv/nearby를 반복 호출하는 것과 같은 서비스 비용)
+- knn loop  : GridIndex.knn을 기준점마다 호출 (인덱스 비용만)
+- knn_batch : GridIndex.knn_batch 한 번 (인덱스 비용만)
+- ndjson    : nearby_batch_ndjson 전체 (knn_batch + 응답 생성 + NDJSON 직렬화)
+
+실행: python -m benchmarks.bench_nearby_batch [CSV 경로]
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.shelter_csv_service import USER_CSV, _get_snapshot, get_nearby_from_csv, nearby_batch_ndjson
+
+POINTS = 10_000
+LIMITS = (5, 20)
+
+
+def _timeit(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else USER_CSV
+    snap = _get_snapshot(path)
+    rng = np.random.default_rng(11)
+    lats = rng.uniform(snap.latitude.min(), snap.latitude.max(), POINTS)
+    lons = rng.uniform(snap.longitude.min(), snap.longitude.max(), POINTS)
+    points = [SimpleNamespace(latitude=a, longitude=b, key=None) for a, b in zip(lats.tolist(), lons.tolist())]
+    idx = snap.index
+
+    print(f"{path}: {snap.require_geo():,} shelters, {POINTS:,} points")
+    print(f"  {'limit':>5} {'per-point':>11} {'knn loop':>10} {'knn_batch':>10} {'ndjson':>10}  (ms)")
+    for limit in LIMITS:
+        # 결과 동일성: knn_batch 각 행 == knn
+        pos, dist = idx.knn_batch(lats, lons, limit)
+        for i in range(0, POINTS, 97):
+            p, d = idx.knn(lats[i], lons[i], limit)
+            assert np.array_equal(p, pos[i]) and np.array_equal(d, dist[i])
+
+        per_point = _timeit(lambda: [get_nearby_from_csv(path, a, b, limit) for a, b in zip(lats, lons)])
+        knn_loop = _timeit(lambda: [idx.knn(a, b, limit) for a, b in zip(lats, lons)])
+        knn_batch = _timeit(lambda: idx.knn_batch(lats, lons, limit))
+        ndjson = _timeit(lambda: b"".join(nearby_batch_ndjson(path, points, limit)))
+        print(f"  {limit:>5} {per_point:>11.1f} {knn_loop:>10.1f} {knn_batch:>10.1f} {ndjson:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
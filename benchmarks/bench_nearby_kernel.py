@@ -0,0 +1,74 @@
+"""
+CSV 근접 조회 거리 커널 벤치마크.
+
+기존 방식(df.apply 행 단위 하버사인 + 전체 정렬 + head)과
+벡터 하버사인 + argpartition top-k(app.utils.geo_util)를 1k / 100k / 1M 대피소 규모에서 비교한다.
+
+실행: python -m benchmarks.bench_nearby_kernel
+"""
+import time
+from math import radians, sin, cos, asin, sqrt
+
+import numpy as np
+import pandas as pd
+
+from app.utils.geo_util import haversine_km_prepared, prepare_latlon, top_k_smallest
+
+SIZES = (1_000, 100_000, 1_000_000)
+LIMIT = 20
+QUERIES = 20
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    R = 6371.0
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2.0) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2.0) ** 2
+    return R * 2.0 * asin(sqrt(a))
+
+
+def _make_points(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    # 대한민국 대략 범위
+    return pd.DataFrame({
+        "latitude": rng.uniform(33.1, 38.6, n),
+        "longitude": rng.uniform(124.6, 131.9, n),
+    })
+
+
+def _bench(fn, queries) -> float:
+    t0 = time.perf_counter()
+    for lat, lon in queries:
+        fn(lat, lon)
+    return (time.perf_counter() - t0) / len(queries) * 1000.0
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>10} | {'apply+sort (ms)':>16} | {'numpy+sort (ms)':>16} | {'numpy+top-k (ms)':>17}")
+    for n in SIZES:
+        df = _make_points(n, rng)
+        lat_rad, lon_rad, cos_lat = prepare_latlon(df["latitude"], df["longitude"])
+        queries = list(zip(rng.uniform(34.0, 38.0, QUERIES), rng.uniform(126.0, 129.0, QUERIES)))
+
+        def legacy(lat, lon):
+            d = df.apply(lambda r: _haversine_km(lat, lon, float(r["latitude"]), float(r["longitude"])), axis=1)
+            return d.sort_values().head(LIMIT)
+
+        def full_sort(lat, lon):
+            d = haversine_km_prepared(lat, lon, lat_rad, lon_rad, cos_lat)
+            return np.argsort(d, kind="stable")[:LIMIT]
+
+        def top_k(lat, lon):
+            d = haversine_km_prepared(lat, lon, lat_rad, lon_rad, cos_lat)
+            return top_k_smallest(d, LIMIT)
+
+        # 행 단위 apply는 1M에서 수십 초가 걸리므로 쿼리 수를 줄여 측정
+        legacy_q = queries if n <= 100_000 else queries[:2]
+        print(
+            f"{n:>10,} | {_bench(legacy, legacy_q):>16.2f} | "
+            f"{_bench(full_sort, queries):>16.2f} | {_bench(top_k, queries):>17.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+랭크 인덱스(shelter_rank_service) 생성 벤치마크: 병합된 USER/ADMIN CSV 기준.
+
+- legacy : iterrows로 행마다 payload dict + (lat, lon) 라운딩 키 dict + 좌표 튜플 리스트,
+           등급은 Series.apply로 행마다 계산
+- current: _RankTable (factorize 코드 + float64 열 + int8 등급 + 정렬된 int64 키 배열)
+
+CSV 읽기/병합은 두 경로가 같으므로 따로 재고, 인덱스 생성 시간과
+생성 후 남는 메모리(tracemalloc, 병합 프레임 제외)를 비교한다.
+
+실행: python -m benchmarks.bench_rank_index [USER CSV] [ADMIN CSV]
+"""
+import gc
+import math
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.services import shelter_rank_service as rank
+
+
+def _legacy_norm_num(x):
+    try:
+        v = float(x)
+        return v if math.isfinite(v) else None
+    except Exception:
+        return None
+
+
+def _legacy_payload(row: pd.Series) -> dict:
+    return {
+        "id": row.get("id"),
+        "source": row.get("source"),
+        "HCODE": row.get("HCODE"),
+        "SIGUNGU": row.get("SIGUNGU"),
+        "EUPMYEON": row.get("EUPMYEON"),
+        "facility_name": row.get("name") or row.get("REARE_NM") or row.get("MGC_NM"),
+        "road_address": row.get("address"),
+        "shelter_type_name": row.get("type_name"),
+        "shelter_type_code": row.get("type_code"),
+        "assigned_pop": _legacy_norm_num(row.get("assigned_pop")),
+        "capacity_est": _legacy_norm_num(row.get("capacity_est")),
+        "p_elderly": _legacy_norm_num(row.get("p_elderly")),
+        "p_child": _legacy_norm_num(row.get("p_child")),
+        "vuln": _legacy_norm_num(row.get("vuln")),
+        "pressure": _legacy_norm_num(row.get("pressure")),
+        "recommend_score": _legacy_norm_num(row.get("recommend_score")),
+        "priority": _legacy_norm_num(row.get("priority")),
+        "latitude": _legacy_norm_num(row.get("lat")),
+        "longitude": _legacy_norm_num(row.get("lon")),
+    }
+
+
+def _legacy_build(merged: pd.DataFrame):
+    merged = merged.copy()
+    merged["grade_user"] = merged["recommend_score"].apply(rank._grade_user)
+    merged["grade_admin"] = merged["priority"].apply(rank._grade_admin)
+    idx, rows, latlon = {}, [], []
+    for _, row in merged.iterrows():
+        lat = _legacy_norm_num(row.get("lat")); lon = _legacy_norm_num(row.get("lon"))
+        if lat is None or lon is None:
+            continue
+        payload = _legacy_payload(row)
+        idx[(round(lat, 5), round(lon, 5))] = payload
+        rows.append(payload)
+        latlon.append((lat, lon))
+    return idx, rows, latlon
+
+
+def _measure(build, merged):
+    # 시간과 메모리는 따로 잰다 (tracemalloc이 켜져 있으면 할당이 많은 legacy가 몇 배 느려진다)
+    gc.collect()
+    t0 = time.perf_counter()
+    result = build(merged)
+    elapsed = time.perf_counter() - t0
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build(merged)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+def main():
+    user_csv = sys.argv[1] if len(sys.argv) > 1 else rank.USER_ALL_CSV
+    admin_csv = sys.argv[2] if len(sys.argv) > 2 else rank.ADMIN_ALL_CSV
+
+    t0 = time.perf_counter()
+    merged = rank._merge_user_admin(rank._safe_read_csv(user_csv), rank._safe_read_csv(admin_csv))
+    read_s = time.perf_counter() - t0
+    print(f"merged rows={len(merged):,} (CSV read + merge {read_s:.2f} s, shared by both)")
+
+    print(f"  {'':<8} {'build (s)':>10} {'retained (MB)':>14}")
+    for name, build in (("legacy", _legacy_build), ("current", rank._RankTable)):
+        elapsed, retained = _measure(build, merged)
+        print(f"  {name:<8} {elapsed:>10.2f} {retained / 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+랭크 좌표 매칭(lookup_by_latlon) 벤치마크: 라운딩 키에 안 걸리는 좌표(근접 탐색 경로) 기준.
+
+- legacy : 전체 랭크 행 좌표를 파이썬 루프로 돌며 haversine_km → 최소 거리 행
+- numpy  : 전체 좌표에 haversine_km_np + argmin (user-015 시점의 fallback)
+- radius : GridIndex.radius(MATCH_RADIUS_M) — 반경 안 셀만 본다 (현재 lookup_by_latlon)
+- batch  : match_latlon_batch — 키 조회도 배열로, 남은 좌표는 GridIndex.nearest_within_batch 한 번
+
+모든 경로가 같은 행을 고르는지 확인한 뒤 좌표 1개당 시간을 비교한다.
+
+실행: python -m benchmarks.bench_rank_match [USER CSV] [ADMIN CSV] [좌표 수]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services import shelter_rank_service as rank
+from app.utils.geo_util import haversine_km, haversine_km_np
+
+
+def _legacy(table, lat, lon):
+    best, best_d = -1, 1e18
+    for i, (lt, ln) in enumerate(zip(table.lat.tolist(), table.lon.tolist())):
+        d = haversine_km(lat, lon, lt, ln) * 1000.0
+        if d < best_d:
+            best, best_d = i, d
+    return best if best_d <= rank.MATCH_RADIUS_M else -1
+
+
+def _numpy(table, lat, lon):
+    dist_m = haversine_km_np(lat, lon, table.lat, table.lon) * 1000.0
+    i = int(np.argmin(dist_m))
+    return i if dist_m[i] <= rank.MATCH_RADIUS_M else -1
+
+
+def _radius(table, lat, lon):
+    pos, _ = table.index.radius(lat, lon, rank.MATCH_RADIUS_M / 1000.0)
+    return int(pos[0]) if len(pos) else -1
+
+
+def main():
+    if len(sys.argv) > 2:
+        rank.USER_ALL_CSV, rank.ADMIN_ALL_CSV = sys.argv[1], sys.argv[2]
+    m = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    rank.ensure_loaded()
+    table = rank._TABLE
+    if table is None or table.n == 0:
+        sys.exit(f"no rank rows: {rank.USER_ALL_CSV}, {rank.ADMIN_ALL_CSV}")
+    print(f"rank rows={table.n:,} queries={m:,} match radius={rank.MATCH_RADIUS_M:.0f} m")
+
+    # 실제 행 근처로 흔든 좌표(반경 안/밖 섞임) 중 라운딩 키에 안 걸리는 것만 쓴다
+    rng = np.random.default_rng(0)
+    pick = rng.integers(0, table.n, m)
+    lats = table.lat[pick] + rng.normal(0.0, 0.002, m)
+    lons = table.lon[pick] + rng.normal(0.0, 0.002, m)
+    miss = np.ones(m, dtype=bool)
+    for d in (5, 4, 3):
+        miss &= table.find_keys(rank._round_keys(lats, lons, d)) < 0
+    lats, lons = lats[miss], lons[miss]
+    m = len(lats)
+
+    t0 = time.perf_counter()
+    batch = rank.match_latlon_batch(lats, lons)
+    batch_s = time.perf_counter() - t0
+    print(f"key misses={m:,} matched within radius={int((batch >= 0).sum()):,}")
+
+    results = {"batch": batch_s / m}
+    n_legacy = min(m, 50)
+    for name, fn, count in (("legacy", _legacy, n_legacy), ("numpy", _numpy, m), ("radius", _radius, m)):
+        t0 = time.perf_counter()
+        got = np.array([fn(table, float(a), float(b)) for a, b in zip(lats[:count], lons[:count])])
+        results[name] = (time.perf_counter() - t0) / count
+        assert np.array_equal(got, batch[:count]), name
+
+    print(f"  {'':<8} {'per query (ms)':>15} {'vs legacy':>10}")
+    for name in ("legacy", "numpy", "radius", "batch"):
+        print(f"  {name:<8} {results[name] * 1e3:>15.4f} {results['legacy'] / results[name]:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
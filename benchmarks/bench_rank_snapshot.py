@@ -0,0 +1,91 @@
+"""
+랭크 테이블 워커별 메모리 벤치마크: 워커마다 CSV에서 직접 만들기 vs 공유 스냅샷 mmap.
+
+워커 N개(별도 프로세스)가 각각 랭크 테이블을 적재하고 모든 열을 한 번씩 읽은 뒤
+/proc/self/smaps_rollup의 Private(그 워커만의 메모리)와 Pss(공유 페이지를 나눠 가진 몫)를
+적재 전 대비 증가분으로 보고한다. 스냅샷 모드는 같은 파일의 페이지를 공유하므로
+Private가 거의 늘지 않고 Pss는 워커 수로 나뉜다. (Linux 전용)
+
+실행: python -m benchmarks.bench_rank_snapshot [USER CSV] [ADMIN CSV] [워커 수]
+"""
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _rollup():
+    out = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                out[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "private": out.get("Private_Clean", 0) + out.get("Private_Dirty", 0),
+        "pss": out.get("Pss", 0),
+    }
+
+
+def _worker(user, admin, snapshot, start, results, done):
+    import numpy as np
+    from app.services import shelter_rank_service as rank
+
+    rank.USER_ALL_CSV, rank.ADMIN_ALL_CSV, rank.RANK_SNAPSHOT = user, admin, snapshot
+    before = _rollup()
+    t0 = time.perf_counter()
+    table = rank.get_table()
+    load_s = time.perf_counter() - t0
+    # 모든 열을 한 번 읽어 페이지를 올린다 (mmap은 읽은 페이지만 RSS에 잡힌다)
+    arrays = [table.lat, table.lon, table.keys, table.key_order, table.grade_user, table.grade_admin]
+    arrays += list(table.nums.values()) + [codes for codes, _ in table.labels.values()]
+    arrays += [getattr(table.index, n) for n in ("keys", "order", "lat_deg", "lon_deg", "lat_rad", "lon_rad", "cos_lat")]
+    for arr in arrays:
+        np.asarray(arr).sum()
+    start.wait()  # 모두 적재한 뒤에 재야 Pss가 공유 몫으로 나뉜다
+    after = _rollup()
+    results.put((load_s, after["private"] - before["private"], after["pss"] - before["pss"]))
+    done.wait()
+
+
+def _run(user, admin, snapshot, n):
+    ctx = mp.get_context("spawn")
+    start, done, results = ctx.Barrier(n), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(user, admin, snapshot, start, results, done)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main():
+    user = sys.argv[1] if len(sys.argv) > 1 else "data/shelters_rank_user_all.csv"
+    admin = sys.argv[2] if len(sys.argv) > 2 else "data/shelters_rank_admin_all.csv"
+    n = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    work = tempfile.mkdtemp(prefix="bench_rank_snapshot_")
+    try:
+        u, a = os.path.join(work, "user.csv"), os.path.join(work, "admin.csv")
+        shutil.copy(user, u)
+        shutil.copy(admin, a)
+        snap = os.path.join(work, "rank.snap")
+        _run(u, a, snap, 1)  # 스냅샷/열 캐시를 미리 만들어 둔다
+
+        print(f"workers={n}")
+        print(f"  {'mode':<10} {'load (s)':>9} {'private/worker (MB)':>20} {'pss/worker (MB)':>16} {'pss total (MB)':>15}")
+        for mode, path in (("csv", "0"), ("snapshot", snap)):
+            rows = _run(u, a, path, n)
+            load = max(r[0] for r in rows)
+            private = sum(r[1] for r in rows) / n / 1e6
+            pss = sum(r[2] for r in rows) / 1e6
+            print(f"  {mode:<10} {load:>9.2f} {private:>20.1f} {pss / n:>16.1f} {pss:>15.1f}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
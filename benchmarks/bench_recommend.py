@@ -0,0 +1,66 @@
+"""
+수용력 기반 추천 지연 벤치마크: get_nearby_from_csv(limit=k) vs get_recommendation_from_csv(candidates=k).
+
+두 조회 모두 같은 k-최근접(셀별 후보표)으로 후보를 찾고, 추천은 후보 k개에 점수를 매겨
+1 + alternatives개만 응답으로 만든다. 기준점은 데이터 점 주변에서 뽑고,
+필터 없음 / 필터 있음 두 경우를 요청당 평균·p99(us)로 비교한다.
+
+실행: python -m benchmarks.bench_recommend [CSV 경로]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.shelter_csv_service import (
+    RECOMMEND_CANDIDATES,
+    USER_CSV,
+    _get_snapshot,
+    get_nearby_from_csv,
+    get_recommendation_from_csv,
+)
+
+QUERIES = 5_000
+ALTERNATIVES = 4
+FILTER = "shelter_type_code=1"
+
+
+def _timings_us(fn, queries) -> np.ndarray:
+    out = np.empty(len(queries))
+    for i, (lat, lon) in enumerate(queries):
+        t0 = time.perf_counter()
+        fn(lat, lon)
+        out[i] = time.perf_counter() - t0
+    return out * 1e6
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else USER_CSV
+    snap = _get_snapshot(path)
+    if snap.knn_table is None:
+        snap.warm()
+    lat = snap.latitude
+    lon = snap.longitude
+    rng = np.random.default_rng(7)
+    near = rng.integers(0, len(lat), QUERIES)
+    queries = list(zip(
+        (lat[near] + rng.normal(0, 0.005, QUERIES)).tolist(),
+        (lon[near] + rng.normal(0, 0.005, QUERIES)).tolist(),
+    ))
+    k = RECOMMEND_CANDIDATES
+
+    print(f"{path}: {len(lat):,} shelters, {QUERIES:,} queries, k={k}, alternatives={ALTERNATIVES}")
+    print(f"  {'filter':<22} {'query':<10} {'mean (us)':>10} {'p99 (us)':>10}")
+    for flt in (None, FILTER):
+        snap.filter_mask(flt)  # 필터 컴파일은 캐시되므로 미리 한 번
+        calls = {
+            "nearby": lambda a, b: get_nearby_from_csv(path, a, b, limit=k, filters=flt),
+            "recommend": lambda a, b: get_recommendation_from_csv(path, a, b, k, ALTERNATIVES, filters=flt),
+        }
+        for name, fn in calls.items():
+            us = _timings_us(fn, queries)
+            print(f"  {flt or '-':<22} {name:<10} {us.mean():>10.1f} {np.percentile(us, 99):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+업로드 검증 메모리 벤치마크: shelter_upload_service.validate_csv(청크 검증) vs pd.read_csv 전체 읽기.
+
+입력 CSV를 이어 붙여 N행짜리 파일을 만든 뒤, 각 방식을 별도 프로세스에서 돌려
+최대 RSS 증가분(VmHWM, 시작 전 VmRSS 대비)과 시간을 비교한다. 청크 검증은 파일 크기와 무관하게
+UPLOAD_CHUNK_ROWS 행만큼만 메모리를 쓴다. (Linux 전용: /proc/self/clear_refs로 최대값을 초기화)
+
+실행: python -m benchmarks.bench_upload_validate [USER CSV] [행 수]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+_CHILD = r"""
+import sys, time
+import pandas as pd
+from app.services.shelter_upload_service import validate_csv
+
+def status(key):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) / 1024 for line in f if line.startswith(key + ":"))
+
+mode, path = sys.argv[1], sys.argv[2]
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")  # import 중 최대 RSS를 지우고 지금부터 잰다
+before = status("VmRSS")
+t0 = time.perf_counter()
+if mode == "validate":
+    report = validate_csv(path, "user")
+    assert report["ok"], report["errors"]
+else:
+    pd.read_csv(path, low_memory=False)
+print(f"{time.perf_counter() - t0:.2f} {status('VmHWM') - before:.0f}")
+"""
+
+
+def main():
+    src = sys.argv[1] if len(sys.argv) > 1 else "data/shelters_rank_user_all.csv"
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        with open(src, "rb") as f:
+            header = f.readline()
+            body = f.read()
+        lines = body.splitlines(keepends=True)
+        with open(path, "wb") as out:
+            out.write(header)
+            written = 0
+            while written < rows:
+                part = lines[: rows - written]
+                out.writelines(part)
+                written += len(part)
+        print(f"rows={rows:,} size={os.path.getsize(path) / 1e6:.0f} MB")
+        env = dict(os.environ, DB_PORT=os.environ.get("DB_PORT", "3306"), PYTHONPATH=os.getcwd())
+        print(f"  {'mode':<10} {'time (s)':>9} {'peak RSS +MB':>13}")
+        for mode in ("read_csv", "validate"):
+            out = subprocess.run([sys.executable, "-c", _CHILD, mode, path], env=env, capture_output=True, text=True)
+            if out.returncode != 0:
+                sys.exit(out.stderr)
+            seconds, mb = out.stdout.split()[-2:]
+            print(f"  {mode:<10} {seconds:>9} {mb:>13}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ from app.handlers import disaster_handler
 from app.rag.disaster.vectorstore import build_vectorstore
 from app.services.region_service import load_region_csv
 from app.services.shelter_service import fetch_and_store_shelters
+from app.services.shelter_reload_service import start_shelter_data_watcher
+from app.services.shelter_csv_service import preload_snapshots
 from app.services.disaster_service import fetch_and_store_disasters
 from app.handlers import post_handler
 from starlette.concurrency import run_in_threadpool
@@ -18,6 +20,7 @@ from app.handlers import comment_handler
 from app.handlers import like_handler
 from app.handlers import chatbot_handler
 from app.handlers import hospital_handler
+from app.handlers import cluster_handler
 from app.services.hospital_service import fetch_and_store_hospitals
 from app.handlers import news_handler
 from app.handlers import youtube_handler
@@ -38,6 +41,7 @@ app.include_router(friend_handler.router, prefix="/api", tags= ["Friend"])
 app.include_router(youtube_handler.router, prefix="/api", tags= ["youtube"])
 app.include_router(news_handler.router, prefix="/api", tags= ["news"])
 app.include_router(hospital_handler.router, prefix="/api", tags=["hospital"])
+app.include_router(cluster_handler.router, prefix="/api", tags=["cluster"])
 app.include_router(shelter_handler.router, prefix="/api", tags=["shelter"])
 app.include_router(user_handler.router, prefix="/api", tags=["user"])
 app.include_router(email_handler.router, prefix="/api", tags=["email"])
@@ -69,6 +73,7 @@ def scheduled_hospital_fetch():
 @app.on_event("startup")
 async def on_startup():
     redis: Redis = await get_redis()
+    preload_snapshots()
     init_firebase()
     await create_db_and_tables()
     await run_in_threadpool(load_region_csv)
@@ -77,6 +82,7 @@ async def on_startup():
     await run_in_threadpool(fetch_and_store_hospitals)
     scheduler.start()
     print("[APScheduler] Started!")
+    start_shelter_data_watcher()
     vs = build_vectorstore()   
     init_vectorstore(vs)     
 
@@ -0,0 +1,45 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.utils.geo_util import haversine_km
+from app.utils.spatial_index_util import GridIndex, KnnCellTable
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(33.0, 38.5, 2000)
+    lons = rng.uniform(124.5, 131.0, 2000)
+    return GridIndex(lats, lons)
+
+
+def _brute(index, lat, lon, k):
+    d = np.array([haversine_km(lat, lon, b, c) for b, c in zip(index.lat_deg, index.lon_deg)])
+    return np.sort(d)[:k]
+
+
+@pytest.mark.parametrize("lat, lon", [(math.nan, 126.9), (37.5, math.inf), (-math.inf, 126.9)])
+def test_non_finite_point_is_rejected(index, lat, lon):
+    with pytest.raises(ValueError):
+        index.knn(lat, lon, 3)
+    with pytest.raises(ValueError):
+        index.knn_batch(np.array([37.5, lat]), np.array([126.9, lon]), 3)
+    with pytest.raises(ValueError):
+        KnnCellTable(index, 8).knn(lat, lon, 3)
+
+
+@pytest.mark.parametrize("lat, lon", [(1e300, 126.9), (37.5, -1e300), (89.9, -179.9), (-60.0, 0.0)])
+def test_point_outside_grid_terminates(index, lat, lon):
+    pos, dist = index.knn(lat, lon, 3)
+    assert len(pos) == 3 and np.all(np.diff(dist) >= 0)
+    bpos, bdist = index.knn_batch(np.array([lat]), np.array([lon]), 3)
+    assert bpos.shape == (1, 3)
+    np.testing.assert_allclose(bdist[0], dist)
+
+
+@pytest.mark.parametrize("lat, lon", [(89.9, -179.9), (-60.0, 0.0), (40.0, 127.0)])
+def test_point_outside_grid_matches_brute_force(index, lat, lon):
+    _, dist = index.knn(lat, lon, 5)
+    np.testing.assert_allclose(dist, _brute(index, lat, lon, 5), rtol=1e-9)